@@ -1,13 +1,14 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
+from core.cache import cache
 from core.database import get_db
 from .security_service import decode_token
 from auth.models import User
+from auth.schemas import CurrentUser
 from sqlalchemy import select
-from .security_service import is_token_blacklisted
-from .security_service.schemas import BlacklistService
-from .security_service.token_models import RefreshTokenSession
+from .security_service.blacklist import BLACKLISTED, blacklist_key, check_blacklist_db
+from .security_service.principal_cache import cache_principal, parse_principal, principal_key, principal_version_key
 
 security = HTTPBearer()
 
@@ -16,22 +17,14 @@ security = HTTPBearer()
 
 
 #Получаем текущего пользователя
-async def get_current_user(credentials: HTTPBearer = Depends(security), db: AsyncSession = Depends(get_db)) -> User:
+# Обычно один запрос в Redis (MGET blacklist + кэш пользователя и его версия) без обращения к базе;
+# база читается только при промахе кэша
+async def get_current_user(credentials: HTTPBearer = Depends(security), db: AsyncSession = Depends(get_db)) -> CurrentUser:
 
 
     token = credentials.credentials
 
 
-    blacklist_check = BlacklistService(
-        token=token,
-        user_id=0,
-        token_type="access"
-    )
-
-
-    if await is_token_blacklisted(blacklist_check, db):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
-
     payload = decode_token(token)
     if payload is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
@@ -50,32 +43,42 @@ async def get_current_user(credentials: HTTPBearer = Depends(security), db: Asyn
         user_id = int(user_id_str)
     except ValueError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
-    
 
-    try:
-        query = select(User).where(User.id == user_id)
-        result = await db.execute(query)
-        user = result.scalar_one_or_none()
 
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
+    blacklisted, cached_user, version = await cache.get_many(
+        [blacklist_key(token), principal_key(user_id), principal_version_key(user_id)]
+    )
 
-    if user is None:
+    # None - нет в кэше (ни "true", ни негативной записи), проверяем базу
+    if blacklisted == BLACKLISTED or (blacklisted is None and await check_blacklist_db(token, db)):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
 
-    if not user.is_active:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not active")
 
-    # Check if the session is still active
-    
+    principal = parse_principal(cached_user, version)
+    if principal is None:
+        try:
+            query = select(User).where(User.id == user_id)
+            result = await db.execute(query)
+            user = result.scalar_one_or_none()
+
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
+
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
+
+        principal = await cache_principal(user, version)
+
+    if not principal.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not active")
 
-    return user
+    return principal
 
         
 
 
 #Получаем текущего лидера
-async def get_lead_user(current_user: Depends(get_current_user)) -> User:
+async def get_lead_user(current_user: Depends(get_current_user)) -> CurrentUser:
 
     if not current_user.is_lead:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not a lead")
@@ -84,7 +87,7 @@ async def get_lead_user(current_user: Depends(get_current_user)) -> User:
 
 
 #Получаем текущего активного пользователя
-async def get_is_active_user(current_user: Depends(get_current_user)) -> User:
+async def get_is_active_user(current_user: Depends(get_current_user)) -> CurrentUser:
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is not active")
     
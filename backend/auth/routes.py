@@ -6,11 +6,11 @@ from core.database import get_db
 from auth.security_service import (
     create_access_token, create_refresh_token, decode_token, get_token_expiry_minutes,
     TokenService, get_password_hash, verify_password, create_refresh_session, SessionService,
-    deactivate_session
+    deactivate_session, revoke_session_tokens
 )
 from auth.security_service.token_models import RefreshTokenSession
 from auth.models import User
-from auth.schemas import UserCreate, UserResponse, UserLogin, TokenResponse, SessionResponse, TokenRefresh
+from auth.schemas import CurrentUser, UserCreate, UserResponse, UserLogin, TokenResponse, SessionResponse, TokenRefresh
 from auth.dep import (
     get_current_user,
     get_lead_user,
@@ -95,9 +95,13 @@ async def login(credentials: UserLogin, request: Request, db: AsyncSession = Dep
 
 
 @router.get('/me', response_model=UserResponse, status_code=status.HTTP_200_OK)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     """Get current authenticated user information"""
-    return current_user
+    # get_current_user отдает краткие данные из кэша, профиль читаем из базы
+    user = await db.get(User, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user
 
 
 @router.post('/logout', status_code=status.HTTP_200_OK)
@@ -126,6 +130,8 @@ async def logout(
     
     # Деактивируем сессию вместо удаления (лучше для аудита)
     session.is_active = False
+    # Access токен сессии больше не принимается
+    await revoke_session_tokens([session], "logout", db)
     await db.commit()
     
     return {"message": "Logout successful"}
@@ -223,6 +229,7 @@ async def logout_all_devices(
         session.is_active = False
         count += 1
     
+    await revoke_session_tokens(sessions, "logout_all", db)
     await db.commit()
     
     return {
@@ -258,6 +265,7 @@ async def logout_specific_session(
         )
     
     session.is_active = False
+    await revoke_session_tokens([session], "session_terminated", db)
     await db.commit()
     
     return {"message": "Session terminated successfully"}
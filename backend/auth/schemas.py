@@ -26,6 +26,17 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class CurrentUser(BaseModel):
+    """Текущий пользователь из get_current_user (кэшируется в Redis)"""
+    id: int
+    username: str
+    is_active: bool
+    is_lead: bool
+
+    class Config:
+        from_attributes = True
+
+
 class UserLogin(BaseModel):
     username: str
     password: str
@@ -7,4 +7,5 @@ from .tokens import (
 from .schemas import TokenService, SessionService
 from .password import hash_password as get_password_hash, verify_password
 from .session import create_refresh_session, deactivate_session
-from .blacklist import is_token_blacklisted
+from .blacklist import is_token_blacklisted, revoke_session_tokens
+from .principal_cache import invalidate_principal
@@ -3,20 +3,36 @@ from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
 from core.cache import cache
+from core.config import settings
 from .token_models import TokenBlacklist
 from .schemas import BlacklistService
 from .tokens import decode_token
 
 
+# Значения ключа blacklist:{token} в Redis: "true" - токен отозван,
+# "false" - негативный кэш (в базе токена нет, хранится AUTH_BLACKLIST_NEGATIVE_TTL_SECONDS)
+BLACKLISTED = "true"
+NOT_BLACKLISTED = "false"
+
+
+def blacklist_key(token: str) -> str:
+    return f"blacklist:{token}"
+
+
 async def is_token_blacklisted(tb: BlacklistService, db: AsyncSession) -> bool:
      
-    # Проверка в кэше
-    if await cache.get(f"blacklist:{tb.token}"):
-        return True
-    
-    # Проверка в базе данных
+    # Проверка в кэше (в том числе негативном)
+    cached = await cache.get(blacklist_key(tb.token))
+    if cached is not None:
+        return cached == BLACKLISTED
+
+    return await check_blacklist_db(tb.token, db)
+
+
+async def check_blacklist_db(token_value: str, db: AsyncSession) -> bool:
+    """Проверка по базе данных с записью результата в кэш"""
     try:
-        query = select(TokenBlacklist).where(TokenBlacklist.token == tb.token)
+        query = select(TokenBlacklist).where(TokenBlacklist.token == token_value)
         result = await db.execute(query)
         token = result.scalar_one_or_none()
 
@@ -25,9 +41,18 @@ async def is_token_blacklisted(tb: BlacklistService, db: AsyncSession) -> bool:
             expire_in = int((token.expires_at - datetime.utcnow()).total_seconds())
             if expire_in > 0:
                 # Используем префикс blacklist: для согласованности и аргумент ex
-                await cache.set(f"blacklist:{tb.token}", "true", ex=expire_in)
+                await cache.set(blacklist_key(token_value), BLACKLISTED, ex=expire_in)
             return True
-        
+
+        # Негативный кэш: nx, чтобы не затереть "true", записанный blacklist_token
+        # между нашим запросом к базе и этой записью
+        if settings.AUTH_BLACKLIST_NEGATIVE_TTL_SECONDS > 0:
+            await cache.set(
+                blacklist_key(token_value),
+                NOT_BLACKLISTED,
+                ex=settings.AUTH_BLACKLIST_NEGATIVE_TTL_SECONDS,
+                nx=True
+            )
         return False
         
     except Exception as e:
@@ -47,7 +72,8 @@ async def blacklist_token(tb: BlacklistService, db: AsyncSession) ->  TokenBlack
     expire_in = int((expires_at - datetime.utcnow()).total_seconds())
     if expire_in > 0:
         # Исправлен аргумент на ex (согласно core/cache.py)
-        await cache.set(f'blacklist:{tb.token}', 'true', ex=expire_in)
+        # Пишется до коммита в базу и перезаписывает негативный кэш
+        await cache.set(blacklist_key(tb.token), BLACKLISTED, ex=expire_in)
 
 
     blacklist_entry = TokenBlacklist(
@@ -66,6 +92,26 @@ async def blacklist_token(tb: BlacklistService, db: AsyncSession) ->  TokenBlack
 
 
 
+async def revoke_session_tokens(sessions: list, reason: str, db: AsyncSession) -> int:
+    """
+    Отозвать access токены сессий (logout): токен сразу попадает в blacklist
+    в Redis, поэтому перестает приниматься до истечения своего срока.
+    Истекшие токены пропускаются. Возвращает число отозванных токенов.
+    """
+    revoked = 0
+    for session in sessions:
+        try:
+            await blacklist_token(
+                BlacklistService(token=session.token, user_id=session.user_id, token_type="access", reason=reason),
+                db
+            )
+            revoked += 1
+        except ValueError:
+            # Токен уже истек - отзывать нечего
+            continue
+    return revoked
+
+
 async def cleanup_expired_blacklist(db: AsyncSession) -> int:
 
     now = datetime.utcnow()
@@ -0,0 +1,108 @@
+import asyncio
+from typing import Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from core.cache import cache
+from core.config import settings
+from auth.models import User
+from auth.schemas import CurrentUser
+
+
+# Кэш данных пользователя для get_current_user (auth:user:{id}, TTL AUTH_PRINCIPAL_CACHE_TTL_SECONDS).
+# Сбрасывается после коммита, меняющего username / is_active / is_lead, и при удалении
+# пользователя; изменения в обход ORM (SQL, другие сервисы) видны не позже чем через TTL.
+#
+# Сброс увеличивает версию пользователя (auth:user:{id}:version), запись в кэше хранит версию,
+# прочитанную до SELECT. Запрос, который прочитал пользователя из базы до коммита, а записал в кэш
+# после сброса, записывает старую версию - такая запись не используется.
+PRINCIPAL_FIELDS = ("username", "is_active", "is_lead")
+
+# Фоновые задачи сброса кэша (ссылки держим, чтобы задачи не собрал GC)
+_pending_invalidations: set[asyncio.Task] = set()
+
+
+def principal_key(user_id: int) -> str:
+    return f"auth:user:{user_id}"
+
+
+def principal_version_key(user_id: int) -> str:
+    return f"auth:user:{user_id}:version"
+
+
+def parse_principal(value: Optional[str], version: Optional[str]) -> Optional[CurrentUser]:
+    """
+    Данные пользователя из значения кэша
+    None - нет в кэше, запись повреждена или записана до последнего сброса (другая версия)
+    """
+    if value is None:
+        return None
+    cached_version, _, data = value.partition(":")
+    if cached_version != (version or "0"):
+        return None
+    try:
+        return CurrentUser.model_validate_json(data)
+    except ValueError:
+        return None
+
+
+async def cache_principal(user: User, version: Optional[str]) -> CurrentUser:
+    """Записать пользователя в кэш; version - версия, прочитанная до SELECT"""
+    principal = CurrentUser.model_validate(user)
+    if settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS > 0:
+        await cache.set(
+            principal_key(principal.id),
+            f"{version or '0'}:{principal.model_dump_json()}",
+            ex=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS
+        )
+    return principal
+
+
+async def invalidate_principal(user_id: int):
+    """Сбросить кэш пользователя (деактивация, смена роли, logout)"""
+    # Кэш выключен (TTL 0) - записей нет, версия не нужна (ключ без TTL копился бы в Redis)
+    if settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS <= 0:
+        await cache.delete(principal_key(user_id))
+        return
+    # Версия живет дольше записей кэша, иначе после ее истечения старая запись
+    # с версией "0" снова стала бы действительной
+    await cache.incr(principal_version_key(user_id), ex=2 * settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS)
+    await cache.delete(principal_key(user_id))
+
+
+# ============================================
+# Сброс по событиям ORM
+# ============================================
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context):
+    """Запоминаем пользователей, у которых изменились поля из кэша"""
+    changed = session.info.setdefault("auth_changed_user_ids", set())
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in PRINCIPAL_FIELDS):
+                changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session):
+    user_ids = session.info.pop("auth_changed_user_ids", None)
+    if not user_ids:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Синхронный код (скрипты, миграции) - кэш истечет по TTL
+        return
+    for user_id in user_ids:
+        task = loop.create_task(invalidate_principal(user_id))
+        _pending_invalidations.add(task)
+        task.add_done_callback(_pending_invalidations.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session):
+    session.info.pop("auth_changed_user_ids", None)
@@ -0,0 +1,132 @@
+"""
+Бенчмарк сериализации списков задач
+
+Сравнивает стандартный путь FastAPI (JSONResponse, response_model: model_dump,
+повторная валидация, сериализация, json.dumps) с быстрым (ORJSONResponse по
+умолчанию + PydanticJSONResponse: одна валидация и model_dump_json в
+pydantic-core) на эндпоинтах GET /tasks/ и GET /tasks/overdue.
+
+База данных не нужна: задачи - объекты с атрибутами как у ORM моделей,
+запросы идут через httpx.ASGITransport. Тела ответов обоих путей сравниваются.
+
+Запуск (из backend/):
+    python benchmarks/task_list_benchmark.py --page-sizes 20,100 --assignees 3
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import ORJSONResponse  # noqa: E402
+
+from core.responses import PydanticJSONResponse  # noqa: E402
+from my_tasks.models import TaskPriority, TaskStatus  # noqa: E402
+from my_tasks.schemas import TaskListResponse, TaskResponse, TaskResponseList  # noqa: E402
+
+
+def make_user(user_id: int) -> SimpleNamespace:
+    return SimpleNamespace(id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com")
+
+
+def make_tasks(count: int, assignees: int) -> list[SimpleNamespace]:
+    """Задачи с вложенными назначениями, как их отдает get_tasks()"""
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    tasks = []
+    for task_id in range(1, count + 1):
+        tasks.append(SimpleNamespace(
+            id=task_id,
+            title=f"Задача {task_id}",
+            description="Описание задачи " * 10,
+            status=TaskStatus.IN_PROGRESS,
+            priority=TaskPriority.HIGH,
+            due_date=now + timedelta(days=task_id),
+            room_id=1,
+            estimated_hours=4.5,
+            complexity_score=3,
+            created_by_id=1,
+            created_at=now,
+            updated_at=now,
+            completed_at=None,
+            created_by=make_user(1),
+            assignments=[
+                SimpleNamespace(
+                    task_id=task_id,
+                    user_id=user_id,
+                    assigned_at=now,
+                    assigned_by_id=1,
+                    user=make_user(user_id)
+                )
+                for user_id in range(2, 2 + assignees)
+            ]
+        ))
+    return tasks
+
+
+def make_app(tasks: list[SimpleNamespace], fast: bool) -> FastAPI:
+    """Приложение со стандартным (fast=False) или быстрым путем сериализации"""
+    app = FastAPI(default_response_class=ORJSONResponse) if fast else FastAPI()
+
+    @app.get("/tasks/", response_model=TaskListResponse)
+    async def get_all_tasks():
+        response = TaskListResponse(tasks=tasks, total=len(tasks), page=1, page_size=len(tasks), total_pages=1)
+        return PydanticJSONResponse(response) if fast else response
+
+    @app.get("/tasks/overdue", response_model=list[TaskResponse])
+    async def get_overdue_tasks():
+        return PydanticJSONResponse(TaskResponseList(tasks)) if fast else tasks
+
+    return app
+
+
+async def measure(app: FastAPI, path: str, runs: int) -> tuple[list[float], bytes]:
+    """Задержки запросов (мс) и тело последнего ответа"""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(min(runs, 20)):  # прогрев
+            await client.get(path)
+        latencies = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+        return latencies, response.content
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-sizes", default="20,100", help="Задач в ответе")
+    parser.add_argument("--assignees", type=int, default=3, help="Ответственных на задачу")
+    parser.add_argument("--runs", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"runs={args.runs} assignees={args.assignees}")
+    print(f"{'endpoint':>14} {'tasks':>6} {'path':>9} {'p50 ms':>8} {'p95 ms':>8} {'req/s':>8}")
+    for page_size in (int(v) for v in args.page_sizes.split(",")):
+        tasks = make_tasks(page_size, args.assignees)
+        for path in ("/tasks/", "/tasks/overdue"):
+            bodies = {}
+            for name, fast in (("default", False), ("fast", True)):
+                latencies, bodies[name] = await measure(make_app(tasks, fast), path, args.runs)
+                print(
+                    f"{path:>14} {page_size:>6} {name:>9} {percentile(latencies, 50):>8.3f} "
+                    f"{percentile(latencies, 95):>8.3f} {1000 / statistics.mean(latencies):>8.0f}"
+                )
+            assert json.loads(bodies["default"]) == json.loads(bodies["fast"]), "response bodies differ"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
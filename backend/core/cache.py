@@ -24,14 +24,15 @@ class RedisCache:
             await self.redis.close()
             print('Redis отключен')
 
-    async def set(self, key: str, value: str, ex: Optional[int] = None):
+    async def set(self, key: str, value: str, ex: Optional[int] = None, nx: bool = False):
+        # nx=True - записать, только если ключа еще нет
         if not self.redis:
             return
         try:
-            if ex:
+            if ex and not nx:
                 await self.redis.setex(key, ex, value)
             else:
-                await self.redis.set(key, value)
+                await self.redis.set(key, value, ex=ex or None, nx=nx)
         except:
             print('Ошибка при записи в Redis')
 
@@ -44,6 +45,16 @@ class RedisCache:
             print('Ошибка при чтении из Redis')
             return None
 
+    async def get_many(self, keys: list[str]) -> list[Optional[str]]:
+        # Несколько ключей за один запрос (MGET)
+        if not self.redis:
+            return [None] * len(keys)
+        try:
+            return await self.redis.mget(keys)
+        except:
+            print('Ошибка при чтении из Redis')
+            return [None] * len(keys)
+
     async def delete(self, key: str):
         if not self.redis:
             return
@@ -52,6 +63,19 @@ class RedisCache:
         except:
             print('Ошибка при удалении из Redis')
 
+    async def incr(self, key: str, ex: Optional[int] = None) -> Optional[int]:
+        # Атомарный счетчик; ex - продлить TTL ключа
+        if not self.redis:
+            return None
+        try:
+            value = await self.redis.incr(key)
+            if ex:
+                await self.redis.expire(key, ex)
+            return value
+        except:
+            print('Ошибка при записи в Redis')
+            return None
+
     async def exists(self, key: str):
         if not self.redis:
             return False
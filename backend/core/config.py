@@ -19,6 +19,24 @@ class Settings(BaseSettings):
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/1"
 
+    # RAG microservice client
+    RAG_SERVICE_URL: str = "http://localhost:8001"
+    RAG_TIMEOUT_SECONDS: float = 30.0
+    RAG_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    RAG_MAX_CONNECTIONS: int = 100
+    RAG_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    RAG_HTTP2: bool = True
+    RAG_RETRIES: int = 2
+    RAG_RETRY_BACKOFF_SECONDS: float = 0.2
+    RAG_RETRY_BACKOFF_MAX_SECONDS: float = 2.0
+    RAG_BREAKER_FAILURES: int = 5
+    RAG_BREAKER_RESET_SECONDS: float = 30.0
+    RAG_COALESCE_WINDOW_MS: float = 2.0  # 0 disables coalescing of concurrent calls
+    RAG_MAX_BATCH_SIZE: int = 32
+    RAG_WIRE_FORMAT: str = "msgpack"  # msgpack | json (msgpack falls back to json if not installed)
+    RAG_COMPRESSION: str = "gzip"  # gzip | zstd | "" (request bodies; responses are negotiated)
+    RAG_COMPRESS_MIN_BYTES: int = 1024
+
     # JWT
     SECRET_KEY: str
     ALGORITHM: str
@@ -26,6 +44,10 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_DAYS: int = 30
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 43200  # 30 days in minutes
 
+    # Кэш аутентификации в Redis (0 - выключен)
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = 60  # данные пользователя для get_current_user
+    AUTH_BLACKLIST_NEGATIVE_TTL_SECONDS: int = 60  # "токен не в blacklist"
+
     # Security
     BCRYPT_ROUNDS: int = 12
     MAX_LOGIN_ATTEMPTS: int = 5
@@ -0,0 +1,25 @@
+"""
+Быстрые JSON ответы
+Ответ по умолчанию приложения - ORJSONResponse (main.py); ответы с Pydantic
+моделями сериализуются напрямую в pydantic-core
+"""
+from typing import Any
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+class PydanticJSONResponse(ORJSONResponse):
+    """
+    JSON ответ для Pydantic модели
+
+    FastAPI не сериализует возвращенный Response повторно, поэтому модель
+    валидируется один раз (при создании) и сразу пишется в JSON байты.
+    response_model у эндпоинта оставляется для OpenAPI схемы.
+    Не модели (dict, list) сериализуются через orjson.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return super().render(content)
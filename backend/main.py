@@ -1,4 +1,6 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from granian import Granian
 from core.config import settings
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,9 +10,23 @@ from resume_ai.routes import router as resume_ai_router
 from rooms.routes import router as rooms_router
 from ai.routes import router as ai_router
 from notifications.routes import router as notifications_router
+from rag_client import rag_client
+from core.cache import cache
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Redis: blacklist токенов и кэш пользователей для get_current_user
+    await cache.connect()
+    # Пул соединений к RAG сервису открывается один раз на процесс
+    await rag_client.start()
+    yield
+    await rag_client.close()
+    await cache.disconnect()
+
+
+# orjson вместо json.dumps для всех ответов (списки задач - см. core/responses.py)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 
 app.add_middleware(
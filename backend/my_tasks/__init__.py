@@ -8,6 +8,7 @@ from my_tasks.schemas import (
     TaskUpdate,
     TaskResponse,
     TaskListResponse,
+    TaskResponseList,
     TaskFilterParams,
     TaskStatistics,
     TaskAssignmentResponse,
@@ -43,6 +44,7 @@ __all__ = [
     "TaskUpdate",
     "TaskResponse",
     "TaskListResponse",
+    "TaskResponseList",
     "TaskFilterParams",
     "TaskStatistics",
     "TaskAssignmentResponse",
@@ -4,6 +4,7 @@ from typing import Optional
 import math
 
 from core.database import get_db
+from core.responses import PydanticJSONResponse
 from auth.dep import get_current_user
 from auth.models import User
 from my_tasks.schemas import (
@@ -11,6 +12,7 @@ from my_tasks.schemas import (
     TaskUpdate,
     TaskResponse,
     TaskListResponse,
+    TaskResponseList,
     TaskFilterParams,
     TaskStatistics,
     AddAssigneeRequest,
@@ -94,13 +96,13 @@ async def get_all_tasks(
     # Вычисляем общее количество страниц
     total_pages = math.ceil(total / pagination.page_size) if total > 0 else 1
     
-    return TaskListResponse(
+    return PydanticJSONResponse(TaskListResponse(
         tasks=tasks,
         total=total,
         page=pagination.page,
         page_size=pagination.page_size,
         total_pages=total_pages
-    )
+    ))
 
 
 @router.get("/my", response_model=TaskListResponse)
@@ -125,13 +127,13 @@ async def get_my_tasks(
     )
     total_pages = math.ceil(total / pagination.page_size) if total > 0 else 1
     
-    return TaskListResponse(
+    return PydanticJSONResponse(TaskListResponse(
         tasks=tasks,
         total=total,
         page=pagination.page,
         page_size=pagination.page_size,
         total_pages=total_pages
-    )
+    ))
 
 
 @router.get("/created-by-me", response_model=TaskListResponse)
@@ -156,13 +158,13 @@ async def get_tasks_created_by_me(
     )
     total_pages = math.ceil(total / pagination.page_size) if total > 0 else 1
     
-    return TaskListResponse(
+    return PydanticJSONResponse(TaskListResponse(
         tasks=tasks,
         total=total,
         page=pagination.page,
         page_size=pagination.page_size,
         total_pages=total_pages
-    )
+    ))
 
 
 @router.get("/overdue", response_model=list[TaskResponse])
@@ -173,7 +175,8 @@ async def get_overdue_tasks_endpoint(
     """
     Получить все просроченные задачи текущего пользователя
     """
-    return await get_overdue_tasks(db, user_id=current_user.id)
+    tasks = await get_overdue_tasks(db, user_id=current_user.id)
+    return PydanticJSONResponse(TaskResponseList(tasks))
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, RootModel, field_validator
 from datetime import datetime
 from typing import Optional
 from fastapi import Query
@@ -125,6 +125,11 @@ class TaskListResponse(BaseModel):
     total_pages: int
 
 
+class TaskResponseList(RootModel[list[TaskResponse]]):
+    """Список задач без пагинации (сериализуется одной моделью)"""
+    pass
+
+
 # ============================================
 # Task Filter Schemas
 # ============================================
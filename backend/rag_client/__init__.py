@@ -3,6 +3,24 @@ RAG Client Package
 HTTP client for communicating with RAG microservice
 """
 
-from .client import RAGClient
+from .client import RAGClient, get_rag_client, rag_client
+from .exceptions import (
+    RAGCircuitOpenError,
+    RAGError,
+    RAGOverloadedError,
+    RAGRequestError,
+    RAGTimeoutError,
+    RAGUnavailableError
+)
 
-__all__ = ["RAGClient"]
+__all__ = [
+    "RAGClient",
+    "rag_client",
+    "get_rag_client",
+    "RAGError",
+    "RAGRequestError",
+    "RAGUnavailableError",
+    "RAGOverloadedError",
+    "RAGTimeoutError",
+    "RAGCircuitOpenError"
+]
@@ -0,0 +1,78 @@
+"""
+Circuit Breaker
+Stops calling the RAG service after repeated failures and probes it again later
+"""
+
+import time
+from typing import Dict
+
+from .exceptions import RAGCircuitOpenError
+
+
+class CircuitBreaker:
+    """
+    Closed -> open -> half-open circuit breaker
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail immediately with RAGCircuitOpenError. Once reset_timeout has passed
+    a single probe call is let through (half-open): success closes the
+    circuit, failure opens it for another reset_timeout.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the circuit (0 disables the breaker)
+            reset_timeout: Seconds the circuit stays open before a probe
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_at = 0.0
+        self._state = self.CLOSED
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def before_call(self):
+        """Raise RAGCircuitOpenError unless a call may go through now"""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        now = time.monotonic()
+        # A probe that never reported back (e.g. a cancelled caller) expires after reset_timeout
+        if state == self.HALF_OPEN and (not self._probe_in_flight or now - self.probe_at >= self.reset_timeout):
+            self._probe_in_flight = True
+            self.probe_at = now
+            return
+        retry_after = max(0.0, self.reset_timeout - (now - self.opened_at))
+        raise RAGCircuitOpenError(
+            f"RAG service circuit is open after {self.failures} failures",
+            retry_after=retry_after
+        )
+
+    def record_success(self):
+        """The service answered (any response that is not a server failure)"""
+        self.failures = 0
+        self._state = self.CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        """Connection error, timeout or 5xx"""
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.failure_threshold and (self._state != self.CLOSED or self.failures >= self.failure_threshold):
+            self._state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        return {"state": self.state, "failures": self.failures}
@@ -1,185 +1,542 @@
 """
 HTTP Client for RAG Microservice
-Provides async methods to interact with the RAG service
+Pooled async client with retries, a circuit breaker and request coalescing
 """
 
+import asyncio
+import json
+import random
 import httpx
-from typing import List, Dict, Optional
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Union
+
+from core.config import settings
+from .circuit_breaker import CircuitBreaker
+from .codec import WireCodec, error_detail
+from .coalescer import RequestCoalescer
+from .exceptions import (
+    RAGError,
+    RAGOverloadedError,
+    RAGRequestError,
+    RAGTimeoutError,
+    RAGUnavailableError
+)
+
+try:
+    import h2  # noqa: F401  (HTTP/2 support for httpx: pip install "httpx[http2]")
+except ImportError:
+    h2 = None
+
+
+API_PREFIX = "/api/rag"
 
 
 class RAGClient:
     """
     Async HTTP client for RAG microservice
     Handles communication between main backend and RAG service
+
+    - One pooled httpx.AsyncClient per instance (HTTP/2 when available),
+      created on start() or on first use, closed by close().
+    - Retries with full-jitter exponential backoff. Searches, reads, deletes
+      and upserts are retried on any transient failure; inserts only when the
+      request surely was not processed (connect errors, 429/503).
+    - A circuit breaker fails calls fast while the service is down.
+    - Concurrent search() / index_document() calls are coalesced into one
+      /search/batch or /documents/bulk request.
+    - Bodies are sent as msgpack (or JSON) and large ones gzip/zstd
+      compressed; msgpack responses are negotiated with Accept.
+    - Failures raise RAGError subclasses instead of returning error dicts.
     """
-    
-    def __init__(self, base_url: str = "http://localhost:8001"):
+
+    def __init__(
+        self,
+        base_url: str = settings.RAG_SERVICE_URL,
+        timeout: float = settings.RAG_TIMEOUT_SECONDS,
+        connect_timeout: float = settings.RAG_CONNECT_TIMEOUT_SECONDS,
+        max_connections: int = settings.RAG_MAX_CONNECTIONS,
+        max_keepalive_connections: int = settings.RAG_MAX_KEEPALIVE_CONNECTIONS,
+        http2: bool = settings.RAG_HTTP2,
+        retries: int = settings.RAG_RETRIES,
+        backoff: float = settings.RAG_RETRY_BACKOFF_SECONDS,
+        backoff_max: float = settings.RAG_RETRY_BACKOFF_MAX_SECONDS,
+        breaker_failures: int = settings.RAG_BREAKER_FAILURES,
+        breaker_reset: float = settings.RAG_BREAKER_RESET_SECONDS,
+        coalesce_window_ms: float = settings.RAG_COALESCE_WINDOW_MS,
+        max_batch_size: int = settings.RAG_MAX_BATCH_SIZE,
+        wire_format: str = settings.RAG_WIRE_FORMAT,
+        compression: str = settings.RAG_COMPRESSION,
+        compress_min_bytes: int = settings.RAG_COMPRESS_MIN_BYTES,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
         """
-        Initialize RAG client
-        
+        Initialize RAG client (no connection is opened yet)
+
         Args:
             base_url: Base URL of the RAG microservice
+            timeout: Read/write/pool timeout per request, seconds
+            connect_timeout: Connect timeout, seconds
+            max_connections: Connection pool size
+            max_keepalive_connections: Idle connections kept open
+            http2: Use HTTP/2 (needs the h2 package; plain http:// uses prior knowledge)
+            retries: Retries after the first attempt
+            backoff: Base backoff delay, seconds
+            backoff_max: Maximum backoff delay; a longer Retry-After is not waited for
+            breaker_failures: Consecutive failures that open the circuit (0 = no breaker)
+            breaker_reset: Seconds before the open circuit lets a probe through
+            coalesce_window_ms: How long concurrent calls are collected (0 = no coalescing)
+            max_batch_size: Maximum searches/documents per coalesced request
+            wire_format: Body format, "msgpack" or "json"
+            compression: Request body compression, "gzip", "zstd" or "" (off)
+            compress_min_bytes: Smaller request bodies are sent uncompressed
+            transport: Custom httpx transport (tests)
         """
-        self.base_url = base_url
-        self.client = httpx.AsyncClient(timeout=30.0)
-    
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        # Indexing a large batch may take a while between status lines
+        self.bulk_timeout = httpx.Timeout(timeout, connect=connect_timeout, read=None)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        if http2 and h2 is None:
+            print("⚠️ h2 is not installed, RAG client falls back to HTTP/1.1")
+        self.http2 = http2 and h2 is not None
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset)
+        self.max_batch_size = max_batch_size
+        self.codec = WireCodec(wire_format, compression, compress_min_bytes)
+        self.transport = transport
+        self.client: Optional[httpx.AsyncClient] = None
+
+        self._search_coalescer = self._index_coalescer = None
+        if coalesce_window_ms > 0:
+            self._search_coalescer = RequestCoalescer(self._search_batch, max_batch_size, coalesce_window_ms)
+            self._index_coalescer = RequestCoalescer(self._index_batch, max_batch_size, coalesce_window_ms)
+
+    async def start(self):
+        """Open the connection pool"""
+        self._http()
+
+    async def close(self):
+        """Send pending coalesced calls and close the HTTP client"""
+        for coalescer in (self._search_coalescer, self._index_coalescer):
+            if coalescer is not None:
+                await coalescer.drain()
+        if self.client is not None:
+            client, self.client = self.client, None
+            await client.aclose()
+
+    async def __aenter__(self) -> "RAGClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _http(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                # Cleartext HTTP/2 needs prior knowledge (Granian accepts it on the same port)
+                http1=not (self.http2 and self.base_url.startswith("http://")),
+                headers={"Accept": self.codec.accept},
+                transport=self.transport
+            )
+        return self.client
+
     async def index_document(
         self,
         text: str,
         document_id: str,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        mode: str = "insert"
     ) -> Dict:
         """
         Index a document in the RAG system
-        
+
         Args:
             text: Document text to index
             document_id: Unique document identifier
             metadata: Optional metadata
-            
+            mode: "insert" or "upsert" (only changed chunks are written)
+
         Returns:
             Indexing result with status and chunk count
+
+        Raises:
+            RAGError: If the document could not be indexed
         """
-        try:
-            response = await self.client.post(
-                f"{self.base_url}/api/rag/documents",
-                json={
-                    "text": text,
-                    "document_id": document_id,
-                    "metadata": metadata
-                }
+        document = {"text": text, "document_id": document_id, "metadata": metadata, "mode": mode}
+        if self._index_coalescer is not None:
+            return await self._index_coalescer.submit(document)
+        return (await self._index_batch([document]))[0]
+
+    async def _index_batch(self, documents: List[Dict]) -> List[Union[Dict, RAGError]]:
+        """Index documents with one request: /documents for one, /documents/bulk for several"""
+        idempotent = all(document["mode"] == "upsert" for document in documents)
+        if len(documents) == 1:
+            content, headers = self.codec.encode(documents[0])
+            response = await self._request(
+                "POST", "/documents", idempotent=idempotent, content=content, headers=headers
             )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            return {
-                "status": "error",
-                "message": f"Failed to index document: {str(e)}"
-            }
-    
+            return [self.codec.decode(response)]
+
+        content, headers = self.codec.compress(
+            b"".join(self._ndjson_line(document, "insert") for document in documents),
+            {"Content-Type": "application/x-ndjson"}
+        )
+        response = await self._request(
+            "POST",
+            "/documents/bulk",
+            idempotent=idempotent,
+            params={"flush": "false"},  # small frequent batches are left to the flush policy
+            content=content,
+            headers=headers,
+            timeout=self.bulk_timeout
+        )
+        # One status line per document in request order, then the summary (no document_id)
+        lines = (json.loads(line) for line in response.text.splitlines() if line.strip())
+        statuses = [result for result in lines if "document_id" in result]
+        if len(statuses) != len(documents):
+            raise RAGUnavailableError(
+                f"RAG bulk indexing returned {len(statuses)} statuses for {len(documents)} documents",
+                status_code=500
+            )
+        return [
+            result if result["status"] == "success"
+            else RAGUnavailableError(result.get("message", "Indexing failed"), status_code=500)
+            for result in statuses
+        ]
+
+    async def index_many(
+        self,
+        documents: Union[Iterable[Dict], AsyncIterable[Dict]],
+        mode: str = "insert",
+        flush: bool = True
+    ) -> AsyncIterator[Dict]:
+        """
+        Bulk-index documents through the streaming NDJSON endpoint
+
+        Documents are streamed to the RAG service, which embeds and inserts
+        them in large cross-document batches. Per-document statuses are
+        yielded as the service reports them, followed by a summary
+        ({"status": "done", ...}). The body is a one-shot stream (compressed
+        on the fly when compression is on), so the request is not retried.
+
+        Args:
+            documents: Dicts with 'text', 'document_id' and optional 'metadata'
+            mode: "insert" or "upsert" (applied to documents without their own 'mode')
+            flush: Flush the collection when the stream ends
+
+        Yields:
+            Status dicts for each document, then the summary
+
+        Raises:
+            RAGError: If the request failed (per-document failures are yielded)
+        """
+        async def body():
+            if isinstance(documents, AsyncIterable):
+                async for document in documents:
+                    yield self._ndjson_line(document, mode)
+            else:
+                for document in documents:
+                    yield self._ndjson_line(document, mode)
+
+        self.breaker.before_call()
+        try:
+            async with self._http().stream(
+                "POST",
+                f"{API_PREFIX}/documents/bulk",
+                params={"flush": str(flush).lower()},
+                content=self.codec.compress_stream(body()) if self.codec.compression else body(),
+                headers=self.codec.stream_headers("application/x-ndjson"),
+                timeout=self.bulk_timeout
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                    self._record(response.status_code)
+                    raise self._status_error(response)
+                self.breaker.record_success()
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        yield json.loads(line)
+        except httpx.TimeoutException as e:
+            self.breaker.record_failure()
+            raise RAGTimeoutError(f"RAG bulk indexing timed out: {e}") from e
+        except httpx.TransportError as e:
+            self.breaker.record_failure()
+            raise RAGUnavailableError(f"RAG service unreachable: {e}") from e
+
+    @staticmethod
+    def _ndjson_line(document: Dict, mode: str) -> bytes:
+        """Serialize one document as an NDJSON line"""
+        payload = {
+            "text": document["text"],
+            "document_id": document["document_id"],
+            "metadata": document.get("metadata"),
+            "mode": document.get("mode", mode)
+        }
+        return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
     async def search(
         self,
         query: str,
         top_k: int = 5,
         search_type: str = "hybrid",
         dense_weight: float = 0.5,
-        sparse_weight: float = 0.5
+        sparse_weight: float = 0.5,
+        filters: Optional[Dict] = None,
+        room_id: Optional[str] = None,
+        **params
     ) -> List[Dict]:
         """
         Search for relevant documents
-        
+
         Args:
             query: Search query
             top_k: Number of results to return
             search_type: "hybrid", "dense", or "sparse"
             dense_weight: Weight for dense search (hybrid only)
             sparse_weight: Weight for sparse search (hybrid only)
-            
+            filters: Optional filters, e.g. {"doc_type": "pdf", "metadata": {"lang": "ru"}}
+            room_id: Search only this room's documents (its partition)
+            **params: Other SearchRequest fields (fusion, rerank, dense_params, ...)
+
         Returns:
             List of search results with scores
+
+        Raises:
+            RAGError: If the search failed
         """
-        try:
-            response = await self.client.post(
-                f"{self.base_url}/api/rag/search",
-                json={
-                    "query": query,
-                    "top_k": top_k,
-                    "search_type": search_type,
-                    "dense_weight": dense_weight,
-                    "sparse_weight": sparse_weight
-                }
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            print(f"Search error: {e}")
-            return []
-    
+        payload = self._search_payload({
+            "query": query,
+            "top_k": top_k,
+            "search_type": search_type,
+            "dense_weight": dense_weight,
+            "sparse_weight": sparse_weight,
+            "filters": filters,
+            "room_id": room_id,
+            **params
+        })
+        if self._search_coalescer is not None:
+            return await self._search_coalescer.submit(payload)
+        return (await self._search_batch([payload]))[0]
+
+    async def search_many(
+        self,
+        searches: List[Union[str, Dict]],
+        return_exceptions: bool = False,
+        **defaults
+    ) -> List[Union[List[Dict], RAGError]]:
+        """
+        Run several searches with as few requests as possible
+
+        Args:
+            searches: Query strings or dicts of search() arguments
+            return_exceptions: Return a failed search's RAGError in its slot
+                instead of raising the first one
+            **defaults: search() arguments applied to every search
+
+        Returns:
+            One result list per search, in order
+
+        Raises:
+            RAGError: If a search failed and return_exceptions is False
+        """
+        payloads = [
+            self._search_payload({**defaults, **({"query": search} if isinstance(search, str) else search)})
+            for search in searches
+        ]
+        batches = await asyncio.gather(*(
+            self._search_batch(payloads[start:start + self.max_batch_size])
+            for start in range(0, len(payloads), self.max_batch_size)
+        ))
+        results = [result for batch in batches for result in batch]
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, RAGError):
+                    raise result
+        return results
+
+    @staticmethod
+    def _search_payload(params: Dict) -> Dict:
+        """SearchRequest body (unset fields are left to the service defaults)"""
+        return {key: value for key, value in params.items() if value is not None}
+
+    async def _search_batch(self, payloads: List[Dict]) -> List[Union[List[Dict], RAGError]]:
+        """Run searches with one request: /search for one, /search/batch for several"""
+        if len(payloads) == 1:
+            content, headers = self.codec.encode(payloads[0])
+            response = await self._request("POST", "/search", content=content, headers=headers)
+            return [self.codec.decode(response)]
+
+        content, headers = self.codec.encode({"searches": payloads})
+        response = await self._request("POST", "/search/batch", content=content, headers=headers)
+        return [
+            item["results"] if item["status_code"] == 200
+            else self._error(item["status_code"], item.get("detail") or "Search failed", item.get("retry_after"))
+            for item in self.codec.decode(response)
+        ]
+
     async def get_document(self, document_id: str) -> Optional[Dict]:
         """
         Retrieve a document and its chunks
-        
+
         Args:
             document_id: Document ID to retrieve
-            
+
         Returns:
             Document data with chunks or None if not found
+
+        Raises:
+            RAGError: If the request failed for another reason
         """
         try:
-            response = await self.client.get(
-                f"{self.base_url}/api/rag/documents/{document_id}"
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
+            response = await self._request("GET", f"/documents/{document_id}")
+        except RAGRequestError as e:
+            if e.status_code == 404:
                 return None
-            print(f"Error retrieving document: {e}")
-            return None
-        except httpx.HTTPError as e:
-            print(f"Error retrieving document: {e}")
-            return None
-    
+            raise
+        return self.codec.decode(response)
+
     async def delete_document(self, document_id: str) -> Dict:
         """
         Delete a document from the RAG system
-        
+
         Args:
             document_id: Document ID to delete
-            
+
         Returns:
             Deletion result
+
+        Raises:
+            RAGError: If the document could not be deleted
         """
-        try:
-            response = await self.client.delete(
-                f"{self.base_url}/api/rag/documents/{document_id}"
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            return {
-                "status": "error",
-                "message": f"Failed to delete document: {str(e)}"
-            }
-    
+        response = await self._request("DELETE", f"/documents/{document_id}")
+        return self.codec.decode(response)
+
     async def health_check(self) -> Dict:
         """
-        Check RAG service health
-        
+        Check RAG service health (never raises, not retried)
+
         Returns:
-            Health status information
+            Health status information with the circuit breaker state
         """
         try:
-            response = await self.client.get(
-                f"{self.base_url}/api/rag/health"
-            )
+            response = await self._http().get(f"{API_PREFIX}/health")
             response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
+            return {**self.codec.decode(response), "circuit": self.breaker.stats()}
+        except (httpx.HTTPError, ValueError) as e:
             return {
                 "status": "unhealthy",
-                "error": str(e)
+                "error": str(e),
+                "circuit": self.breaker.stats()
             }
-    
-    async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+
+    async def _request(self, method: str, path: str, idempotent: bool = True, **kwargs) -> httpx.Response:
+        """
+        Send a request through the circuit breaker, retrying transient failures
+
+        Args:
+            method: HTTP method
+            path: Path under /api/rag
+            idempotent: Whether the request may be repeated after it possibly
+                reached the service (timeouts, dropped connections, 502/504)
+            **kwargs: httpx request arguments
+
+        Raises:
+            RAGError: Typed failure of the last attempt
+        """
+        for attempt in range(self.retries + 1):
+            self.breaker.before_call()
+            try:
+                response = await self._http().request(method, f"{API_PREFIX}{path}", **kwargs)
+            except httpx.TimeoutException as e:
+                self.breaker.record_failure()
+                error = RAGTimeoutError(f"RAG request timed out: {method} {path}")
+                # Connect/pool timeouts happen before anything is sent
+                retryable = idempotent or isinstance(e, (httpx.ConnectTimeout, httpx.PoolTimeout))
+            except httpx.TransportError as e:
+                self.breaker.record_failure()
+                error = RAGUnavailableError(f"RAG service unreachable: {method} {path}: {e}")
+                retryable = idempotent or isinstance(e, httpx.ConnectError)
+            else:
+                self._record(response.status_code)
+                if not response.is_error:
+                    return response
+                error = self._status_error(response)
+                # 429/503 are rejected before any work is done
+                retryable = response.status_code in (429, 503) or (
+                    idempotent and response.status_code in (502, 504)
+                )
+
+            delay = self._backoff(attempt, getattr(error, "retry_after", None))
+            if not retryable or attempt == self.retries or delay is None:
+                raise error
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Full-jitter exponential backoff; None when Retry-After asks for more than backoff_max"""
+        if retry_after is not None and retry_after > self.backoff_max:
+            return None
+        delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    def _record(self, status_code: int):
+        """Report a response to the circuit breaker (only 5xx count as failures)"""
+        if status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _status_error(self, response: httpx.Response) -> RAGError:
+        """Typed error for an error response"""
+        detail = error_detail(response) or response.text
+        retry_after = response.headers.get("Retry-After")
+        return self._error(
+            response.status_code,
+            f"RAG service returned {response.status_code}: {detail}",
+            float(retry_after) if retry_after and retry_after.isdigit() else None
+        )
+
+    @staticmethod
+    def _error(status_code: int, message: str, retry_after: Optional[float] = None) -> RAGError:
+        if status_code in (429, 503):
+            return RAGOverloadedError(message, status_code, retry_after)
+        if status_code >= 500:
+            return RAGUnavailableError(message, status_code)
+        return RAGRequestError(message, status_code)
+
+
+# Shared client: opened and closed by the backend lifespan (main.py)
+rag_client = RAGClient()
+
+
+def get_rag_client() -> RAGClient:
+    """FastAPI dependency returning the shared RAG client"""
+    return rag_client
 
 
 # Example usage in FastAPI endpoint:
 """
-from rag_client import RAGClient
+from fastapi import Depends
+from rag_client import RAGClient, RAGError, get_rag_client
 
 @app.post("/documents/analyze")
-async def analyze_document(text: str, doc_id: str):
-    rag_client = RAGClient()
-    
-    # Index the document
-    result = await rag_client.index_document(text, doc_id)
-    
-    # Search for similar content
-    results = await rag_client.search("your query", top_k=3)
-    
-    await rag_client.close()
+async def analyze_document(text: str, doc_id: str, rag: RAGClient = Depends(get_rag_client)):
+    try:
+        # Index the document
+        result = await rag.index_document(text, doc_id)
+
+        # Search for similar content (concurrent calls share one request)
+        results = await rag.search("your query", top_k=3)
+    except RAGError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
     return {"indexing": result, "search": results}
 """
@@ -0,0 +1,81 @@
+"""
+Request Coalescer
+Merges concurrent single-item calls into one batch request
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+
+class RequestCoalescer:
+    """
+    Collects items submitted by concurrent callers and sends them as one batch
+
+    A batch is sent when max_batch_size items are waiting or max_wait_ms has
+    passed since the first one arrived. send_batch gets the items in arrival
+    order and returns one result per item; a result that is an Exception is
+    raised to that item's caller only, an exception raised by send_batch
+    goes to every caller of the batch.
+    """
+
+    def __init__(
+        self,
+        send_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0
+    ):
+        self.send_batch = send_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        """Send everything that is waiting as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            results = await self.send_batch([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(results) != len(batch):
+            results = [RuntimeError(f"Batch returned {len(results)} results for {len(batch)} items")] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():  # caller was cancelled
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def drain(self):
+        """Send what is waiting and wait for all batches in flight"""
+        self._flush()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
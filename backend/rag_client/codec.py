@@ -0,0 +1,124 @@
+"""
+RAG Wire Codecs
+Request body encoding (JSON or msgpack, gzip / zstd for large bodies) and
+response decoding for the RAG client
+"""
+
+import gzip
+import json
+import zlib
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+
+try:
+    import msgpack
+except ImportError:  # falls back to JSON
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard  # installed with httpx[zstd]
+except ImportError:
+    zstandard = None
+
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+
+class WireCodec:
+    """
+    Body format negotiated with the RAG service
+
+    Request bodies are sent as msgpack (when wire_format="msgpack" and
+    msgpack is installed) or JSON, and compressed with gzip or zstd once
+    they reach min_compress_bytes. Responses are requested in the same
+    format; httpx already undoes gzip/zstd Content-Encoding.
+    """
+
+    def __init__(self, wire_format: str = "msgpack", compression: str = "gzip", min_compress_bytes: int = 1024):
+        """
+        Args:
+            wire_format: "msgpack" or "json"
+            compression: "gzip", "zstd" or "" (no request compression)
+            min_compress_bytes: Smaller request bodies are sent uncompressed
+        """
+        if wire_format == "msgpack" and msgpack is None:
+            print("⚠️ msgpack is not installed, RAG client sends JSON")
+            wire_format = "json"
+        if compression == "zstd" and zstandard is None:
+            print("⚠️ zstandard is not installed, RAG client compresses with gzip")
+            compression = "gzip"
+        self.media_type = MSGPACK if wire_format == "msgpack" else JSON
+        self.compression = compression
+        self.min_compress_bytes = min_compress_bytes
+
+    @property
+    def accept(self) -> str:
+        """Accept header for responses"""
+        return f"{MSGPACK}, {JSON};q=0.9" if self.media_type == MSGPACK else JSON
+
+    def dumps(self, data: Any) -> bytes:
+        """Serialize data as msgpack or compact JSON (orjson when installed)"""
+        if self.media_type == MSGPACK:
+            return msgpack.packb(data, use_bin_type=True)
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def encode(self, data: Any) -> Tuple[bytes, Dict[str, str]]:
+        """Serialized (and possibly compressed) body with its Content-Type / Content-Encoding headers"""
+        return self.compress(self.dumps(data), {"Content-Type": self.media_type})
+
+    def compress(self, body: bytes, headers: Dict[str, str]) -> Tuple[bytes, Dict[str, str]]:
+        """Compress an already serialized body if it is large enough"""
+        if not self.compression or len(body) < self.min_compress_bytes:
+            return body, headers
+        if self.compression == "zstd":
+            body = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+        else:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        return body, {**headers, "Content-Encoding": self.compression}
+
+    async def compress_stream(self, pieces: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+        """Compress a streamed body piece by piece (Content-Encoding: self.compression)"""
+        if self.compression == "zstd":
+            engine = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        else:
+            engine = zlib.compressobj(GZIP_LEVEL, wbits=zlib.MAX_WBITS | 16)
+        async for piece in pieces:
+            data = engine.compress(piece)
+            if data:
+                yield data
+        yield engine.flush()
+
+    def stream_headers(self, content_type: str) -> Dict[str, str]:
+        """Headers for a streamed body compressed with compress_stream()"""
+        headers = {"Content-Type": content_type}
+        if self.compression:
+            headers["Content-Encoding"] = self.compression
+        return headers
+
+    @staticmethod
+    def decode(response: httpx.Response) -> Any:
+        """Parse a response body by its Content-Type"""
+        if response.headers.get("content-type", "").startswith(MSGPACK):
+            return msgpack.unpackb(response.content, raw=False)
+        return orjson.loads(response.content) if orjson is not None else response.json()
+
+
+def error_detail(response: httpx.Response) -> Optional[str]:
+    """'detail' of an error response (JSON or msgpack), None if it has none"""
+    try:
+        body = WireCodec.decode(response)
+    except Exception:
+        return None
+    return body.get("detail") if isinstance(body, dict) else None
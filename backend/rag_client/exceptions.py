@@ -0,0 +1,38 @@
+"""
+RAG Client Errors
+Typed failures of calls to the RAG microservice
+"""
+
+from typing import Optional
+
+
+class RAGError(Exception):
+    """Base class for RAG client errors"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RAGRequestError(RAGError):
+    """The service rejected the request as invalid (4xx); retrying will not help"""
+
+
+class RAGUnavailableError(RAGError):
+    """The service could not be reached or failed (connection error, 5xx)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message, status_code)
+        self.retry_after = retry_after
+
+
+class RAGOverloadedError(RAGUnavailableError):
+    """The service is busy or still loading (429 / 503 with Retry-After)"""
+
+
+class RAGTimeoutError(RAGUnavailableError):
+    """The request timed out"""
+
+
+class RAGCircuitOpenError(RAGUnavailableError):
+    """Calls are short-circuited after repeated failures; retry_after says when the next probe is allowed"""
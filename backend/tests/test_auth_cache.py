@@ -0,0 +1,168 @@
+"""
+Тесты кэша аутентификации (get_current_user)
+Redis подменяется словарем в памяти
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import auth.dep
+from auth.dep import get_current_user
+from auth.models import User
+from auth.security_service import SessionService, TokenService, create_access_token, create_refresh_token, create_refresh_session
+from auth.security_service.blacklist import blacklist_key
+from auth.security_service.principal_cache import invalidate_principal, principal_key, principal_version_key
+from core.cache import cache
+from core.config import settings
+
+
+class FakeRedis:
+    """Минимальный асинхронный Redis на словаре (без TTL)"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def setex(self, key, ex, value):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    async def expire(self, key, ex):
+        return key in self.data
+
+
+@pytest.fixture
+def redis(monkeypatch) -> FakeRedis:
+    fake = FakeRedis()
+    monkeypatch.setattr(cache, "redis", fake)
+    return fake
+
+
+def credentials_for(user: User) -> HTTPAuthorizationCredentials:
+    token = create_access_token(TokenService(user_id=user.id, username=user.username))
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.mark.asyncio
+async def test_cached_user_skips_database(redis: FakeRedis, test_user: User, test_db: AsyncSession, monkeypatch):
+    """Повторный запрос с тем же токеном не обращается к базе"""
+    credentials = credentials_for(test_user)
+    first = await get_current_user(credentials, test_db)
+
+    assert redis.data[blacklist_key(credentials.credentials)] == "false"
+    assert principal_key(test_user.id) in redis.data
+
+    async def no_database(*args, **kwargs):
+        raise AssertionError("database must not be queried")
+
+    monkeypatch.setattr(test_db, "execute", no_database)
+    second = await get_current_user(credentials, test_db)
+
+    assert second == first
+    assert second.username == "testuser"
+
+
+@pytest.mark.asyncio
+async def test_deactivation_invalidates_cached_user(redis: FakeRedis, test_user: User, test_db: AsyncSession):
+    """Деактивация пользователя сбрасывает кэш после коммита"""
+    credentials = credentials_for(test_user)
+    await get_current_user(credentials, test_db)
+
+    test_user.is_active = False
+    await test_db.commit()
+    await asyncio.sleep(0)  # сброс кэша выполняется задачей после коммита
+
+    assert principal_key(test_user.id) not in redis.data
+    with pytest.raises(HTTPException) as error:
+        await get_current_user(credentials, test_db)
+    assert error.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_deactivation_during_cache_miss_is_not_cached(
+    redis: FakeRedis,
+    test_user: User,
+    test_db: AsyncSession,
+    monkeypatch
+):
+    """Запрос, прочитавший пользователя до деактивации, не кладет в кэш устаревшие данные"""
+    credentials = credentials_for(test_user)
+    original_cache_principal = auth.dep.cache_principal
+
+    async def deactivate_before_caching(user, version):
+        # Снимок из базы до коммита; деактивация и сброс кэша успевают до записи в Redis
+        stale = SimpleNamespace(id=user.id, username=user.username, is_active=True, is_lead=user.is_lead)
+        test_user.is_active = False
+        await test_db.commit()
+        await asyncio.sleep(0)
+        return await original_cache_principal(stale, version)
+
+    monkeypatch.setattr(auth.dep, "cache_principal", deactivate_before_caching)
+    first = await get_current_user(credentials, test_db)
+    assert first.is_active  # запрос, начатый до деактивации
+    assert principal_key(test_user.id) in redis.data
+
+    monkeypatch.setattr(auth.dep, "cache_principal", original_cache_principal)
+    with pytest.raises(HTTPException) as error:
+        await get_current_user(credentials, test_db)
+    assert error.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_invalidation_without_cache_writes_no_version(redis: FakeRedis, monkeypatch):
+    """При выключенном кэше (TTL 0) сброс не оставляет в Redis ключей версии без TTL"""
+    monkeypatch.setattr(settings, "AUTH_PRINCIPAL_CACHE_TTL_SECONDS", 0)
+
+    await invalidate_principal(1)
+
+    assert principal_version_key(1) not in redis.data
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_access_token(
+    redis: FakeRedis,
+    client_unauthorized: AsyncClient,
+    test_user: User,
+    test_db: AsyncSession
+):
+    """После logout токен отклоняется, несмотря на негативный кэш blacklist"""
+    access_token = create_access_token(TokenService(user_id=test_user.id, username=test_user.username))
+    refresh_token = create_refresh_token(TokenService(user_id=test_user.id, username=test_user.username))
+    await create_refresh_session(
+        SessionService(user_id=test_user.id, access_token=access_token, refresh_token=refresh_token),
+        test_db
+    )
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    response = await client_unauthorized.get("/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert redis.data[blacklist_key(access_token)] == "false"
+
+    response = await client_unauthorized.post("/auth/logout", headers=headers)
+    assert response.status_code == 200
+    assert redis.data[blacklist_key(access_token)] == "true"
+
+    response = await client_unauthorized.get("/auth/me", headers=headers)
+    assert response.status_code == 401
@@ -0,0 +1,228 @@
+"""
+Тесты для RAGClient
+RAG сервис подменяется httpx.MockTransport, сеть не используется
+"""
+import asyncio
+import gzip
+import json
+
+import httpx
+import msgpack
+import pytest
+
+from rag_client import (
+    RAGCircuitOpenError,
+    RAGClient,
+    RAGOverloadedError,
+    RAGRequestError,
+    RAGTimeoutError
+)
+
+
+def make_client(handler, **kwargs) -> RAGClient:
+    """Клиент без задержек между повторами"""
+    options = {
+        "base_url": "http://rag.test",
+        "http2": False,
+        "retries": 2,
+        "backoff": 0.0,
+        "coalesce_window_ms": 0,
+        "wire_format": "json",
+        "compression": "",
+        "transport": httpx.MockTransport(handler),
+        **kwargs
+    }
+    return RAGClient(**options)
+
+
+def search_result(text: str) -> dict:
+    return {"text": text, "document_id": "doc", "score": 1.0}
+
+
+# ============================================
+# Объединение конкурентных вызовов
+# ============================================
+
+@pytest.mark.asyncio
+async def test_concurrent_searches_are_coalesced():
+    """Параллельные search() уходят одним запросом /search/batch"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        searches = json.loads(request.content)["searches"]
+        return httpx.Response(200, json=[
+            {"status_code": 200, "results": [search_result(search["query"])]}
+            for search in searches
+        ])
+
+    rag = make_client(handler, coalesce_window_ms=20)
+    results = await asyncio.gather(*(rag.search(f"query {i}") for i in range(3)))
+    await rag.close()
+
+    assert len(requests) == 1
+    assert requests[0].url.path == "/api/rag/search/batch"
+    assert [r[0]["text"] for r in results] == ["query 0", "query 1", "query 2"]
+
+
+@pytest.mark.asyncio
+async def test_batch_item_error_goes_to_its_caller():
+    """Ошибка одного поиска в батче не ломает остальные"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=[
+            {"status_code": 200, "results": [search_result("ok")]},
+            {"status_code": 429, "detail": "busy", "retry_after": 1, "results": []}
+        ])
+
+    rag = make_client(handler)
+    results = await rag.search_many(["ok", "busy"], return_exceptions=True)
+    await rag.close()
+
+    assert results[0][0]["text"] == "ok"
+    assert isinstance(results[1], RAGOverloadedError)
+    assert results[1].retry_after == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_index_calls_use_bulk_without_flush():
+    """Параллельные index_document() уходят одним NDJSON-запросом без flush"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        documents = [json.loads(line) for line in request.content.decode().splitlines()]
+        lines = [
+            {"status": "success", "document_id": d["document_id"], "chunk_count": 1}
+            for d in documents
+        ] + [{"status": "done", "documents": len(documents)}]
+        return httpx.Response(200, text="\n".join(json.dumps(line) for line in lines))
+
+    rag = make_client(handler, coalesce_window_ms=20)
+    results = await asyncio.gather(
+        rag.index_document("text a", "a"),
+        rag.index_document("text b", "b")
+    )
+    await rag.close()
+
+    assert len(requests) == 1
+    assert requests[0].url.path == "/api/rag/documents/bulk"
+    assert requests[0].url.params["flush"] == "false"
+    assert [r["document_id"] for r in results] == ["a", "b"]
+
+
+# ============================================
+# Формат тела запросов
+# ============================================
+
+@pytest.mark.asyncio
+async def test_msgpack_gzip_round_trip():
+    """Большое тело уходит в msgpack + gzip, ответ msgpack разбирается"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        body = msgpack.unpackb(gzip.decompress(request.content))
+        return httpx.Response(
+            200,
+            content=msgpack.packb([search_result(body["query"][:5])]),
+            headers={"Content-Type": "application/msgpack"}
+        )
+
+    rag = make_client(handler, wire_format="msgpack", compression="gzip", compress_min_bytes=64)
+    results = await rag.search("query " * 50)
+    await rag.close()
+
+    assert requests[0].headers["Content-Type"] == "application/msgpack"
+    assert requests[0].headers["Content-Encoding"] == "gzip"
+    assert requests[0].headers["Accept"].startswith("application/msgpack")
+    assert results[0]["text"] == "query"
+
+
+# ============================================
+# Повторы и circuit breaker
+# ============================================
+
+@pytest.mark.asyncio
+async def test_search_retries_on_overload():
+    """429 повторяется, пока сервис не ответит"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(429, json={"detail": "busy"}, headers={"Retry-After": "0"})
+        return httpx.Response(200, json=[search_result("found")])
+
+    rag = make_client(handler)
+    results = await rag.search("query")
+    await rag.close()
+
+    assert len(calls) == 3
+    assert results[0]["text"] == "found"
+
+
+@pytest.mark.asyncio
+async def test_insert_is_not_retried_after_timeout():
+    """Вставка не повторяется, если запрос мог дойти до сервиса"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    rag = make_client(handler)
+    with pytest.raises(RAGTimeoutError):
+        await rag.index_document("text", "doc")
+    await rag.close()
+
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_failures():
+    """После серии ошибок вызовы отклоняются без запроса"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        raise httpx.ConnectError("refused", request=request)
+
+    rag = make_client(handler, retries=0, breaker_failures=2, breaker_reset=60)
+    for _ in range(2):
+        with pytest.raises(Exception):
+            await rag.search("query")
+    with pytest.raises(RAGCircuitOpenError):
+        await rag.search("query")
+    await rag.close()
+
+    assert len(calls) == 2
+
+
+# ============================================
+# Ошибки
+# ============================================
+
+@pytest.mark.asyncio
+async def test_bad_request_raises_typed_error():
+    """4xx не повторяется и превращается в RAGRequestError"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(400, json={"detail": "Invalid search_type: foo"})
+
+    rag = make_client(handler)
+    with pytest.raises(RAGRequestError) as error:
+        await rag.search("query", search_type="foo")
+    await rag.close()
+
+    assert error.value.status_code == 400
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_document_returns_none():
+    """404 при получении документа - None"""
+    rag = make_client(lambda request: httpx.Response(404, json={"detail": "Document not found"}))
+    assert await rag.get_document("missing") is None
+    await rag.close()
@@ -226,6 +226,37 @@ async def test_get_tasks_created_by_me(
     assert data["total"] >= 1
 
 
+@pytest.mark.asyncio
+async def test_get_overdue_tasks(
+    client: AsyncClient,
+    test_user: User,
+    test_db: AsyncSession
+):
+    """Тест получения просроченных задач (список с вложенными назначениями)"""
+    task = Task(
+        title="Просроченная задача",
+        created_by_id=test_user.id,
+        status=TaskStatus.IN_PROGRESS,
+        priority=TaskPriority.HIGH,
+        due_date=datetime.utcnow() - timedelta(days=1)
+    )
+    test_db.add(task)
+    await test_db.commit()
+    await test_db.refresh(task)
+
+    test_db.add(TaskAssignment(task_id=task.id, user_id=test_user.id, assigned_by_id=test_user.id))
+    await test_db.commit()
+
+    response = await client.get("/tasks/overdue")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    data = response.json()
+    assert [t["title"] for t in data] == ["Просроченная задача"]
+    assert data[0]["status"] == "in_progress"
+    assert data[0]["assignments"][0]["user"]["id"] == test_user.id
+
+
 @pytest.mark.asyncio
 async def test_get_task_by_id(
     client: AsyncClient, 
@@ -0,0 +1,167 @@
+"""
+Embedding Micro-Batching Service
+Coalesces concurrent encode requests into a single model forward pass
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from embedding_service import EmbeddingService, get_embedding_service
+from executor_service import BoundedExecutor, BackpressureError
+from metrics import registry
+from sparse_vector import SparseVector
+
+
+# Histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+
+@dataclass
+class _PendingEncode:
+    """A single queued encode request"""
+    text: str
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class EmbeddingBatcher:
+    """
+    Asynchronous micro-batcher in front of EmbeddingService
+
+    Requests are queued and flushed as one model.encode call either when
+    max_batch_size requests are waiting or max_wait_ms has passed since the
+    first request of the batch arrived. Results are fanned back to callers.
+    """
+
+    def __init__(
+        self,
+        embedding_service: Optional[EmbeddingService] = None,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        executor: Optional[BoundedExecutor] = None,
+        max_queue: int = 1024
+    ):
+        """
+        Initialize the batcher
+
+        Args:
+            embedding_service: Service used to encode batches (default: singleton)
+            max_batch_size: Maximum number of texts per model call
+            max_wait_ms: Maximum time to wait for a batch to fill up
+            executor: Pool the model call runs in (default: loop's default executor)
+            max_queue: Maximum number of waiting requests before rejecting with 429
+        """
+        self.embedding_service = embedding_service or get_embedding_service()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+        self.max_queue = max_queue
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self._batch_size_hist = registry.histogram("embedding_batch_size", BATCH_SIZE_BUCKETS)
+        self._wait_hist = registry.histogram("embedding_batch_wait_ms", WAIT_MS_BUCKETS)
+        self._encode_hist = registry.histogram("embedding_batch_encode_ms", WAIT_MS_BUCKETS)
+
+    def start(self):
+        """Start the background worker (must be called inside a running loop)"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker and fail any requests still in the queue"""
+        if self._worker is None:
+            return
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if not item.future.done():
+                item.future.set_exception(RuntimeError("Embedding batcher stopped"))
+
+    async def encode(self, text: str) -> Tuple[np.ndarray, SparseVector]:
+        """
+        Encode a single text through the batch queue
+
+        Args:
+            text: Input text to encode
+
+        Returns:
+            Tuple of (dense_vector, sparse_vector)
+
+        Raises:
+            BackpressureError: If too many requests are already waiting
+        """
+        self.start()
+        if self._queue.qsize() >= self.max_queue:
+            raise BackpressureError("Embedding batch queue is full", status_code=429)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingEncode(text=text, future=future))
+        return await future
+
+    async def _run(self):
+        """Worker loop: collect a batch, encode it, repeat"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[_PendingEncode]):
+        """Encode a batch and resolve the waiting futures"""
+        now = time.perf_counter()
+        self._batch_size_hist.observe(len(batch))
+        for item in batch:
+            self._wait_hist.observe((now - item.enqueued_at) * 1000)
+
+        # Identical queries in the same window share one slot in the batch
+        unique_texts = list(dict.fromkeys(item.text for item in batch))
+
+        try:
+            if self.executor is not None:
+                dense_vecs, sparse_vecs = await self.executor.run(
+                    self.embedding_service.encode_batch_hybrid,
+                    unique_texts
+                )
+            else:
+                dense_vecs, sparse_vecs = await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    self.embedding_service.encode_batch_hybrid,
+                    unique_texts
+                )
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+        finally:
+            self._encode_hist.observe((time.perf_counter() - now) * 1000)
+
+        positions = {text: i for i, text in enumerate(unique_texts)}
+        for item in batch:
+            if not item.future.done():
+                i = positions[item.text]
+                item.future.set_result((dense_vecs[i], sparse_vecs[i]))
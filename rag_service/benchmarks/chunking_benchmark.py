@@ -0,0 +1,80 @@
+"""
+Chunking Modes Benchmark
+Compares character, token and sentence chunking on real documents
+
+For every mode it reports the number of chunks (= embeddings to compute),
+chunks per KB of text, how well chunks fill the token window and the
+chunking time.
+
+Usage (from rag_service/):
+    python benchmarks/chunking_benchmark.py docs/*.txt --chunk-size 500 --char-chunk-size 500
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chunking_service import CHUNKING_MODES, ChunkingService, token_length  # noqa: E402
+
+
+def measure(service: ChunkingService, texts: List[str], tokenizer_name: str, window: int) -> Dict:
+    """Chunk all texts and collect size statistics (token counts are exact)"""
+    started = time.perf_counter()
+    chunks = [chunk for text in texts for chunk in service.chunk_text(text)]
+    elapsed = time.perf_counter() - started
+
+    tokens = [token_length(chunk, tokenizer_name) for chunk in chunks] or [0]
+    total_kb = sum(len(text.encode("utf-8")) for text in texts) / 1024
+    return {
+        "chunks": len(chunks),
+        "chunks_per_kb": len(chunks) / total_kb if total_kb else 0.0,
+        "tokens_mean": statistics.mean(tokens),
+        "tokens_max": max(tokens),
+        "fill_ratio": statistics.mean(tokens) / window,
+        "over_window": sum(1 for count in tokens if count > window),
+        "seconds": elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare chunking modes")
+    parser.add_argument("files", nargs="+", type=Path, help="UTF-8 text files")
+    parser.add_argument("--tokenizer", default="BAAI/bge-m3", help="Tokenizer name or local path")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Tokens (token and sentence modes)")
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--char-chunk-size", type=int, default=500, help="Characters (character mode)")
+    parser.add_argument("--char-chunk-overlap", type=int, default=50)
+    parser.add_argument("--max-length", type=int, default=512, help="Model token window")
+    args = parser.parse_args()
+
+    texts = [path.read_text(encoding="utf-8") for path in args.files]
+    window = args.max_length - 2  # CLS and EOS
+
+    print(f"{len(texts)} documents, window {window} tokens\n")
+    print(f"{'mode':<10} {'chunks':>7} {'per KB':>7} {'tok mean':>9} {'tok max':>8} {'fill':>6} {'>window':>8} {'time':>8}")
+    for mode in CHUNKING_MODES:
+        if mode == "character":
+            size, overlap = args.char_chunk_size, args.char_chunk_overlap
+        else:
+            size, overlap = args.chunk_size, args.chunk_overlap
+        service = ChunkingService(
+            chunk_size=size,
+            chunk_overlap=overlap,
+            mode=mode,
+            tokenizer_name=args.tokenizer
+        )
+        stats = measure(service, texts, args.tokenizer, window)
+        print(
+            f"{mode:<10} {stats['chunks']:>7} {stats['chunks_per_kb']:>7.2f} "
+            f"{stats['tokens_mean']:>9.1f} {stats['tokens_max']:>8} {stats['fill_ratio']:>6.2f} "
+            f"{stats['over_window']:>8} {stats['seconds']:>7.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Shared Benchmark Helpers
+Default query set, query file loading and latency percentiles
+"""
+
+from pathlib import Path
+from typing import List, Optional
+
+
+DEFAULT_QUERIES = [
+    "Python backend developer with FastAPI experience",
+    "опыт работы с базами данных PostgreSQL",
+    "frontend React TypeScript",
+    "machine learning engineer",
+    "управление командой и планирование задач",
+]
+
+
+def load_queries(path: Optional[Path]) -> List[str]:
+    """Queries from a file with one query per line (DEFAULT_QUERIES without a file)"""
+    if path is None:
+        return DEFAULT_QUERIES
+    return [line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index]
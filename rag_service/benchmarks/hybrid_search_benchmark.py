@@ -0,0 +1,91 @@
+"""
+Hybrid Search Benchmark
+Compares latency and recall of native Milvus hybrid_search against Python-side RRF
+
+Usage (from rag_service/, with Milvus running and documents indexed):
+    python benchmarks/hybrid_search_benchmark.py --queries queries.txt --top-k 5 --runs 20
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from orchestrator import RAGOrchestrator  # noqa: E402
+from benchmarks.common import load_queries, percentile  # noqa: E402
+
+
+def time_calls(fn: Callable[[], List[Dict]], runs: int) -> List[float]:
+    """Run fn several times and return latencies in ms (first call is warmup)"""
+    fn()
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def recall(results: List[Dict], reference: List[Dict]) -> float:
+    """Fraction of reference ids present in results"""
+    if not reference:
+        return 1.0
+    found = {r["id"] for r in results}
+    return sum(1 for r in reference if r["id"] in found) / len(reference)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=Path, help="File with one query per line")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--fusion", choices=["rrf", "weighted"], default="rrf")
+    parser.add_argument(
+        "--reference-multiplier", type=int, default=40,
+        help="Candidate multiplier for the exhaustive Python-fusion reference"
+    )
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+
+    orchestrator = RAGOrchestrator()
+    milvus = orchestrator.vector_store
+    embedder = orchestrator.embedding_service
+
+    latencies = {"python": [], "native": []}
+    recalls = {"python": [], "native": []}
+
+    for query in queries:
+        dense, sparse = embedder.encode_hybrid(query)
+
+        def run(engine: str, multiplier: int = 3) -> List[Dict]:
+            return milvus.hybrid_search(
+                dense, sparse, top_k=args.top_k, engine=engine,
+                fusion=args.fusion, candidate_multiplier=multiplier
+            )
+
+        # Reference: Python fusion over a much deeper candidate list
+        reference = run("python", args.reference_multiplier)
+
+        for engine in ("python", "native"):
+            latencies[engine].extend(time_calls(lambda: run(engine), args.runs))
+            recalls[engine].append(recall(run(engine), reference))
+
+    print(f"queries={len(queries)} runs={args.runs} top_k={args.top_k} fusion={args.fusion}")
+    print(f"{'engine':<8} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'recall@k':>9}")
+    for engine in ("python", "native"):
+        values = latencies[engine]
+        print(
+            f"{engine:<8} {percentile(values, 50):>8.2f} {percentile(values, 95):>8.2f} "
+            f"{statistics.mean(values):>8.2f} {statistics.mean(recalls[engine]):>9.3f}"
+        )
+
+    orchestrator.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+ONNX Engine Parity Check and Throughput Benchmark
+Compares the onnxruntime engine (int8 or fp32) with the PyTorch BGE-M3 path
+
+Parity: cosine similarity of dense vectors, overlap of lexical token sets and
+agreement of lexical matching scores between queries and passages. The script
+exits with status 1 if parity is below the thresholds, so it can gate CI.
+
+Usage (from rag_service/, after scripts/export_onnx.py):
+    python benchmarks/onnx_parity_benchmark.py --model-dir ./models/bge-m3-onnx --runs 3
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from FlagEmbedding import BGEM3FlagModel  # noqa: E402
+
+from onnx_engine import OnnxBGEM3Model  # noqa: E402
+
+
+QUERIES = [
+    "Python backend developer with FastAPI experience",
+    "опыт работы с базами данных PostgreSQL",
+    "frontend React TypeScript",
+    "управление командой и планирование задач",
+]
+
+PASSAGES = [
+    "Senior Python developer, 5 years of FastAPI, SQLAlchemy and async PostgreSQL in production.",
+    "Разработчик баз данных: проектирование схем PostgreSQL, оптимизация запросов, репликация.",
+    "Frontend engineer building React and TypeScript applications with Vite and Tailwind.",
+    "Руководитель команды из восьми человек, планирование спринтов и распределение задач.",
+    "Machine learning engineer: PyTorch, model serving, ONNX Runtime, quantization.",
+    "DevOps: Kubernetes, Terraform, CI/CD pipelines, observability with Prometheus and Grafana.",
+] * 8
+
+
+def lexical_score(query: Dict, passage: Dict) -> float:
+    """BGE-M3 lexical matching score"""
+    return sum(weight * passage[token] for token, weight in query.items() if token in passage)
+
+
+def parity(reference: Dict, candidate: Dict, query_ref: Dict, query_cand: Dict) -> Dict:
+    """Compare encode() outputs of two engines on the same texts"""
+    cosines = np.sum(reference["dense_vecs"] * candidate["dense_vecs"], axis=1)
+
+    overlaps, max_abs = [], 0.0
+    for ref, cand in zip(reference["lexical_weights"], candidate["lexical_weights"]):
+        ref_tokens, cand_tokens = set(ref), set(cand)
+        union = ref_tokens | cand_tokens
+        overlaps.append(len(ref_tokens & cand_tokens) / len(union) if union else 1.0)
+        for token in ref_tokens & cand_tokens:
+            max_abs = max(max_abs, abs(float(ref[token]) - float(cand[token])))
+
+    ref_scores = [
+        lexical_score(q, p)
+        for q in query_ref["lexical_weights"] for p in reference["lexical_weights"]
+    ]
+    cand_scores = [
+        lexical_score(q, p)
+        for q in query_cand["lexical_weights"] for p in candidate["lexical_weights"]
+    ]
+
+    return {
+        "dense_cosine_min": float(cosines.min()),
+        "dense_cosine_mean": float(cosines.mean()),
+        "lexical_jaccard_mean": float(np.mean(overlaps)),
+        "lexical_weight_max_abs_diff": max_abs,
+        "lexical_score_correlation": float(np.corrcoef(ref_scores, cand_scores)[0, 1])
+    }
+
+
+def throughput(model, texts: List[str], batch_size: int, runs: int) -> float:
+    """Texts per second for dense + sparse encoding (first run is warmup)"""
+    model.encode(texts[:batch_size], batch_size=batch_size, return_dense=True, return_sparse=True)
+    started = time.perf_counter()
+    for _ in range(runs):
+        model.encode(texts, batch_size=batch_size, return_dense=True, return_sparse=True)
+    return runs * len(texts) / (time.perf_counter() - started)
+
+
+def encode(model, texts: List[str], batch_size: int) -> Dict:
+    result = model.encode(texts, batch_size=batch_size, return_dense=True, return_sparse=True)
+    return {
+        "dense_vecs": np.asarray(result["dense_vecs"], dtype=np.float32),
+        "lexical_weights": result["lexical_weights"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX vs PyTorch BGE-M3 parity and throughput")
+    parser.add_argument("--model", default="BAAI/bge-m3")
+    parser.add_argument("--model-dir", default="./models/bge-m3-onnx")
+    parser.add_argument("--fp32", action="store_true", help="Benchmark the fp32 ONNX model instead of int8")
+    parser.add_argument("--threads", type=int, default=0, help="onnxruntime intra-op threads (0 = all cores)")
+    parser.add_argument("--batch-size", type=int, default=12)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--min-score-correlation", type=float, default=0.98)
+    args = parser.parse_args()
+
+    torch_model = BGEM3FlagModel(args.model, use_fp16=False, device="cpu")
+    onnx_model = OnnxBGEM3Model(args.model_dir, quantized=not args.fp32, intra_op_threads=args.threads)
+    variant = "fp32" if args.fp32 else "int8"
+
+    report = parity(
+        encode(torch_model, PASSAGES, args.batch_size),
+        encode(onnx_model, PASSAGES, args.batch_size),
+        encode(torch_model, QUERIES, args.batch_size),
+        encode(onnx_model, QUERIES, args.batch_size)
+    )
+    print(f"\nParity (torch fp32 vs onnx {variant})")
+    for name, value in report.items():
+        print(f"  {name:<30} {value:.4f}")
+
+    torch_tps = throughput(torch_model, PASSAGES, args.batch_size, args.runs)
+    onnx_tps = throughput(onnx_model, PASSAGES, args.batch_size, args.runs)
+    print(f"\nThroughput ({len(PASSAGES)} passages, batch {args.batch_size})")
+    print(f"  torch fp32      {torch_tps:8.1f} texts/s")
+    print(f"  onnx {variant:<10} {onnx_tps:8.1f} texts/s  ({onnx_tps / torch_tps:.2f}x)")
+
+    passed = (
+        report["dense_cosine_min"] >= args.min_cosine
+        and report["lexical_score_correlation"] >= args.min_score_correlation
+    )
+    print(f"\n{'✅ Parity OK' if passed else '❌ Parity below thresholds'}")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Rerank Benchmark
+Latency and ranking change of second-stage reranking per candidate count and budget
+
+Every query is searched once with the deepest candidate count; the fused
+list is then reranked with each (candidates, budget) pair. Agreement@k is
+measured against reranking all candidates without a budget, so the report
+shows what a smaller candidate set or a tighter budget gives up, and
+overlap@k with the fused top_k shows how much reranking changes the answer.
+
+Usage (from rag_service/, with documents indexed):
+    python benchmarks/rerank_benchmark.py --reranker colbert --queries queries.txt \\
+        --candidates 10,20,30,50 --budgets 0,50,100,200
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from orchestrator import RAGOrchestrator  # noqa: E402
+from reranker import create_reranker  # noqa: E402
+from benchmarks.common import load_queries, percentile  # noqa: E402
+
+
+def overlap(results: List[Dict], reference: List[Dict]) -> float:
+    """Fraction of reference ids present in results"""
+    if not reference:
+        return 1.0
+    found = {r["id"] for r in results}
+    return sum(1 for r in reference if r["id"] in found) / len(reference)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=Path, help="File with one query per line")
+    parser.add_argument("--reranker", choices=["colbert", "cross-encoder"], default="colbert")
+    parser.add_argument("--model", default="BAAI/bge-reranker-v2-m3", help="Cross-encoder model")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--candidates", default="10,20,30,50", help="Candidate counts to compare")
+    parser.add_argument("--budgets", default="0,50,100,200", help="Budgets in ms (0 = no limit)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    candidate_counts = [int(v) for v in args.candidates.split(",")]
+    budgets = [float(v) for v in args.budgets.split(",")]
+
+    orchestrator = RAGOrchestrator()
+    reranker = create_reranker(
+        args.reranker,
+        orchestrator.embedding_service,
+        model_name=args.model,
+        batch_size=args.batch_size
+    )
+
+    fused = {
+        query: orchestrator.search(query, top_k=max(candidate_counts), rerank=False)
+        for query in queries
+    }
+    # Reference: every candidate scored, no budget
+    reference = {
+        query: reranker.rerank(query, results, args.top_k, candidates=max(candidate_counts), budget_ms=0)[0]
+        for query, results in fused.items()
+    }
+
+    print(f"reranker={args.reranker} queries={len(queries)} top_k={args.top_k} runs={args.runs}")
+    print(
+        f"{'cands':>6} {'budget':>7} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'complete':>9} {'agree@k':>8} {'fused@k':>8}"
+    )
+    for candidates in candidate_counts:
+        for budget in budgets:
+            latencies, complete, agreement, unchanged = [], [], [], []
+            for query, results in fused.items():
+                for _ in range(args.runs):
+                    started = time.perf_counter()
+                    reranked, finished = reranker.rerank(
+                        query, results, args.top_k, candidates=candidates, budget_ms=budget
+                    )
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    complete.append(finished)
+                agreement.append(overlap(reranked, reference[query]))
+                unchanged.append(overlap(reranked, results[:args.top_k]))
+
+            print(
+                f"{candidates:>6} {budget:>7.0f} {percentile(latencies, 50):>8.2f} "
+                f"{percentile(latencies, 95):>8.2f} {statistics.mean(complete):>9.0%} "
+                f"{statistics.mean(agreement):>8.3f} {statistics.mean(unchanged):>8.3f}"
+            )
+
+    orchestrator.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Sparse Pruning Benchmark
+Recall / latency / index size tradeoff of sparse vector pruning
+
+Documents are chunked and encoded once. For every (top_k, min_weight) pair an
+inverted index is built from the pruned document vectors and queried
+term-at-a-time (like the local vector store). Recall@k is measured against
+the unpruned index, so the report shows exactly what pruning costs.
+
+Usage (from rag_service/):
+    python benchmarks/sparse_pruning_benchmark.py docs/*.txt --queries queries.txt \\
+        --top-k-values 0,256,128,64,32 --min-weights 0,0.01,0.05
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chunking_service import ChunkingService  # noqa: E402
+from embedding_service import EmbeddingService  # noqa: E402
+from sparse_vector import SparseVector  # noqa: E402
+from benchmarks.common import load_queries, percentile  # noqa: E402
+
+
+class InvertedIndex:
+    """Token -> (rows, weights) postings over a list of sparse vectors"""
+
+    def __init__(self, vectors: List[SparseVector]):
+        self.size = len(vectors)
+        rows = np.concatenate([np.full(v.nnz, i, dtype=np.int64) for i, v in enumerate(vectors)])
+        tokens = np.concatenate([v.indices for v in vectors])
+        weights = np.concatenate([v.values for v in vectors])
+        order = np.argsort(tokens, kind="stable")
+        tokens, rows, weights = tokens[order], rows[order], weights[order]
+        boundaries = np.flatnonzero(np.diff(tokens)) + 1
+        self.postings: Dict[int, Tuple[np.ndarray, np.ndarray]] = {
+            int(block_tokens[0]): (block_rows, block_weights)
+            for block_tokens, block_rows, block_weights in zip(
+                np.split(tokens, boundaries), np.split(rows, boundaries), np.split(weights, boundaries)
+            )
+            if len(block_tokens)
+        }
+        self.nnz = len(tokens)
+
+    def search(self, query: SparseVector, top_k: int) -> List[int]:
+        scores = np.zeros(self.size, dtype=np.float32)
+        for token, weight in zip(query.indices.tolist(), query.values.tolist()):
+            posting = self.postings.get(token)
+            if posting is not None:
+                scores[posting[0]] += weight * posting[1]
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k)[:top_k]]
+        return candidates[np.argsort(-scores[candidates])].tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", type=Path, help="UTF-8 text files to index")
+    parser.add_argument("--queries", type=Path, help="File with one query per line")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query (recall@k)")
+    parser.add_argument("--top-k-values", default="0,256,128,64,32", help="Document top_k values (0 = off)")
+    parser.add_argument("--min-weights", default="0,0.01,0.05", help="Document min_weight values")
+    parser.add_argument("--query-top-k", type=int, default=0, help="Query top_k (0 = off)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+
+    chunker = ChunkingService()
+    chunks = [chunk for path in args.files for chunk in chunker.chunk_text(path.read_text(encoding="utf-8"))]
+    embedder = EmbeddingService()
+    print(f"🚀 Encoding {len(chunks)} chunks and {len(queries)} queries...")
+    _, doc_vectors = embedder.encode_batch_hybrid(chunks)
+    _, query_vectors = embedder.encode_batch_hybrid(queries)
+    query_vectors = [q.prune(top_k=args.query_top_k) for q in query_vectors]
+
+    reference_index = InvertedIndex(doc_vectors)
+    reference = [reference_index.search(q, args.top_k) for q in query_vectors]
+
+    print(f"\nchunks={len(chunks)} queries={len(queries)} k={args.top_k} runs={args.runs}")
+    print(
+        f"{'top_k':>6} {'min_w':>6} {'nnz/doc':>8} {'index':>7} "
+        f"{'p50 ms':>7} {'p95 ms':>7} {'recall@k':>9}"
+    )
+    for top_k in (int(v) for v in args.top_k_values.split(",")):
+        for min_weight in (float(v) for v in args.min_weights.split(",")):
+            pruned = [v.prune(top_k=top_k, min_weight=min_weight) for v in doc_vectors]
+            index = InvertedIndex(pruned)
+
+            latencies, recalls = [], []
+            for query, expected in zip(query_vectors, reference):
+                for _ in range(args.runs):
+                    started = time.perf_counter()
+                    found = index.search(query, args.top_k)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                recalls.append(len(set(found) & set(expected)) / len(expected) if expected else 1.0)
+
+            print(
+                f"{top_k:>6} {min_weight:>6.3f} {index.nnz / len(pruned):>8.1f} "
+                f"{index.nnz / reference_index.nnz:>6.0%} "
+                f"{percentile(latencies, 50):>7.3f} {percentile(latencies, 95):>7.3f} "
+                f"{statistics.mean(recalls):>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
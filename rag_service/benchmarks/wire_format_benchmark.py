@@ -0,0 +1,144 @@
+"""
+Wire Format Benchmark
+CPU time and body size of JSON / orjson / msgpack with none / gzip / zstd
+
+Two synthetic payloads are measured: a /search response (top_k results with
+text and metadata) and a /documents request body. For every format and
+encoding the payload is encoded (+ compressed) and decoded (+ decompressed)
+--runs times; the report shows body bytes and mean encode / decode CPU time,
+so the break-even point for compression (RAG_COMPRESS_MIN_BYTES) can be read
+off for a given network.
+
+Usage (from rag_service/):
+    python benchmarks/wire_format_benchmark.py --top-k 5,20,50 --doc-chars 2000,50000
+"""
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import DEFAULT_QUERIES  # noqa: E402
+from codec import GZIP_LEVEL, ZSTD_LEVEL, msgpack, orjson, zstandard  # noqa: E402
+
+
+# Vocabulary of the shared benchmark queries
+WORDS = " ".join(DEFAULT_QUERIES).split()
+
+
+def text(chars: int, rng: random.Random) -> str:
+    words = []
+    while sum(len(w) + 1 for w in words) < chars:
+        words.append(rng.choice(WORDS))
+    return " ".join(words)[:chars]
+
+
+def search_response(top_k: int, rng: random.Random) -> List[Dict]:
+    """Shape of a /search response"""
+    return [
+        {
+            "id": rng.getrandbits(62),
+            "text": text(500, rng),
+            "document_id": f"doc-{rng.randrange(10000)}",
+            "chunk_index": i,
+            "score": rng.random(),
+            "metadata": {"doc_type": "pdf", "room_id": "42", "lang": "ru"},
+            "rerank_score": None
+        }
+        for i in range(top_k)
+    ]
+
+
+def document_request(chars: int, rng: random.Random) -> Dict:
+    """Shape of a /documents request body"""
+    return {
+        "text": text(chars, rng),
+        "document_id": f"doc-{rng.randrange(10000)}",
+        "metadata": {"doc_type": "pdf", "room_id": "42"},
+        "mode": "insert"
+    }
+
+
+def formats() -> Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    available = {
+        "json": (
+            lambda data: json.dumps(data, ensure_ascii=False).encode("utf-8"),
+            lambda body: json.loads(body)
+        )
+    }
+    if orjson is not None:
+        available["orjson"] = (orjson.dumps, orjson.loads)
+    if msgpack is not None:
+        available["msgpack"] = (
+            lambda data: msgpack.packb(data, use_bin_type=True),
+            lambda body: msgpack.unpackb(body, raw=False)
+        )
+    return available
+
+
+def encodings() -> Dict[str, Optional[Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]]:
+    available = {
+        "none": None,
+        "gzip": (lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL), gzip.decompress)
+    }
+    if zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        decompressor = zstandard.ZstdDecompressor()
+        available["zstd"] = (compressor.compress, decompressor.decompress)
+    return available
+
+
+def measure(payload: Any, fmt, encoding, runs: int) -> Tuple[int, float, float]:
+    """Body bytes, mean encode ms and mean decode ms"""
+    dumps, loads = fmt
+    encode_ms = decode_ms = 0.0
+    for _ in range(runs):
+        started = time.process_time()
+        body = dumps(payload)
+        if encoding is not None:
+            body = encoding[0](body)
+        encode_ms += (time.process_time() - started) * 1000
+
+        started = time.process_time()
+        raw = encoding[1](body) if encoding is not None else body
+        loads(raw)
+        decode_ms += (time.process_time() - started) * 1000
+    return len(body), encode_ms / runs, decode_ms / runs
+
+
+def report(name: str, payload: Any, runs: int):
+    print(f"\n{name}")
+    print(f"{'format':>8} {'encoding':>9} {'bytes':>9} {'enc ms':>8} {'dec ms':>8}")
+    for fmt_name, fmt in formats().items():
+        for encoding_name, encoding in encodings().items():
+            size, encode_ms, decode_ms = measure(payload, fmt, encoding, runs)
+            print(f"{fmt_name:>8} {encoding_name:>9} {size:>9} {encode_ms:>8.3f} {decode_ms:>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", default="5,20,50", help="Search response sizes")
+    parser.add_argument("--doc-chars", default="2000,50000", help="Document request sizes, characters")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(
+        f"runs={args.runs} orjson={orjson is not None} msgpack={msgpack is not None} "
+        f"zstd={zstandard is not None}"
+    )
+    for top_k in (int(v) for v in args.top_k.split(",")):
+        report(f"search response, top_k={top_k}", search_response(top_k, rng), args.runs)
+    for chars in (int(v) for v in args.doc_chars.split(",")):
+        report(f"document request, {chars} chars", document_request(chars, rng), args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,81 @@
 """
 Smart Chunking Service
 Uses RecursiveCharacterTextSplitter for intelligent text segmentation
+
+Modes:
+- character: chunk_size counts characters (length_function=len)
+- token: chunk_size counts model tokens (BGE-M3 tokenizer, cached lengths)
+- sentence: whole sentences packed up to chunk_size tokens in a single pass
 """
 
-from typing import List, Dict
+import hashlib
+import re
+from functools import lru_cache, partial
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 
+CHUNKING_MODES = ("character", "token", "sentence")
+
+# Sentence end: terminal punctuation (plus closing quotes/brackets) before
+# whitespace, or a blank line. Works the same for Latin, Cyrillic and Kazakh text.
+SENTENCE_BOUNDARY = re.compile(r'[.!?…]+["\'»”)\]]*(?=\s)|\n[ \t]*\n')
+
+# Tokenizers by name, loaded once per process (chunking may run in a process pool)
+_tokenizers: Dict[str, object] = {}
+
+
+def compute_chunk_hash(text: str) -> str:
+    """
+    Content hash of a chunk
+    Used to detect unchanged chunks when a document is re-indexed
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_tokenizer(tokenizer_name: str):
+    """Load a Hugging Face tokenizer (name or local path) once per process"""
+    tokenizer = _tokenizers.get(tokenizer_name)
+    if tokenizer is None:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        _tokenizers[tokenizer_name] = tokenizer
+    return tokenizer
+
+
+@lru_cache(maxsize=65536)
+def token_length(text: str, tokenizer_name: str) -> int:
+    """
+    Number of model tokens in text (without special tokens)
+    
+    The recursive splitter measures the same pieces many times while merging,
+    so lengths are cached.
+    """
+    tokenizer = get_tokenizer(tokenizer_name)
+    return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def iter_sentences(text: str) -> Iterator[str]:
+    """
+    Yield sentences of text in order (single pass, no intermediate list)
+    
+    Args:
+        text: Input text
+        
+    Yields:
+        Stripped, non-empty sentences
+    """
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            yield sentence
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        yield tail
+
+
 class ChunkingService:
     """
     Service for splitting text into intelligent chunks
@@ -17,16 +86,27 @@ class ChunkingService:
         self,
         chunk_size: int = 500,
         chunk_overlap: int = 50,
-        separators: List[str] = None
+        separators: List[str] = None,
+        mode: str = "character",
+        tokenizer_name: Optional[str] = None
     ):
         """
         Initialize the chunking service
         
         Args:
-            chunk_size: Maximum characters per chunk
-            chunk_overlap: Number of characters to overlap between chunks
+            chunk_size: Maximum characters (character mode) or tokens (token and
+                sentence modes) per chunk
+            chunk_overlap: Overlap between chunks, in the same unit as chunk_size
             separators: Custom separators (default: paragraph -> sentence -> word)
+            mode: "character", "token" or "sentence"
+            tokenizer_name: Hugging Face tokenizer name or local path
+                (required for token and sentence modes)
         """
+        if mode not in CHUNKING_MODES:
+            raise ValueError(f"Invalid chunking mode: {mode} (expected one of {CHUNKING_MODES})")
+        if mode != "character" and not tokenizer_name:
+            raise ValueError(f"Chunking mode '{mode}' requires tokenizer_name")
+        
         if separators is None:
             # Smart separators: try to split by paragraphs first, then sentences
             separators = [
@@ -37,11 +117,22 @@ class ChunkingService:
                 ""       # Characters (fallback)
             ]
         
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.tokenizer_name = tokenizer_name
+        
+        if mode == "character":
+            self.length_function = len
+        else:
+            # partial of a module-level function: stays picklable for process pools
+            self.length_function = partial(token_length, tokenizer_name=tokenizer_name)
+        
         self.splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
             separators=separators,
-            length_function=len,
+            length_function=self.length_function,
             is_separator_regex=False
         )
     
@@ -55,12 +146,73 @@ class ChunkingService:
         Returns:
             List of text chunks
         """
+        return list(self.iter_chunks(text))
+    
+    def iter_chunks(self, text: str) -> Iterator[str]:
+        """
+        Yield chunks of text in order
+        
+        Args:
+            text: Input text to chunk
+            
+        Yields:
+            Stripped, non-empty chunks
+        """
         if not text or not text.strip():
-            return []
+            return
+        
+        if self.mode == "sentence":
+            chunks = self._pack_sentences(iter_sentences(text))
+        else:
+            chunks = self.splitter.split_text(text)
+        
+        for chunk in chunks:
+            chunk = chunk.strip()
+            if chunk:
+                yield chunk
+    
+    def _pack_sentences(self, sentences: Iterator[str]) -> Iterator[str]:
+        """
+        Greedily pack whole sentences into chunks of at most chunk_size tokens
+        
+        Trailing sentences of a chunk (up to chunk_overlap tokens) are repeated
+        at the start of the next one. A sentence longer than chunk_size is split
+        by the recursive token splitter.
+        """
+        current: List[str] = []
+        lengths: List[int] = []
+        total = 0
+        
+        for sentence in sentences:
+            length = self.length_function(sentence)
+            
+            if length > self.chunk_size:
+                if current:
+                    yield " ".join(current)
+                    current, lengths, total = [], [], 0
+                yield from self.splitter.split_text(sentence)
+                continue
+            
+            if current and total + length > self.chunk_size:
+                yield " ".join(current)
+                # Carry the longest tail of sentences that fits the overlap
+                # and still leaves room for the new sentence
+                keep, kept = 0, 0
+                for tail_length in reversed(lengths):
+                    if kept + tail_length > self.chunk_overlap or kept + tail_length + length > self.chunk_size:
+                        break
+                    kept += tail_length
+                    keep += 1
+                current = current[len(current) - keep:] if keep else []
+                lengths = lengths[len(lengths) - keep:] if keep else []
+                total = kept
+            
+            current.append(sentence)
+            lengths.append(length)
+            total += length
         
-        chunks = self.splitter.split_text(text)
-        # Filter out empty chunks
-        return [chunk.strip() for chunk in chunks if chunk.strip()]
+        if current:
+            yield " ".join(current)
     
     def chunk_with_metadata(
         self,
@@ -77,17 +229,40 @@ class ChunkingService:
             metadata: Additional metadata to attach to each chunk
             
         Returns:
-            List of dictionaries containing chunk text, document_id, and metadata
+            List of dictionaries containing chunk text, chunk_hash, document_id, and metadata
         """
         chunks = self.chunk_text(text)
+        return self.attach_metadata(chunks, document_id, metadata, total_chunks=len(chunks))
+    
+    def attach_metadata(
+        self,
+        chunks: List[str],
+        document_id: str,
+        metadata: Dict = None,
+        start_index: int = 0,
+        total_chunks: int = 0
+    ) -> List[Dict]:
+        """
+        Build chunk dicts for already split chunks
         
+        Args:
+            chunks: Chunk texts
+            document_id: Unique identifier for the document
+            metadata: Additional metadata to attach to each chunk
+            start_index: chunk_index of the first chunk
+            total_chunks: Number of chunks in the document (0 = unknown, streamed)
+            
+        Returns:
+            List of dictionaries containing chunk text, chunk_hash, document_id, and metadata
+        """
         result = []
-        for idx, chunk in enumerate(chunks):
+        for idx, chunk in enumerate(chunks, start=start_index):
             chunk_data = {
                 "text": chunk,
+                "chunk_hash": compute_chunk_hash(chunk),
                 "document_id": document_id,
                 "chunk_index": idx,
-                "total_chunks": len(chunks)
+                "total_chunks": total_chunks
             }
             
             # Add any additional metadata
@@ -97,3 +272,77 @@ class ChunkingService:
             result.append(chunk_data)
         
         return result
+    
+    def split_window(self, text: str, final: bool = False) -> Tuple[List[str], str]:
+        """
+        Chunk one window of a streamed document
+        
+        The window is cut at the last paragraph break in its second half
+        (or sentence end, or space); text before the cut is chunked and text
+        after it is carried over to the next window, so chunks never span a
+        cut mid-sentence. Pure function of its arguments: safe to run in a
+        process pool.
+        
+        Args:
+            text: Carried-over text followed by newly read text
+            final: True for the last window (everything is chunked)
+            
+        Returns:
+            Tuple of (chunks, text to carry into the next window)
+        """
+        if final:
+            return self.chunk_text(text), ""
+        
+        half = len(text) // 2
+        cut = text.rfind("\n\n", half)
+        if cut < 0:
+            cut = max((match.end() for match in SENTENCE_BOUNDARY.finditer(text, half)), default=-1)
+        if cut < 0:
+            cut = text.rfind(" ", half)
+        if cut <= 0:
+            cut = len(text)
+        return self.chunk_text(text[:cut]), text[cut:]
+    
+    def iter_stream(self, pieces: Iterable[str], window_size: int = 131072) -> Iterator[str]:
+        """
+        Chunk a document read piece by piece (file, HTTP body)
+        
+        At most about window_size characters of text are held at a time,
+        whatever the document size.
+        
+        Args:
+            pieces: Text pieces in document order
+            window_size: Characters per chunking window
+            
+        Yields:
+            Chunks in document order
+        """
+        window = StreamWindow(window_size)
+        for piece in pieces:
+            if window.feed(piece):
+                chunks, carry = self.split_window(window.take())
+                window.feed(carry)
+                yield from chunks
+        yield from self.split_window(window.take(), final=True)[0]
+
+
+class StreamWindow:
+    """Accumulates streamed text pieces until a chunking window is full"""
+    
+    def __init__(self, window_size: int):
+        self.window_size = window_size
+        self._pieces: List[str] = []
+        self._size = 0
+    
+    def feed(self, piece: str) -> bool:
+        """Add text, return True when the window is full"""
+        if piece:
+            self._pieces.append(piece)
+            self._size += len(piece)
+        return self._size >= self.window_size
+    
+    def take(self) -> str:
+        """Return the buffered text and empty the window"""
+        text = "".join(self._pieces)
+        self._pieces, self._size = [], 0
+        return text
@@ -0,0 +1,208 @@
+"""
+Wire Codecs
+Content negotiation for request and response bodies: JSON or msgpack,
+optionally gzip / zstd compressed
+"""
+
+import gzip
+import json
+import zlib
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+
+try:
+    import msgpack
+except ImportError:  # msgpack bodies are optional (poetry install -E wire)
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:  # faster JSON encoding when installed
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+# Request scope key holding the media type of a msgpack body (see CodecRoute)
+BODY_MEDIA_TYPE_KEY = "rag.body_media_type"
+
+
+def media_type(content_type: Optional[str]) -> str:
+    """Bare media type of a Content-Type / Accept entry"""
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Content encodings this process can read and write, preferred first"""
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def dumps(data: Any, media: str = JSON) -> bytes:
+    """Serialize data as msgpack or compact JSON (orjson when installed)"""
+    if media == MSGPACK:
+        return msgpack.packb(data, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(body: bytes, media: str = JSON) -> Any:
+    """Parse a msgpack or JSON body"""
+    if media in MSGPACK_TYPES:
+        if msgpack is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="msgpack bodies are not supported by this service"
+            )
+        return msgpack.unpackb(body, raw=False)
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a whole body with gzip or zstd"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def decompressor(encoding: str) -> Callable[[Optional[bytes]], bytes]:
+    """
+    Incremental decompressor for a Content-Encoding
+
+    Returns a function that takes the next compressed piece and returns
+    the bytes it decodes to; call it with None at the end of the body.
+
+    Raises:
+        HTTPException: 415 for an encoding this process cannot read
+    """
+    if encoding == "gzip":
+        engine = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        return lambda piece: engine.decompress(piece) if piece is not None else engine.flush()
+    if encoding == "zstd" and zstandard is not None:
+        engine = zstandard.ZstdDecompressor().decompressobj()
+        return lambda piece: engine.decompress(piece) if piece is not None else b""
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail=f"Unsupported Content-Encoding: {encoding}"
+    )
+
+
+def negotiate(accept: Optional[str], accept_encoding: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    Response media type and content encoding for a request
+
+    msgpack is used when the client lists it in Accept and it is available;
+    the first encoding this process supports (zstd, then gzip) that the
+    client lists in Accept-Encoding is used. q-values are not weighed.
+    """
+    accepted = {media_type(entry) for entry in (accept or "").split(",")}
+    media = MSGPACK if msgpack is not None and accepted & set(MSGPACK_TYPES) else JSON
+    encodings = {media_type(entry) for entry in (accept_encoding or "").split(",")}
+    encoding = next((e for e in supported_encodings() if e in encodings), None)
+    return media, encoding
+
+
+def encode_response(data: Any, request: Request, min_compress_bytes: int = 1024, status_code: int = 200) -> Response:
+    """
+    Serialize data in the format the client asked for
+
+    Args:
+        data: JSON-compatible data (plain dicts/lists, e.g. model_dump() output)
+        request: Incoming request (Accept / Accept-Encoding)
+        min_compress_bytes: Smaller bodies are sent uncompressed
+        status_code: Response status code
+    """
+    media, encoding = negotiate(request.headers.get("accept"), request.headers.get("accept-encoding"))
+    body = dumps(data, media)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding is not None and len(body) >= min_compress_bytes:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type=media, headers=headers)
+
+
+class CodecRequest(Request):
+    """
+    Request whose body is decompressed (Content-Encoding) while it streams
+    and whose json() also parses msgpack bodies
+    """
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        if hasattr(self, "_body"):
+            yield self._body
+            yield b""
+            return
+        encoding = media_type(self.headers.get("content-encoding"))
+        if encoding in ("", "identity"):
+            async for piece in super().stream():
+                yield piece
+            return
+        decode = decompressor(encoding)
+        async for piece in super().stream():
+            if piece:
+                data = decode(piece)
+                if data:
+                    yield data
+        tail = decode(None)
+        if tail:
+            yield tail
+        yield b""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = loads(await self.body(), self.scope.get(BODY_MEDIA_TYPE_KEY, JSON))
+        return self._json
+
+
+class CodecRoute(APIRoute):
+    """
+    Route class that accepts msgpack and gzip/zstd request bodies
+
+    FastAPI only parses bodies whose Content-Type is JSON, so for msgpack
+    bodies the Content-Type seen by FastAPI is rewritten to JSON and the
+    real media type is kept in the scope; CodecRequest.json() then decodes
+    msgpack directly into the data FastAPI validates against the model.
+    """
+
+    def get_route_handler(self) -> Callable:
+        original_handler = super().get_route_handler()
+
+        async def handler(request: Request) -> Response:
+            scope = request.scope
+            body_media = media_type(request.headers.get("content-type"))
+            if body_media in MSGPACK_TYPES:
+                scope = {
+                    **scope,
+                    BODY_MEDIA_TYPE_KEY: body_media,
+                    "headers": [
+                        (name, JSON.encode("latin-1") if name == b"content-type" else value)
+                        for name, value in scope["headers"]
+                    ]
+                }
+            encoding = media_type(request.headers.get("content-encoding"))
+            if encoding not in ("", "identity"):
+                decompressor(encoding)  # 415 before reading an unsupported body
+            return await original_handler(CodecRequest(scope, request.receive))
+
+        return handler
+
+
+def codec_info() -> Dict:
+    """Available formats (reported by /metrics)"""
+    return {
+        "msgpack": msgpack is not None,
+        "orjson": orjson is not None,
+        "encodings": list(supported_encodings())
+    }
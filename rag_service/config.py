@@ -0,0 +1,157 @@
+"""
+RAG Microservice Configuration
+All tunables are read from environment variables with sensible defaults
+"""
+
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable"""
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float environment variable"""
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean environment variable (1/true/yes/on)"""
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_str(name: str, default: str) -> str:
+    """Read a string environment variable"""
+    value = os.getenv(name)
+    return value if value not in (None, "") else default
+
+
+class Settings:
+    """
+    Service settings
+    Every attribute can be overridden with the matching RAG_* environment variable
+    """
+
+    def __init__(self):
+        # Vector store backend: "milvus" or "local" (in-process, persisted to local_store_path)
+        self.vector_store_backend = _env_str("RAG_VECTOR_STORE", "milvus")
+        self.milvus_host = _env_str("RAG_MILVUS_HOST", "localhost")
+        self.milvus_port = _env_int("RAG_MILVUS_PORT", 19530)
+        self.local_store_path = _env_str("RAG_LOCAL_STORE_PATH", "./local_store")
+        # Partitions behind the room_id partition key (applies when a collection is created)
+        self.num_partitions = _env_int("RAG_NUM_PARTITIONS", 64)
+
+        # Query micro-batching
+        self.batch_max_size = _env_int("RAG_BATCH_MAX_SIZE", 32)
+        self.batch_max_wait_ms = _env_float("RAG_BATCH_MAX_WAIT_MS", 5.0)
+        self.batch_max_queue = _env_int("RAG_BATCH_MAX_QUEUE", 1024)
+
+        # Executor pools (workers / max queued tasks before 429)
+        self.inference_workers = _env_int("RAG_INFERENCE_WORKERS", 1)
+        self.inference_queue = _env_int("RAG_INFERENCE_QUEUE", 64)
+        self.io_workers = _env_int("RAG_IO_WORKERS", 8)
+        self.io_queue = _env_int("RAG_IO_QUEUE", 256)
+        self.chunking_workers = _env_int("RAG_CHUNKING_WORKERS", 2)
+        self.chunking_queue = _env_int("RAG_CHUNKING_QUEUE", 64)
+        self.chunking_executor = _env_str("RAG_CHUNKING_EXECUTOR", "thread")  # thread | process
+
+        # Chunking: "character" (chunk size in characters), "token" (BGE-M3 tokens)
+        # or "sentence" (whole sentences packed up to the token size)
+        self.chunking_mode = _env_str("RAG_CHUNKING_MODE", "character")
+        self.chunk_size = _env_int("RAG_CHUNK_SIZE", 500)
+        self.chunk_overlap = _env_int("RAG_CHUNK_OVERLAP", 50)
+
+        # Streamed documents are chunked in windows of this many characters
+        self.stream_window_chars = _env_int("RAG_STREAM_WINDOW_CHARS", 131072)
+
+        # Bulk ingestion: chunks per embedding/insert call
+        self.bulk_batch_size = _env_int("RAG_BULK_BATCH_SIZE", 256)
+
+        # Milvus flush policy (writes are not flushed per request)
+        self.flush_interval_seconds = _env_float("RAG_FLUSH_INTERVAL_SECONDS", 30.0)
+        self.flush_max_pending_rows = _env_int("RAG_FLUSH_MAX_PENDING_ROWS", 10000)
+
+        # Sparse vector pruning (0 = off): stored chunks keep at most sparse_top_k
+        # tokens with weight >= sparse_min_weight, queries keep sparse_query_top_k
+        self.sparse_top_k = _env_int("RAG_SPARSE_TOP_K", 0)
+        self.sparse_min_weight = _env_float("RAG_SPARSE_MIN_WEIGHT", 0.0)
+        self.sparse_query_top_k = _env_int("RAG_SPARSE_QUERY_TOP_K", 0)
+
+        # Dense vectors (Milvus): storage type and index apply to new collections,
+        # ef / nprobe / search_list / rerank are search defaults (per-request overridable)
+        self.dense_vector_type = _env_str("RAG_DENSE_VECTOR_TYPE", "float")  # float | float16 | binary
+        self.dense_index_type = _env_str(
+            "RAG_DENSE_INDEX_TYPE",
+            "BIN_IVF_FLAT" if self.dense_vector_type == "binary" else "HNSW"
+        )
+        self.dense_nlist = _env_int("RAG_DENSE_NLIST", 1024)
+        self.dense_pq_m = _env_int("RAG_DENSE_PQ_M", 64)
+        self.dense_ef = _env_int("RAG_DENSE_EF", 100)
+        self.dense_nprobe = _env_int("RAG_DENSE_NPROBE", 16)
+        self.dense_search_list = _env_int("RAG_DENSE_SEARCH_LIST", 100)
+        self.dense_rerank = _env_bool("RAG_DENSE_RERANK", self.dense_vector_type == "binary")
+        self.dense_rerank_multiplier = _env_int("RAG_DENSE_RERANK_MULTIPLIER", 4)
+
+        # Hybrid search: "native" (Milvus hybrid_search + ranker) or "python" (client-side RRF)
+        self.hybrid_engine = _env_str("RAG_HYBRID_ENGINE", "native")
+
+        # Second-stage reranking: "" (off), "colbert" (BGE-M3 multi-vector, no extra
+        # model) or "cross-encoder" (reranker_model). The top rerank_candidates fused
+        # results are re-scored in batches until rerank_budget_ms (0 = no limit) is spent
+        self.reranker = _env_str("RAG_RERANKER", "")
+        self.reranker_model = _env_str("RAG_RERANKER_MODEL", "BAAI/bge-reranker-v2-m3")
+        self.rerank_candidates = _env_int("RAG_RERANK_CANDIDATES", 30)
+        self.rerank_batch_size = _env_int("RAG_RERANK_BATCH_SIZE", 16)
+        self.rerank_budget_ms = _env_float("RAG_RERANK_BUDGET_MS", 200.0)
+
+        # Multi-worker mode: RAG_WORKERS > 1 starts one inference process holding
+        # the model and N HTTP workers that call it over a unix socket
+        self.workers = _env_int("RAG_WORKERS", 1)
+        self.inference_socket = _env_str("RAG_INFERENCE_SOCKET", "/tmp/rag-inference.sock")
+        # Set for worker processes by the launcher; empty = load the model in-process
+        self.inference_address = _env_str("RAG_INFERENCE_ADDRESS", "")
+        self.inference_authkey = _env_str("RAG_INFERENCE_AUTHKEY", "")
+        self.inference_connect_timeout = _env_float("RAG_INFERENCE_CONNECT_TIMEOUT", 300.0)
+
+        # Startup: the model loads in the background; requests that need it wait
+        # up to ready_wait_seconds, then get 503 + Retry-After
+        self.ready_wait_seconds = _env_float("RAG_READY_WAIT_SECONDS", 2.0)
+        # A failed load is retried with exponential backoff (startup_retry_backoff_seconds,
+        # doubling up to 60s); after startup_retries retries /health fails so the process is restarted
+        self.startup_retries = _env_int("RAG_STARTUP_RETRIES", 5)
+        self.startup_retry_backoff_seconds = _env_float("RAG_STARTUP_RETRY_BACKOFF_SECONDS", 5.0)
+        # Local model directory (pre-baked image); empty = download BAAI/bge-m3 from the Hub
+        self.model_path = _env_str("RAG_MODEL_PATH", "")
+
+        # Embedding engine: "torch" (FlagEmbedding) or "onnx" (onnxruntime, CPU)
+        self.embedding_engine = _env_str("RAG_EMBEDDING_ENGINE", "torch")
+        self.onnx_model_path = _env_str("RAG_ONNX_MODEL_PATH", "./models/bge-m3-onnx")
+        self.onnx_quantized = _env_bool("RAG_ONNX_QUANTIZED", True)  # int8 model
+        self.onnx_threads = _env_int("RAG_ONNX_THREADS", 0)  # intra-op threads, 0 = all cores
+
+        # Length-bucketed batching: inputs are sorted by token length and grouped
+        # so that each forward pass stays within a padded-token budget
+        self.max_length = _env_int("RAG_MAX_LENGTH", 512)  # tokens per text (longer is truncated)
+        self.embed_token_budget = _env_int("RAG_EMBED_TOKEN_BUDGET", 16384)  # padded tokens per pass
+        self.embed_max_batch_size = _env_int("RAG_EMBED_MAX_BATCH_SIZE", 64)  # texts per pass
+
+        # Embedding cache (in-process LRU + optional Redis tier)
+        self.embedding_cache_size = _env_int("RAG_EMBEDDING_CACHE_SIZE", 20000)  # 0 disables LRU tier
+        self.embedding_cache_redis_url = _env_str("RAG_EMBEDDING_CACHE_REDIS_URL", "")
+        self.embedding_cache_ttl = _env_int("RAG_EMBEDDING_CACHE_TTL", 7 * 24 * 3600)
+
+        # Wire format: responses smaller than this are not gzip/zstd compressed
+        self.compress_min_bytes = _env_int("RAG_COMPRESS_MIN_BYTES", 1024)
+
+        # Search result cache (0 disables), invalidated on writes
+        self.search_cache_size = _env_int("RAG_SEARCH_CACHE_SIZE", 10000)
+        self.search_cache_ttl_seconds = _env_float("RAG_SEARCH_CACHE_TTL_SECONDS", 30.0)
+
+
+settings = Settings()
@@ -0,0 +1,194 @@
+"""
+Content-Addressed Embedding Cache
+Two tiers: in-process LRU and optional Redis, keyed by hash(model_id + chunk text)
+"""
+
+import hashlib
+import struct
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import registry
+from sparse_vector import SparseVector
+
+try:
+    import redis
+except ImportError:  # Redis tier is optional
+    redis = None
+
+
+# Payload header: dense dim, number of sparse entries
+_HEADER = struct.Struct("<II")
+
+CacheEntry = Tuple[np.ndarray, SparseVector]
+
+
+def encode_payload(dense: np.ndarray, sparse: SparseVector) -> bytes:
+    """
+    Pack an embedding into a compact binary payload
+    float16 dense vector + uint32 token ids + float16 weights
+    """
+    dense16 = np.asarray(dense, dtype=np.float16)
+    token_ids = np.asarray(sparse.indices, dtype=np.uint32)
+    weights = np.asarray(sparse.values, dtype=np.float16)
+    return (
+        _HEADER.pack(dense16.shape[0], sparse.nnz)
+        + dense16.tobytes()
+        + token_ids.tobytes()
+        + weights.tobytes()
+    )
+
+
+def decode_payload(payload: bytes) -> CacheEntry:
+    """Unpack a payload produced by encode_payload"""
+    dim, nnz = _HEADER.unpack_from(payload)
+    offset = _HEADER.size
+    dense = np.frombuffer(payload, dtype=np.float16, count=dim, offset=offset)
+    offset += dim * 2
+    token_ids = np.frombuffer(payload, dtype=np.uint32, count=nnz, offset=offset)
+    offset += nnz * 4
+    weights = np.frombuffer(payload, dtype=np.float16, count=nnz, offset=offset)
+    return dense, SparseVector(token_ids, weights.astype(np.float32))
+
+
+class EmbeddingCache:
+    """
+    Cache of (dense, sparse) embeddings for chunk texts
+
+    The in-process tier is a thread-safe LRU of float16 vectors. The optional
+    Redis tier is shared between replicas and survives restarts.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        max_entries: int = 20000,
+        redis_url: Optional[str] = None,
+        redis_ttl: int = 7 * 24 * 3600,
+        key_prefix: str = "rag:emb:"
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            model_id: Model identifier, part of every key (include anything that
+                changes the vectors, e.g. the truncation length)
+            max_entries: Capacity of the in-process LRU tier
+            redis_url: Redis URL for the shared tier (None disables it)
+            redis_ttl: Expiration of Redis entries in seconds
+            key_prefix: Prefix for Redis keys
+        """
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.redis_ttl = redis_ttl
+        self.key_prefix = key_prefix
+
+        self._lru: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = Lock()
+
+        self._redis = None
+        if redis_url:
+            if redis is None:
+                print("⚠️ redis package not installed, Redis embedding cache disabled")
+            else:
+                self._redis = redis.Redis.from_url(redis_url)
+
+        self._memory_hits = registry.counter("embedding_cache_memory_hits")
+        self._redis_hits = registry.counter("embedding_cache_redis_hits")
+        self._misses = registry.counter("embedding_cache_misses")
+
+    def make_key(self, text: str) -> str:
+        """Content address of a text for the current model"""
+        digest = hashlib.sha256(f"{self.model_id}\0{text}".encode("utf-8")).hexdigest()
+        return digest
+
+    def get_many(self, texts: List[str]) -> List[Optional[CacheEntry]]:
+        """
+        Look up embeddings for a list of texts
+
+        Returns:
+            List aligned with texts, None for misses
+        """
+        keys = [self.make_key(text) for text in texts]
+        results: List[Optional[CacheEntry]] = [None] * len(texts)
+
+        # Tier 1: in-process LRU
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._lru.get(key)
+                if entry is not None:
+                    self._lru.move_to_end(key)
+                    results[i] = entry
+                else:
+                    missing.append(i)
+        self._memory_hits.inc(len(texts) - len(missing))
+
+        # Tier 2: Redis
+        if missing and self._redis is not None:
+            try:
+                payloads = self._redis.mget([self.key_prefix + keys[i] for i in missing])
+            except Exception as e:
+                print(f"⚠️ Redis embedding cache read failed: {e}")
+                payloads = [None] * len(missing)
+
+            still_missing = []
+            for i, payload in zip(missing, payloads):
+                if payload is None:
+                    still_missing.append(i)
+                    continue
+                entry = decode_payload(payload)
+                results[i] = entry
+                self._put_local(keys[i], entry)
+            self._redis_hits.inc(len(missing) - len(still_missing))
+            missing = still_missing
+
+        self._misses.inc(len(missing))
+        return results
+
+    def set_many(self, texts: List[str], dense_vecs: np.ndarray, sparse_vecs: List[SparseVector]):
+        """Store freshly computed embeddings in both tiers"""
+        pipe = self._redis.pipeline(transaction=False) if self._redis is not None else None
+
+        for text, dense, sparse in zip(texts, dense_vecs, sparse_vecs):
+            key = self.make_key(text)
+            payload = encode_payload(dense, sparse)
+            self._put_local(key, decode_payload(payload))
+            if pipe is not None:
+                pipe.setex(self.key_prefix + key, self.redis_ttl, payload)
+
+        if pipe is not None:
+            try:
+                pipe.execute()
+            except Exception as e:
+                print(f"⚠️ Redis embedding cache write failed: {e}")
+
+    def _put_local(self, key: str, entry: CacheEntry):
+        """Insert into the LRU tier, evicting the least recently used entries"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """Hit-rate statistics used to size the cache"""
+        memory_hits = self._memory_hits.value
+        redis_hits = self._redis_hits.value
+        misses = self._misses.value
+        lookups = memory_hits + redis_hits + misses
+        return {
+            "model_id": self.model_id,
+            "entries": len(self._lru),
+            "max_entries": self.max_entries,
+            "redis_enabled": self._redis is not None,
+            "memory_hits": memory_hits,
+            "redis_hits": redis_hits,
+            "misses": misses,
+            "hit_rate": (memory_hits + redis_hits) / lookups if lookups else 0.0
+        }
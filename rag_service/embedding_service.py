@@ -4,10 +4,57 @@ Loads BAAI/bge-m3 model once and provides dense/sparse vector generation
 """
 
 from threading import Lock
-from typing import Dict, Tuple, List
+from typing import Dict, Optional, Tuple, List
 import numpy as np
+import torch
 from FlagEmbedding import BGEM3FlagModel
 
+from config import settings
+from embedding_cache import EmbeddingCache
+from metrics import registry
+from sparse_vector import SparseVector
+
+
+PADDING_RATIO_BUCKETS = (0.1, 0.25, 0.5, 0.75, 0.9, 1.0)
+
+
+def plan_length_buckets(
+    lengths: List[int],
+    token_budget: int,
+    max_batch_size: int
+) -> List[List[int]]:
+    """
+    Group inputs into batches of similar length
+    
+    Inputs are sorted by length (longest first) and packed greedily while
+    batch size * longest length (the padded size of the batch) stays within
+    token_budget. A single input longer than the budget gets its own batch.
+    
+    Args:
+        lengths: Token length of every input
+        token_budget: Maximum padded tokens per batch
+        max_batch_size: Maximum inputs per batch
+        
+    Returns:
+        Batches as lists of input indices
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    buckets: List[List[int]] = []
+    current: List[int] = []
+    for i in order:
+        # Sorted descending, so the first input of a bucket is its longest
+        longest = lengths[current[0]] if current else lengths[i]
+        if current and (
+            len(current) >= max_batch_size
+            or (len(current) + 1) * longest > token_budget
+        ):
+            buckets.append(current)
+            current = []
+        current.append(i)
+    if current:
+        buckets.append(current)
+    return buckets
+
 
 class SingletonMeta(type):
     """
@@ -34,16 +81,64 @@ class EmbeddingService(metaclass=SingletonMeta):
     def __init__(self):
         """Initialize the model only once"""
         if not hasattr(self, 'model'):
-            print("🚀 Loading BAAI/bge-m3 model...")
-            self.model = BGEM3FlagModel(
-                'BAAI/bge-m3',
-                use_fp16=True  # Use half precision for faster inference
-            )
+            self.model_name = 'BAAI/bge-m3'
+            self.model, self.model_id = self._load_model()
             print("✅ Model loaded successfully!")
             
+            self.max_length = settings.max_length
+            
+            # Content-addressed cache of chunk embeddings. Texts longer than
+            # max_length are truncated, so the limit is part of the key: a new
+            # setting must not reuse (Redis-shared) vectors of the old one
+            self.cache = None
+            if settings.embedding_cache_size > 0 or settings.embedding_cache_redis_url:
+                self.cache = EmbeddingCache(
+                    model_id=f"{self.model_id}:{self.max_length}",
+                    max_entries=settings.embedding_cache_size,
+                    redis_url=settings.embedding_cache_redis_url or None,
+                    redis_ttl=settings.embedding_cache_ttl
+                )
+            self._padding_hist = registry.histogram("embedding_padding_ratio", PADDING_RATIO_BUCKETS)
+            
             # Warmup: run a dummy inference to initialize CUDA/model
             self._warmup()
     
+    def _load_model(self) -> Tuple[object, str]:
+        """
+        Load the configured inference engine
+        
+        Returns:
+            Tuple of (model with a BGEM3FlagModel-compatible encode(), model id).
+            The model id names the engine so that cached embeddings from
+            different engines are never mixed.
+        """
+        if settings.embedding_engine == "onnx":
+            from onnx_engine import OnnxBGEM3Model
+            
+            variant = "int8" if settings.onnx_quantized else "fp32"
+            print(f"🚀 Loading {self.model_name} ONNX {variant} model from {settings.onnx_model_path}...")
+            model = OnnxBGEM3Model(
+                settings.onnx_model_path,
+                quantized=settings.onnx_quantized,
+                intra_op_threads=settings.onnx_threads
+            )
+            return model, f"{self.model_name}:onnx-{variant}"
+        
+        if settings.embedding_engine != "torch":
+            raise ValueError(f"Invalid embedding engine: {settings.embedding_engine}")
+        
+        source = settings.model_path or self.model_name
+        print(f"🚀 Loading {self.model_name} model from {source}...")
+        model = BGEM3FlagModel(
+            source,
+            use_fp16=torch.cuda.is_available()  # half precision only pays off on GPU
+        )
+        return model, self.model_name
+    
+    def cache_stats(self) -> Optional[Dict]:
+        """Embedding cache statistics (None when the cache is disabled)"""
+        return self.cache.stats() if self.cache is not None else None
+    
     def _warmup(self):
         """Warmup the model with a dummy sentence"""
         try:
@@ -70,12 +165,13 @@ class EmbeddingService(metaclass=SingletonMeta):
         """
         result = self.model.encode(
             [text],
+            max_length=self.max_length,
             return_dense=True,
             return_sparse=False
         )
         return result['dense_vecs'][0]
     
-    def encode_sparse(self, text: str) -> Dict:
+    def encode_sparse(self, text: str) -> SparseVector:
         """
         Generate sparse vector embeddings
         
@@ -83,16 +179,17 @@ class EmbeddingService(metaclass=SingletonMeta):
             text: Input text to encode
             
         Returns:
-            Dictionary with sparse vector representation
+            Sparse vector (integer token ids + weights)
         """
         result = self.model.encode(
             [text],
+            max_length=self.max_length,
             return_dense=False,
             return_sparse=True
         )
-        return result['lexical_weights'][0]
+        return SparseVector.from_lexical_weights(result['lexical_weights'][0])
     
-    def encode_hybrid(self, text: str) -> Tuple[np.ndarray, Dict]:
+    def encode_hybrid(self, text: str) -> Tuple[np.ndarray, SparseVector]:
         """
         Generate both dense and sparse embeddings simultaneously
         
@@ -104,16 +201,41 @@ class EmbeddingService(metaclass=SingletonMeta):
         """
         result = self.model.encode(
             [text],
+            max_length=self.max_length,
             return_dense=True,
             return_sparse=True
         )
         dense = result['dense_vecs'][0]
-        sparse = result['lexical_weights'][0]
+        sparse = SparseVector.from_lexical_weights(result['lexical_weights'][0])
         return dense, sparse
     
-    def encode_batch_hybrid(self, texts: List[str]) -> Tuple[np.ndarray, List[Dict]]:
+    def encode_colbert(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Generate ColBERT multi-vector embeddings (one normalized vector per token)
+        Used for reranking only, so results are not cached
+
+        Args:
+            texts: List of texts to encode
+
+        Returns:
+            One array of shape (tokens, 1024) per text
+        """
+        if not texts:
+            return []
+        result = self.model.encode(
+            texts,
+            batch_size=len(texts),
+            max_length=self.max_length,
+            return_dense=False,
+            return_sparse=False,
+            return_colbert_vecs=True
+        )
+        return [np.asarray(vecs, dtype=np.float32) for vecs in result['colbert_vecs']]
+
+    def encode_batch_hybrid(self, texts: List[str]) -> Tuple[np.ndarray, List[SparseVector]]:
         """
         Generate embeddings for multiple texts in batch
+        Only texts missing from the embedding cache are sent to the model
         
         Args:
             texts: List of texts to encode
@@ -121,9 +243,93 @@ class EmbeddingService(metaclass=SingletonMeta):
         Returns:
             Tuple of (dense_vectors, sparse_vectors)
         """
-        result = self.model.encode(
-            texts,
-            return_dense=True,
-            return_sparse=True
+        if self.cache is None or not texts:
+            return self._encode_batch(texts)
+        
+        cached = self.cache.get_many(texts)
+        miss_indices = [i for i, entry in enumerate(cached) if entry is None]
+        
+        if miss_indices:
+            # Duplicate chunks inside one document are encoded once
+            miss_texts = list(dict.fromkeys(texts[i] for i in miss_indices))
+            dense_vecs, sparse_vecs = self._encode_batch(miss_texts)
+            self.cache.set_many(miss_texts, dense_vecs, sparse_vecs)
+            
+            fresh = {
+                text: (dense_vecs[j], sparse_vecs[j])
+                for j, text in enumerate(miss_texts)
+            }
+            for i in miss_indices:
+                cached[i] = fresh[texts[i]]
+        
+        dense = np.stack([np.asarray(entry[0], dtype=np.float32) for entry in cached])
+        sparse = [entry[1] for entry in cached]
+        return dense, sparse
+    
+    def _encode_batch(self, texts: List[str]) -> Tuple[np.ndarray, List[SparseVector]]:
+        """
+        Run the model on texts (no caching), in length buckets
+        
+        Texts are grouped by token length under a padded-token budget so a
+        few long chunks do not pad every other chunk up to their length.
+        Results are returned in the original order.
+        """
+        if not texts:
+            return np.zeros((0, 1024), dtype=np.float32), []
+        
+        lengths = [
+            len(ids) for ids in self.model.tokenizer(
+                texts,
+                truncation=True,
+                max_length=self.max_length
+            )["input_ids"]
+        ]
+        buckets = plan_length_buckets(
+            lengths,
+            token_budget=settings.embed_token_budget,
+            max_batch_size=settings.embed_max_batch_size
         )
-        return result['dense_vecs'], result['lexical_weights']
+        
+        dense = np.zeros((len(texts), 1024), dtype=np.float32)
+        sparse: List[SparseVector] = [None] * len(texts)
+        for bucket in buckets:
+            result = self.model.encode(
+                [texts[i] for i in bucket],
+                batch_size=len(bucket),
+                max_length=self.max_length,
+                return_dense=True,
+                return_sparse=True
+            )
+            dense[bucket] = result['dense_vecs']
+            for i, weights in zip(bucket, result['lexical_weights']):
+                sparse[i] = SparseVector.from_lexical_weights(weights)
+            
+            padded = len(bucket) * lengths[bucket[0]]
+            self._padding_hist.observe(1 - sum(lengths[i] for i in bucket) / padded)
+        
+        return dense, sparse
+
+
+# Proxy to the shared inference process (multi-worker mode), created once per worker
+_remote_service = None
+
+
+def get_embedding_service():
+    """
+    Embedding service for this process
+    
+    HTTP workers started in multi-worker mode (RAG_INFERENCE_ADDRESS set)
+    get a RemoteEmbeddingService that forwards to the shared inference
+    process; otherwise the model is loaded in-process (singleton).
+    """
+    global _remote_service
+    if settings.inference_address:
+        if _remote_service is None:
+            from inference_server import RemoteEmbeddingService
+            _remote_service = RemoteEmbeddingService(
+                settings.inference_address,
+                settings.inference_authkey.encode(),
+                connect_timeout=settings.inference_connect_timeout
+            )
+        return _remote_service
+    return EmbeddingService()
@@ -0,0 +1,148 @@
+"""
+Bounded Executor Pools
+Runs blocking work (model inference, Milvus I/O, chunking) off the event loop
+with bounded concurrency and queue-depth backpressure
+"""
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from config import settings
+from metrics import registry
+
+
+class BackpressureError(Exception):
+    """
+    Raised when work cannot be accepted
+    status_code is 429 when the queue is full and 503 when the pool is unavailable
+    """
+
+    def __init__(self, message: str, status_code: int = 429, retry_after: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Thread or process pool with a hard limit on queued work
+    At most max_workers tasks run at once and at most max_queue more may wait
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        kind: str = "thread"
+    ):
+        """
+        Initialize the executor
+
+        Args:
+            name: Pool name (used in metrics and error messages)
+            max_workers: Number of worker threads/processes
+            max_queue: Number of tasks allowed to wait for a free worker
+            kind: "thread" or "process"
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Invalid executor kind: {kind}")
+
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pending = 0
+
+        if kind == "process":
+            self._executor: Optional[Executor] = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix=f"rag-{name}"
+            )
+
+        self._depth = registry.gauge(f"executor_{name}_pending")
+        self._rejected = registry.counter(f"executor_{name}_rejected")
+
+    @property
+    def pending(self) -> int:
+        """Number of running plus queued tasks"""
+        return self._pending
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) in the pool and await its result
+
+        Raises:
+            BackpressureError: If the queue is full (429) or the pool is shut down (503)
+        """
+        if self._executor is None:
+            raise BackpressureError(f"Executor '{self.name}' is unavailable", status_code=503)
+
+        if self._pending >= self.max_workers + self.max_queue:
+            self._rejected.inc()
+            raise BackpressureError(f"Executor '{self.name}' queue is full", status_code=429)
+
+        self._pending += 1
+        self._depth.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+        finally:
+            self._pending -= 1
+            self._depth.dec()
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and shut the pool down"""
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending
+        }
+
+
+class ExecutorPools:
+    """
+    Dedicated pools per kind of blocking work
+    - inference: model forward passes (few workers, the model is CPU/GPU bound)
+    - io: Milvus network calls
+    - chunking: text splitting (thread or process pool)
+    """
+
+    def __init__(self):
+        self.inference = BoundedExecutor(
+            "inference",
+            max_workers=settings.inference_workers,
+            max_queue=settings.inference_queue
+        )
+        self.io = BoundedExecutor(
+            "io",
+            max_workers=settings.io_workers,
+            max_queue=settings.io_queue
+        )
+        self.chunking = BoundedExecutor(
+            "chunking",
+            max_workers=settings.chunking_workers,
+            max_queue=settings.chunking_queue,
+            kind=settings.chunking_executor
+        )
+
+    def shutdown(self, wait: bool = True):
+        """Shut down all pools"""
+        for pool in (self.inference, self.io, self.chunking):
+            pool.shutdown(wait=wait)
+
+    def stats(self) -> Dict:
+        return {
+            pool.name: pool.stats()
+            for pool in (self.inference, self.io, self.chunking)
+        }
@@ -0,0 +1,133 @@
+"""
+Flush Scheduler
+Batches explicit vector store flushes: on a timer, at a size threshold, or on shutdown
+"""
+
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Optional
+
+from metrics import registry
+
+
+class FlushScheduler:
+    """
+    Tracks unflushed writes and flushes them in the background
+
+    Writes are acknowledged as soon as the store accepts them (Milvus keeps
+    them in growing segments, which are already searchable); sealing segments
+    with flush() happens here instead of on every request.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[], None],
+        interval_seconds: float = 30.0,
+        max_pending: int = 10000,
+        name: str = "milvus"
+    ):
+        """
+        Initialize the scheduler
+
+        Args:
+            flush_fn: Function that performs the actual flush
+            interval_seconds: Flush unflushed writes at least this often
+            max_pending: Flush as soon as this many rows are unflushed
+            name: Store name (used in metrics and thread name)
+        """
+        self.flush_fn = flush_fn
+        self.interval_seconds = interval_seconds
+        self.max_pending = max_pending
+        self.name = name
+
+        self._pending = 0
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._wake = Event()
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+
+        self._pending_gauge = registry.gauge(f"{name}_unflushed_rows")
+        self._flush_counters = {
+            reason: registry.counter(f"{name}_flushes_{reason}")
+            for reason in ("timer", "threshold", "manual", "shutdown")
+        }
+
+    @property
+    def pending(self) -> int:
+        """Number of rows written since the last flush"""
+        return self._pending
+
+    def record(self, rows: int):
+        """
+        Record rows written to the store
+
+        Args:
+            rows: Number of inserted or deleted rows
+        """
+        if rows <= 0:
+            return
+        self._ensure_thread()
+        with self._lock:
+            self._pending += rows
+            over_threshold = self._pending >= self.max_pending
+        self._pending_gauge.set(self._pending)
+
+        if over_threshold:
+            self._wake.set()  # flush in the background, not in the writer's request
+
+    def flush(self, reason: str = "manual"):
+        """Flush now (no-op for automatic flushes when nothing is pending)"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, 0
+            if pending == 0 and reason != "manual":
+                return
+
+            try:
+                self.flush_fn()
+                self._flush_counters[reason].inc()
+            except Exception as e:
+                with self._lock:
+                    self._pending += pending
+                print(f"❌ Flush of {self.name} failed ({reason}): {e}")
+                if reason == "manual":
+                    raise
+            finally:
+                self._pending_gauge.set(self._pending)
+
+    def close(self):
+        """Stop the background thread and flush remaining writes"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush(reason="shutdown")
+
+    def stats(self) -> Dict:
+        return {
+            "unflushed_rows": self._pending,
+            "interval_seconds": self.interval_seconds,
+            "max_pending": self.max_pending
+        }
+
+    def _ensure_thread(self):
+        """Start the background thread on the first write"""
+        if self._thread is None and not self._stopped.is_set():
+            with self._lock:
+                if self._thread is None:
+                    self._thread = Thread(
+                        target=self._run,
+                        name=f"{self.name}-flush",
+                        daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        """Background loop: wait for the timer or a threshold wake-up"""
+        while not self._stopped.is_set():
+            woken = self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            self.flush(reason="threshold" if woken else "timer")
@@ -0,0 +1,260 @@
+"""
+Shared Inference Server
+Holds the single BGE-M3 model for all HTTP workers and serves encode requests
+over a local socket (multiprocessing.connection, authenticated)
+"""
+
+import os
+import queue
+import secrets
+import time
+from concurrent.futures import Future
+from multiprocessing import get_context
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing.process import BaseProcess
+from threading import Thread, local
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from sparse_vector import SparseVector
+
+
+class InferenceServer:
+    """
+    Serves EmbeddingService.encode_batch_hybrid to worker processes
+
+    Every worker connection gets a thread that only does IPC; encode requests
+    from all connections go through one queue to a single model thread, which
+    merges whatever is waiting into one encode_batch_hybrid call. This turns
+    per-worker micro-batches into cross-worker batches. ColBERT (rerank)
+    requests go through the same queue so the model is never called from two
+    threads, but each runs as its own model call.
+    """
+
+    def __init__(self, address: str, authkey: bytes, max_batch_texts: int = 256):
+        """
+        Initialize the server (the model is loaded in serve_forever)
+
+        Args:
+            address: Unix socket path to listen on
+            authkey: Shared secret; peers without it are rejected
+            max_batch_texts: Maximum texts merged into one model call
+        """
+        self.address = address
+        self.authkey = authkey
+        self.max_batch_texts = max_batch_texts
+        self.embedding_service = None
+        self._requests: "queue.Queue[Tuple[str, List[str], Future]]" = queue.Queue()
+
+    def serve_forever(self):
+        """Load the model and accept worker connections"""
+        from embedding_service import EmbeddingService
+
+        self.embedding_service = EmbeddingService()
+        Thread(target=self._model_loop, name="inference-model", daemon=True).start()
+
+        if os.path.exists(self.address):
+            os.unlink(self.address)  # stale socket from a previous run
+        with Listener(self.address, authkey=self.authkey) as listener:
+            print(f"✅ Inference server listening on {self.address}")
+            while True:
+                try:
+                    connection = listener.accept()
+                except Exception as e:  # failed handshake (e.g. wrong authkey)
+                    print(f"⚠️ Rejected inference connection: {e}")
+                    continue
+                Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def _handle(self, connection: Connection):
+        """Serve one worker connection until it closes"""
+        with connection:
+            while True:
+                try:
+                    op, payload = connection.recv()
+                except (EOFError, OSError):
+                    return
+
+                try:
+                    if op in ("encode", "colbert"):
+                        result = self._submit(op, payload).result()
+                    elif op == "stats":
+                        result = self.embedding_service.cache_stats()
+                    elif op == "ping":
+                        result = {
+                            "model_name": self.embedding_service.model_name,
+                            "model_id": self.embedding_service.model_id
+                        }
+                    else:
+                        raise ValueError(f"Unknown operation: {op}")
+                    connection.send(("ok", result))
+                except Exception as e:
+                    connection.send(("error", f"{type(e).__name__}: {e}"))
+
+    def _submit(self, op: str, texts: List[str]) -> Future:
+        future: Future = Future()
+        self._requests.put((op, texts, future))
+        return future
+
+    def _model_loop(self):
+        """Merge queued encode requests into single model calls"""
+        deferred = None
+        while True:
+            op, texts, future = deferred or self._requests.get()
+            deferred = None
+            if op == "colbert":
+                try:
+                    future.set_result(self.embedding_service.encode_colbert(texts))
+                except Exception as e:
+                    future.set_exception(e)
+                continue
+
+            batch = [(texts, future)]
+            total = len(texts)
+            while total < self.max_batch_texts:
+                try:
+                    item = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item[0] != "encode":
+                    deferred = item  # served right after this batch
+                    break
+                batch.append(item[1:])
+                total += len(item[1])
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                dense_vecs, sparse_vecs = self.embedding_service.encode_batch_hybrid(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for request_texts, future in batch:
+                end = offset + len(request_texts)
+                future.set_result((dense_vecs[offset:end], sparse_vecs[offset:end]))
+                offset = end
+
+
+class RemoteEmbeddingService:
+    """
+    Drop-in replacement for EmbeddingService in HTTP workers
+
+    Encode calls are forwarded to the inference server. Each calling thread
+    keeps its own connection, so executor threads never share a socket.
+    """
+
+    def __init__(self, address: str, authkey: bytes, connect_timeout: float = 300.0):
+        """
+        Connect to the inference server, waiting for it to finish loading
+
+        Args:
+            address: Unix socket path of the inference server
+            authkey: Shared secret
+            connect_timeout: Seconds to wait for the server to come up
+        """
+        self.address = address
+        self.authkey = authkey
+        self.connect_timeout = connect_timeout
+        self.cache = None  # the embedding cache lives in the inference process
+        self._local = local()
+
+        info = self._call("ping", None)
+        self.model_name = info["model_name"]
+        self.model_id = info["model_id"]
+        print(f"✅ Connected to inference server at {address} ({self.model_id})")
+
+    def encode_dense(self, text: str) -> np.ndarray:
+        return self.encode_hybrid(text)[0]
+
+    def encode_sparse(self, text: str) -> SparseVector:
+        return self.encode_hybrid(text)[1]
+
+    def encode_hybrid(self, text: str) -> Tuple[np.ndarray, SparseVector]:
+        dense_vecs, sparse_vecs = self.encode_batch_hybrid([text])
+        return dense_vecs[0], sparse_vecs[0]
+
+    def encode_batch_hybrid(self, texts: List[str]) -> Tuple[np.ndarray, List[SparseVector]]:
+        if not texts:
+            return np.zeros((0, 1024), dtype=np.float32), []
+        return self._call("encode", list(texts))
+
+    def encode_colbert(self, texts: List[str]) -> List[np.ndarray]:
+        if not texts:
+            return []
+        return self._call("colbert", list(texts))
+
+    def cache_stats(self) -> Optional[Dict]:
+        return self._call("stats", None)
+
+    def _call(self, op: str, payload):
+        """Send a request, reconnecting once if the connection was lost"""
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.send((op, payload))
+                status, result = connection.recv()
+            except (EOFError, OSError):
+                self._local.connection = None
+                if attempt:
+                    raise
+                continue
+            if status == "error":
+                raise RuntimeError(f"Inference server error: {result}")
+            return result
+
+    def _connection(self) -> Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+        return connection
+
+    def _connect(self) -> Connection:
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                return Client(self.address, authkey=self.authkey)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.5)
+
+
+def run_inference_server(address: str, authkey: bytes):
+    """Process entry point"""
+    InferenceServer(address, authkey).serve_forever()
+
+
+def start_inference_process(address: str) -> BaseProcess:
+    """
+    Start the inference server in a separate process and point workers at it
+
+    RAG_INFERENCE_ADDRESS / RAG_INFERENCE_AUTHKEY are exported so that HTTP
+    worker processes started afterwards use RemoteEmbeddingService.
+
+    Args:
+        address: Unix socket path to serve on
+    """
+    authkey = settings.inference_authkey or secrets.token_hex(16)
+    process = get_context("spawn").Process(
+        target=run_inference_server,
+        args=(address, authkey.encode()),
+        name="rag-inference"
+    )
+    process.start()
+    os.environ["RAG_INFERENCE_ADDRESS"] = address
+    os.environ["RAG_INFERENCE_AUTHKEY"] = authkey
+    return process
+
+
+if __name__ == "__main__":
+    # Standalone mode: run the model process under its own supervisor
+    if not settings.inference_authkey:
+        raise SystemExit("❌ Set RAG_INFERENCE_AUTHKEY to run the inference server standalone")
+    run_inference_server(
+        settings.inference_address or settings.inference_socket,
+        settings.inference_authkey.encode()
+    )
@@ -0,0 +1,654 @@
+"""
+Local In-Process Vector Store
+Memory-mapped float16 dense matrix + inverted index for sparse lexical weights,
+persisted to a directory. Meant for dev boxes, CI and small single-node tenants.
+"""
+
+import json
+import os
+from array import array
+from pathlib import Path
+from threading import RLock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from flush_scheduler import FlushScheduler
+from sparse_vector import SparseVector
+from vector_store import VectorStore
+
+
+# Dense and sparse files are written under new generation names and only
+# become current when meta.json (replaced atomically) names them, so a crash
+# at any point leaves a meta.json that matches the files it references
+DENSE_FILE = "dense.{generation}.f16"
+SPARSE_FILE = "sparse.{generation}.npz"
+META_FILE = "meta.json"
+# File names of stores written before generations
+LEGACY_DENSE_FILE = "dense.f16"
+LEGACY_SPARSE_FILE = "sparse.npz"
+
+# Rows converted to float32 at once during dense scoring
+SCORE_BLOCK_ROWS = 65536
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Single-process vector store with the same interface as MilvusService
+
+    - Dense vectors live in a memory-mapped float16 matrix; search is a
+      blocked inner product followed by argpartition top-k.
+    - Sparse vectors are kept per row and in an inverted index
+      (token id -> row ids, weights) for term-at-a-time scoring.
+    - Deletes are tombstones; the store is compacted on flush once the
+      share of deleted rows exceeds compact_ratio.
+    - meta.json is the commit point: it names the dense and sparse files
+      the row ids refer to; replaced files are removed after it is written.
+    """
+
+    # Scalar columns stored next to the vectors
+    SCALAR_FIELDS = [
+        "document_id", "text", "chunk_hash", "chunk_index", "total_chunks",
+        "room_id", "user_id", "doc_type", "metadata"
+    ]
+
+    # Fields returned with search hits
+    SEARCH_OUTPUT_FIELDS = ["document_id", "text", "chunk_index", "total_chunks", "metadata"]
+
+    def __init__(
+        self,
+        path: str = "./local_store",
+        dim: int = 1024,
+        initial_capacity: int = 1024,
+        flush_interval_seconds: float = 30.0,
+        flush_max_pending: int = 10000,
+        compact_ratio: float = 0.25
+    ):
+        """
+        Initialize the store (data is loaded by create_collection)
+
+        Args:
+            path: Data directory
+            dim: Dense vector dimension
+            initial_capacity: Initial number of rows in the dense matrix
+            flush_interval_seconds: Persist unflushed writes at least this often
+            flush_max_pending: Persist as soon as this many rows are unflushed
+            compact_ratio: Compact on flush when deleted rows exceed this share
+        """
+        self.path = Path(path)
+        self.dim = dim
+        self.initial_capacity = initial_capacity
+        self.compact_ratio = compact_ratio
+        self.collection_name = "local"
+
+        self._lock = RLock()
+        self._dense: Optional[np.memmap] = None
+        self._generation = 0  # last generation used for a data file name
+        self._dense_file = ""
+        self._sparse_file = ""
+        self._stale_files: List[str] = []  # replaced files, removed after the next meta write
+        self._reset_state(capacity=0)
+
+        self.flush_scheduler = FlushScheduler(
+            self._persist,
+            interval_seconds=flush_interval_seconds,
+            max_pending=flush_max_pending,
+            name="local_store"
+        )
+
+    # ------------------------------------------------------------------
+    # Collection lifecycle
+    # ------------------------------------------------------------------
+
+    def create_collection(self, drop_existing: bool = False):
+        """
+        Open the store directory, creating an empty store if needed
+
+        Args:
+            drop_existing: If True, delete existing data first
+        """
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+            if drop_existing:
+                (self.path / META_FILE).unlink(missing_ok=True)
+                self._remove_unreferenced_files()
+                print(f"🗑️ Dropped local vector store at {self.path}")
+
+            if (self.path / META_FILE).exists():
+                self._load()
+                print(f"✅ Loaded local vector store: {self._size - self._num_deleted} chunks")
+            else:
+                self._reset_state(capacity=self.initial_capacity)
+                self._dense_file = self._next_file(DENSE_FILE)
+                self._dense = np.memmap(
+                    self.path / self._dense_file, dtype=np.float16, mode="w+",
+                    shape=(self._capacity, self.dim)
+                )
+                self._persist()
+                print(f"✅ Created local vector store at {self.path}")
+
+    def _reset_state(self, capacity: int):
+        """Empty in-memory state"""
+        self._capacity = capacity
+        self._size = 0
+        self._num_deleted = 0
+        self._next_id = 1
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._fields: Dict[str, List] = {name: [] for name in self.SCALAR_FIELDS}
+        self._sparse_rows: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._postings: Dict[int, Tuple[array, array]] = {}
+        self._doc_rows: Dict[str, List[int]] = {}
+        self._row_by_id: Dict[int, int] = {}
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def insert_documents(self, chunks: List[Dict], flush: bool = False) -> List[int]:
+        """
+        Insert document chunks with embeddings
+
+        Args:
+            chunks: List of dicts with the scalar fields, 'dense_vector' and 'sparse_vector'
+            flush: Persist to disk immediately after inserting
+
+        Returns:
+            Primary keys of the inserted chunks
+        """
+        if not chunks:
+            return []
+
+        with self._lock:
+            n = len(chunks)
+            self._ensure_capacity(n)
+            start = self._size
+
+            self._dense[start:start + n] = np.asarray(
+                [chunk["dense_vector"] for chunk in chunks], dtype=np.float16
+            )
+
+            for offset, chunk in enumerate(chunks):
+                row = start + offset
+                pk = self._next_id
+                self._next_id += 1
+
+                self._ids[row] = pk
+                self._alive[row] = True
+                self._row_by_id[pk] = row
+                for name in self.SCALAR_FIELDS:
+                    self._fields[name].append(chunk.get(name))
+                self._doc_rows.setdefault(chunk["document_id"], []).append(row)
+
+                sparse = chunk["sparse_vector"]
+                self._add_sparse_row(row, sparse.indices, sparse.values)
+
+            self._size += n
+            ids = self._ids[start:start + n].tolist()
+
+        self.flush_scheduler.record(n)
+        if flush:
+            self.flush()
+        print(f"✅ Inserted {n} chunks into local vector store")
+        return ids
+
+    def get_chunk_hashes(self, document_id: str) -> List[Dict]:
+        """Primary keys, content hashes, positions and metadata of a document's chunks"""
+        with self._lock:
+            return [
+                {
+                    "id": int(self._ids[row]),
+                    **{
+                        name: self._fields[name][row]
+                        for name in ("chunk_hash", "chunk_index", "total_chunks", "metadata")
+                    }
+                }
+                for row in self._doc_rows.get(document_id, [])
+            ]
+
+    def get_document_chunks(
+        self,
+        document_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Dict:
+        """Page of a document's chunks ordered by chunk_index"""
+        with self._lock:
+            rows = self._ordered_doc_rows(document_id)
+            end = offset + limit if limit is not None else None
+            return {
+                "total": len(rows),
+                "chunks": [self._chunk_at(row) for row in rows[offset:end]]
+            }
+
+    def iter_document_chunks(self, document_id: str, batch_size: int = 1000) -> Iterator[Dict]:
+        """Iterate over all chunks of a document, batch_size rows per lock hold"""
+        offset = 0
+        while True:
+            page = self.get_document_chunks(document_id, offset=offset, limit=batch_size)
+            yield from page["chunks"]
+            offset += batch_size
+            if offset >= page["total"]:
+                break
+
+    def _ordered_doc_rows(self, document_id: str) -> List[int]:
+        """Rows of a document sorted by chunk_index (caller holds the lock)"""
+        chunk_index = self._fields["chunk_index"]
+        return sorted(
+            self._doc_rows.get(document_id, []),
+            key=lambda row: (chunk_index[row] if chunk_index[row] is not None else -1, row)
+        )
+
+    def _chunk_at(self, row: int) -> Dict:
+        """Stored chunk fields of a row (caller holds the lock)"""
+        return {
+            "id": int(self._ids[row]),
+            **{name: self._fields[name][row] for name in self.SCALAR_FIELDS}
+        }
+
+    def update_chunk_fields(self, updates: List[Dict], flush: bool = False):
+        """Rewrite scalar fields of stored chunks in place (vectors are kept)"""
+        if not updates:
+            return
+        updated = 0
+        with self._lock:
+            for update in updates:
+                row = self._row_by_id.get(update["id"])
+                if row is None:
+                    continue
+                for name, value in update.items():
+                    if name in self.SCALAR_FIELDS and name not in ("document_id", "chunk_hash"):
+                        self._fields[name][row] = value
+                updated += 1
+        self.flush_scheduler.record(updated)
+        if flush:
+            self.flush()
+        print(f"✅ Updated {updated} chunks in local vector store")
+
+    def delete_by_ids(self, ids: List[int], flush: bool = False):
+        """Delete chunks by primary key"""
+        if not ids:
+            return
+        with self._lock:
+            deleted = self._delete_rows([self._row_by_id[pk] for pk in ids if pk in self._row_by_id])
+        self.flush_scheduler.record(deleted)
+        if flush:
+            self.flush()
+        print(f"✅ Deleted {deleted} chunks from local vector store")
+
+    def delete_by_document_id(self, document_id: str) -> bool:
+        """Delete all chunks belonging to a document"""
+        try:
+            with self._lock:
+                deleted = self._delete_rows(list(self._doc_rows.get(document_id, [])))
+            self.flush_scheduler.record(max(deleted, 1))
+            print(f"✅ Deleted document: {document_id}")
+            return True
+        except Exception as e:
+            print(f"❌ Failed to delete document {document_id}: {e}")
+            return False
+
+    def _delete_rows(self, rows: List[int]) -> int:
+        """Tombstone rows (caller holds the lock)"""
+        deleted = 0
+        for row in rows:
+            if not self._alive[row]:
+                continue
+            self._alive[row] = False
+            self._num_deleted += 1
+            deleted += 1
+            self._row_by_id.pop(int(self._ids[row]), None)
+            document_rows = self._doc_rows.get(self._fields["document_id"][row])
+            if document_rows is not None:
+                document_rows.remove(row)
+                if not document_rows:
+                    del self._doc_rows[self._fields["document_id"][row]]
+        return deleted
+
+    def flush(self):
+        """Persist outstanding writes now"""
+        self.flush_scheduler.flush()
+
+    def close(self):
+        """Persist outstanding writes and stop the flush scheduler"""
+        self.flush_scheduler.close()
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def convert_sparse_vector(self, sparse: SparseVector) -> SparseVector:
+        """Rows keep the array form (int64 ids, float32 weights, as on disk)"""
+        return SparseVector(
+            np.asarray(sparse.indices, dtype=np.int64),
+            np.asarray(sparse.values, dtype=np.float32)
+        )
+
+    def dense_search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = 5,
+        document_id_filter: Optional[str] = None,
+        consistency_level: Optional[str] = None,
+        filters: Optional[Dict] = None,
+        dense_params: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Inner-product search over the float16 matrix
+
+        consistency_level and dense_params are accepted for interface
+        compatibility; local writes are always visible to subsequent searches
+        and the search is exact.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        with self._lock:
+            rows = self._candidate_rows(self.merge_filters(filters, document_id_filter))
+            if rows is None:
+                scores = np.empty(self._size, dtype=np.float32)
+                for start in range(0, self._size, SCORE_BLOCK_ROWS):
+                    end = min(start + SCORE_BLOCK_ROWS, self._size)
+                    scores[start:end] = self._dense[start:end].astype(np.float32) @ query
+                rows = np.flatnonzero(self._alive[:self._size])
+                scores = scores[rows]
+            else:
+                scores = self._dense[rows].astype(np.float32) @ query
+            return self._top_k(rows, scores, top_k)
+
+    def sparse_search(
+        self,
+        query_sparse: SparseVector,
+        top_k: int = 5,
+        document_id_filter: Optional[str] = None,
+        consistency_level: Optional[str] = None,
+        filters: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Term-at-a-time inner product over the inverted index"""
+        with self._lock:
+            scores = np.zeros(self._size, dtype=np.float32)
+            for token, weight in zip(query_sparse.indices.tolist(), query_sparse.values.tolist()):
+                posting = self._postings.get(token)
+                if posting is None:
+                    continue
+                posting_rows = np.frombuffer(posting[0], dtype=np.int64)
+                posting_weights = np.frombuffer(posting[1], dtype=np.float32)
+                # A row appears at most once per token, so fancy-index += is safe
+                scores[posting_rows] += float(weight) * posting_weights
+
+            rows = self._candidate_rows(self.merge_filters(filters, document_id_filter))
+            if rows is None:
+                rows = np.flatnonzero(self._alive[:self._size] & (scores > 0))
+            else:
+                rows = rows[scores[rows] > 0]
+            return self._top_k(rows, scores[rows], top_k)
+
+    def hybrid_search(
+        self,
+        query_dense: np.ndarray,
+        query_sparse: SparseVector,
+        top_k: int = 5,
+        dense_weight: float = 0.5,
+        sparse_weight: float = 0.5,
+        consistency_level: Optional[str] = None,
+        engine: str = "native",
+        fusion: str = "rrf",
+        candidate_multiplier: int = 3,
+        filters: Optional[Dict] = None,
+        dense_params: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Dense + sparse search fused with weighted RRF
+        (engine and fusion are Milvus options and are ignored here)
+        """
+        dense_results = self.dense_search(query_dense, top_k * candidate_multiplier, filters=filters)
+        sparse_results = self.sparse_search(query_sparse, top_k * candidate_multiplier, filters=filters)
+        fused_results = self._reciprocal_rank_fusion(
+            dense_results,
+            sparse_results,
+            dense_weight,
+            sparse_weight,
+            k=self.RRF_K
+        )
+        return fused_results[:top_k]
+
+    def _candidate_rows(self, filters: Dict) -> Optional[np.ndarray]:
+        """Live rows matching the filters, or None when there are no filters"""
+        if not filters:
+            return None
+
+        document_ids = filters.get("document_id")
+        if document_ids is None:
+            rows = np.flatnonzero(self._alive[:self._size])
+        else:
+            if not isinstance(document_ids, (list, tuple)):
+                document_ids = [document_ids]
+            rows = np.asarray(
+                sorted(row for doc in document_ids for row in self._doc_rows.get(doc, [])),
+                dtype=np.int64
+            )
+
+        for field, value in filters.items():
+            if field == "document_id":
+                continue
+            if field == "metadata":
+                rows = np.asarray([
+                    row for row in rows.tolist()
+                    if all((self._fields["metadata"][row] or {}).get(k) == v for k, v in value.items())
+                ], dtype=np.int64)
+            elif field in self.FILTER_FIELDS:
+                allowed = set(value) if isinstance(value, (list, tuple)) else {value}
+                column = self._fields[field]
+                rows = np.asarray([row for row in rows.tolist() if column[row] in allowed], dtype=np.int64)
+            else:
+                raise ValueError(f"Invalid filter field: {field}")
+        return rows
+
+    def _top_k(self, rows: np.ndarray, scores: np.ndarray, top_k: int) -> List[Dict]:
+        """Select and format the best rows"""
+        if len(rows) == 0:
+            return []
+        if top_k < len(rows):
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            best = np.arange(len(rows))
+        best = best[np.argsort(-scores[best], kind="stable")]
+
+        return [
+            {
+                "id": int(self._ids[rows[i]]),
+                **{name: self._fields[name][rows[i]] for name in self.SEARCH_OUTPUT_FIELDS},
+                "score": float(scores[i])
+            }
+            for i in best
+        ]
+
+    # ------------------------------------------------------------------
+    # Storage internals (caller holds the lock)
+    # ------------------------------------------------------------------
+
+    def _add_sparse_row(self, row: int, indices: np.ndarray, values: np.ndarray):
+        """Store a row's sparse vector and add it to the inverted index"""
+        self._sparse_rows.append((indices, values))
+        for token, weight in zip(indices.tolist(), values.tolist()):
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = (array("q"), array("f"))
+                self._postings[token] = posting
+            posting[0].append(row)
+            posting[1].append(weight)
+
+    def _ensure_capacity(self, extra: int):
+        """Grow the dense matrix (doubling) so that extra rows fit"""
+        needed = self._size + extra
+        if needed <= self._capacity:
+            return
+
+        new_capacity = max(needed, self._capacity * 2, self.initial_capacity)
+        self._remap_dense(np.arange(self._size), new_capacity)
+
+        grow = new_capacity - self._capacity
+        self._ids = np.concatenate([self._ids, np.zeros(grow, dtype=np.int64)])
+        self._alive = np.concatenate([self._alive, np.zeros(grow, dtype=bool)])
+        self._capacity = new_capacity
+
+    def _remap_dense(self, keep_rows: np.ndarray, capacity: int):
+        """
+        Write keep_rows packed at the top of a new dense file
+
+        The current file stays untouched (meta.json still refers to it) and
+        is removed once the next persist commits the new one.
+        """
+        dense_file = self._next_file(DENSE_FILE)
+        new_dense = np.memmap(self.path / dense_file, dtype=np.float16, mode="w+", shape=(capacity, self.dim))
+        for start in range(0, len(keep_rows), SCORE_BLOCK_ROWS):
+            block = keep_rows[start:start + SCORE_BLOCK_ROWS]
+            new_dense[start:start + len(block)] = self._dense[block]
+
+        self._dense = new_dense
+        self._stale_files.append(self._dense_file)
+        self._dense_file = dense_file
+
+    def _next_file(self, pattern: str) -> str:
+        """Name of a new data file"""
+        self._generation += 1
+        return pattern.format(generation=self._generation)
+
+    def _remove_unreferenced_files(self):
+        """Delete data files that meta.json does not name (replaced or left by a crash)"""
+        current = {self._dense_file, self._sparse_file}
+        for pattern in ("dense*.f16", "sparse*.npz", "*.tmp"):
+            for file in self.path.glob(pattern):
+                if file.name not in current:
+                    file.unlink(missing_ok=True)
+        self._stale_files = []
+
+    def _compact(self):
+        """Drop tombstoned rows and rebuild the indexes"""
+        keep = np.flatnonzero(self._alive[:self._size])
+        print(f"🧹 Compacting local vector store: {self._num_deleted} deleted rows")
+
+        fields = {name: [values[row] for row in keep] for name, values in self._fields.items()}
+        sparse_rows = [self._sparse_rows[row] for row in keep]
+        ids = self._ids[keep]
+        capacity = max(self.initial_capacity, len(keep) * 2)
+
+        self._remap_dense(keep, capacity)
+        next_id = self._next_id
+        self._reset_state(capacity)
+        self._next_id = next_id
+        self._restore_rows(ids, fields, sparse_rows)
+
+    def _restore_rows(
+        self,
+        ids: np.ndarray,
+        fields: Dict[str, List],
+        sparse_rows: List[Tuple[np.ndarray, np.ndarray]],
+        alive: Optional[np.ndarray] = None
+    ):
+        """Rebuild row metadata and indexes from packed columns"""
+        n = len(ids)
+        self._size = n
+        self._ids[:n] = ids
+        self._alive[:n] = True if alive is None else alive
+        self._fields = fields
+        for name in self.SCALAR_FIELDS:
+            self._fields.setdefault(name, [None] * n)
+
+        for row in range(n):
+            self._add_sparse_row(row, *sparse_rows[row])
+            if not self._alive[row]:
+                self._num_deleted += 1
+                continue
+            self._row_by_id[int(ids[row])] = row
+            self._doc_rows.setdefault(self._fields["document_id"][row], []).append(row)
+
+    def _persist(self):
+        """Write the store to disk (dense matrix, sparse vectors, metadata)"""
+        with self._lock:
+            if self._size and self._num_deleted / self._size > self.compact_ratio:
+                self._compact()
+
+            self._dense.flush()
+
+            lengths = np.fromiter((len(idx) for idx, _ in self._sparse_rows), dtype=np.int64, count=self._size)
+            indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+            indices = np.concatenate([idx for idx, _ in self._sparse_rows]) if self._size else np.zeros(0, np.int64)
+            values = np.concatenate([val for _, val in self._sparse_rows]) if self._size else np.zeros(0, np.float32)
+
+            sparse_file = self._next_file(SPARSE_FILE)
+            with open(self.path / sparse_file, "wb") as f:
+                np.savez(f, indptr=indptr, indices=indices, values=values)
+                f.flush()
+                os.fsync(f.fileno())
+
+            meta = {
+                "dim": self.dim,
+                "capacity": self._capacity,
+                "size": self._size,
+                "next_id": self._next_id,
+                "generation": self._generation,
+                "dense_file": self._dense_file,
+                "sparse_file": sparse_file,
+                "ids": self._ids[:self._size].tolist(),
+                "alive": self._alive[:self._size].tolist(),
+                "fields": self._fields
+            }
+            meta_tmp = self.path / (META_FILE + ".tmp")
+            with open(meta_tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(meta_tmp, self.path / META_FILE)
+
+            # Committed: the previous sparse file and replaced dense files are garbage
+            self._stale_files.append(self._sparse_file)
+            self._sparse_file = sparse_file
+            for name in self._stale_files:
+                if name:
+                    (self.path / name).unlink(missing_ok=True)
+            self._stale_files = []
+
+    def _load(self):
+        """Load a persisted store"""
+        with open(self.path / META_FILE, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["dim"] != self.dim:
+            raise ValueError(f"Local store dim {meta['dim']} does not match model dim {self.dim}")
+
+        self._reset_state(capacity=meta["capacity"])
+        self._next_id = meta["next_id"]
+        self._generation = meta.get("generation", 0)
+        self._dense_file = meta.get("dense_file", LEGACY_DENSE_FILE)
+        self._sparse_file = meta.get("sparse_file", LEGACY_SPARSE_FILE)
+        self._remove_unreferenced_files()
+        self._dense = np.memmap(
+            self.path / self._dense_file, dtype=np.float16, mode="r+",
+            shape=(self._capacity, self.dim)
+        )
+
+        with np.load(self.path / self._sparse_file) as sparse:
+            indptr, indices, values = sparse["indptr"], sparse["indices"], sparse["values"]
+        sparse_rows = [
+            (indices[indptr[row]:indptr[row + 1]], values[indptr[row]:indptr[row + 1]])
+            for row in range(meta["size"])
+        ]
+
+        self._restore_rows(
+            np.asarray(meta["ids"], dtype=np.int64),
+            meta["fields"],
+            sparse_rows,
+            alive=np.asarray(meta["alive"], dtype=bool)
+        )
+
+    def get_collection_stats(self) -> Dict:
+        """Get store statistics"""
+        with self._lock:
+            return {
+                "name": self.collection_name,
+                "backend": "local",
+                "path": str(self.path),
+                "num_entities": self._size - self._num_deleted,
+                "deleted_rows": self._num_deleted,
+                "capacity": self._capacity,
+                "flush": self.flush_scheduler.stats()
+            }
@@ -3,30 +3,33 @@ RAG Microservice - Main Application
 Standalone FastAPI service for hybrid RAG search
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
 
-from embedding_service import EmbeddingService
-from routes import router
+import codec
+from config import settings
+from routes import readiness, router, shutdown_workers, start_background_startup
+from executor_service import BackpressureError
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Lifespan event handler
-    Loads the embedding model on startup and keeps it in memory
+    Starts loading the embedding model in the background and keeps it in memory
     """
-    # Startup: Load embedding model ONCE
     print("=" * 60)
     print("🚀 RAG Microservice Starting...")
     print("=" * 60)
     
-    # Initialize embedding service (singleton - loads model once)
-    embedding_service = EmbeddingService()
+    # Load the model (singleton - loaded once; in multi-worker mode connect to
+    # the shared inference process) and the vector store without blocking:
+    # /health answers right away, /ready once loading is done
+    start_background_startup()
     
     print("=" * 60)
-    print("✅ RAG Microservice Ready!")
-    print("   - Model: BAAI/bge-m3")
+    print("✅ RAG Microservice accepting connections (model loading in background)")
     print("   - Port: 8001")
     print("   - Endpoints: /api/rag/...")
     print("=" * 60)
@@ -35,6 +38,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("🔻 RAG Microservice shutting down...")
+    await shutdown_workers()
 
 
 # Create FastAPI app
@@ -42,13 +46,25 @@ app = FastAPI(
     title="RAG Microservice",
     description="Hybrid search RAG system with BAAI/bge-m3 embeddings",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson for every JSON response when installed (poetry install -E wire)
+    default_response_class=ORJSONResponse if codec.orjson is not None else JSONResponse
 )
 
 # Include routes
 app.include_router(router, prefix="/api/rag", tags=["RAG"])
 
 
+@app.exception_handler(BackpressureError)
+async def backpressure_handler(request: Request, exc: BackpressureError):
+    """Overloaded executor pools: 429 when queues are full, 503 when unavailable"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 @app.get("/")
 def root():
     """Root endpoint"""
@@ -62,16 +78,41 @@ def root():
 
 @app.get("/health")
 def health():
-    """Simple health check"""
+    """Liveness check (does not wait for the model; 503 once startup failed for good)"""
+    if readiness.is_failed:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "failed", "error": readiness.error, "service": "rag-microservice"}
+        )
     return {
         "status": "healthy",
         "service": "rag-microservice"
     }
 
 
+@app.get("/ready")
+def ready():
+    """Readiness check: 200 once the model and vector store are loaded, 503 before"""
+    startup = readiness.status()
+    return JSONResponse(
+        status_code=200 if readiness.is_ready else 503,
+        content={**startup, "service": "rag-microservice"}
+    )
+
+
 if __name__ == "__main__":
     from granian import Granian
     
+    # Multi-worker mode: one inference process holds the model,
+    # HTTP workers reach it over a unix socket
+    inference_process = None
+    if settings.workers > 1 and settings.vector_store_backend == "local":
+        # Each worker would load its own copy of the store and overwrite the others' files
+        raise SystemExit("❌ RAG_VECTOR_STORE=local needs RAG_WORKERS=1 (use milvus for several workers)")
+    if settings.workers > 1 and not settings.inference_address:
+        from inference_server import start_inference_process
+        inference_process = start_inference_process(settings.inference_socket)
+    
     # Run the service using Granian
     # reload=False ensures model stays loaded during development
     server = Granian(
@@ -79,7 +120,13 @@ if __name__ == "__main__":
         address="0.0.0.0",
         port=8001,
         interface="asgi",
+        workers=settings.workers,
         reload=False,  # IMPORTANT: No reload to keep model in memory
         log_level="info"
     )
-    server.serve()
+    try:
+        server.serve()
+    finally:
+        if inference_process is not None:
+            inference_process.terminate()
+            inference_process.join()
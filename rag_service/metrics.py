@@ -0,0 +1,140 @@
+"""
+Lightweight In-Process Metrics
+Thread-safe counters and histograms exposed via /api/rag/metrics
+"""
+
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, List, Sequence
+
+
+class Counter:
+    """Monotonically increasing counter"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._value = 0
+        self._lock = Lock()
+
+    def inc(self, amount: int = 1):
+        """Increase the counter by amount"""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> Dict:
+        return {"type": "counter", "value": self._value}
+
+
+class Gauge:
+    """Value that can go up and down (e.g. queue depth)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._value = 0
+        self._lock = Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: int = 1):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: int):
+        with self._lock:
+            self._value = value
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> Dict:
+        return {"type": "gauge", "value": self._value}
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram
+    Each bucket counts observations less than or equal to its upper bound
+    """
+
+    def __init__(self, name: str, buckets: Sequence[float]):
+        self.name = name
+        self.buckets: List[float] = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = Lock()
+
+    def observe(self, value: float):
+        """Record a single observation"""
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        # Cumulative buckets, Prometheus-style
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = count
+
+        return {
+            "type": "histogram",
+            "count": count,
+            "sum": total,
+            "avg": total / count if count else 0.0,
+            "buckets": cumulative
+        }
+
+
+class MetricsRegistry:
+    """Registry of named metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = Lock()
+
+    def counter(self, name: str) -> Counter:
+        """Get or create a counter"""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name)
+            return self._metrics[name]
+
+    def gauge(self, name: str) -> Gauge:
+        """Get or create a gauge"""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Gauge(name)
+            return self._metrics[name]
+
+    def histogram(self, name: str, buckets: Sequence[float]) -> Histogram:
+        """Get or create a histogram"""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, buckets)
+            return self._metrics[name]
+
+    def snapshot(self) -> Dict:
+        """Return a JSON-serializable view of all metrics"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {name: metric.snapshot() for name, metric in sorted(metrics.items())}
+
+
+# Global registry shared by all services
+registry = MetricsRegistry()
@@ -3,8 +3,12 @@ Milvus Hybrid Search Service
 Manages Milvus collection with dense and sparse vectors
 """
 
-from typing import List, Dict, Optional
+import re
+from typing import Any, Iterator, List, Dict, Optional
 from pymilvus import (
+    AnnSearchRequest,
+    RRFRanker,
+    WeightedRanker,
     connections,
     Collection,
     CollectionSchema,
@@ -14,18 +18,93 @@ from pymilvus import (
 )
 import numpy as np
 
+from flush_scheduler import FlushScheduler
+from sparse_vector import SparseVector
+from vector_store import DenseIndexConfig, VectorStore
 
-class MilvusService:
+
+class MilvusService(VectorStore):
     """
     Service for managing Milvus vector database with hybrid search
     Supports both dense (HNSW) and sparse (Inverted Index) vector searches
     """
     
+    # Insert columns, in schema order (the primary key is auto-generated)
+    INSERT_FIELDS = [
+        "document_id", "text", "chunk_hash", "chunk_index", "total_chunks",
+        "room_id", "user_id", "doc_type", "metadata",
+        "dense_vector", "sparse_vector"
+    ]
+    
+    # Scalar field indexes (field -> index type)
+    SCALAR_INDEXES = {
+        "document_id": "INVERTED",
+        "room_id": "INVERTED",
+        "user_id": "INVERTED",
+        "doc_type": "INVERTED",
+        "chunk_index": "STL_SORT"
+    }
+    
+    # Fields returned when fetching stored chunks
+    CHUNK_OUTPUT_FIELDS = [
+        "id", "document_id", "text", "chunk_hash", "chunk_index", "total_chunks",
+        "room_id", "user_id", "doc_type", "metadata"
+    ]
+    
+    # Fields returned with search hits
+    SEARCH_OUTPUT_FIELDS = ["document_id", "text", "chunk_index", "total_chunks", "metadata"]
+    
+    # Tenant field: Milvus hashes it into num_partitions partitions and prunes
+    # partitions for searches filtered on it
+    PARTITION_KEY_FIELD = "room_id"
+    
+    # Allowed JSON keys in metadata filters (keys are inlined into the expression)
+    METADATA_KEY_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+    
+    # Page size for query iterators and `id in [...]` lookups
+    QUERY_BATCH_SIZE = 1000
+    
+    SPARSE_SEARCH_PARAMS = {"metric_type": "IP", "params": {}}
+    
+    DENSE_DIM = 1024
+    
+    # Dense storage types: float32, float16 (half the memory) or sign bits (1/32)
+    DENSE_VECTOR_TYPES = {
+        "float": DataType.FLOAT_VECTOR,
+        "float16": DataType.FLOAT16_VECTOR,
+        "binary": DataType.BINARY_VECTOR
+    }
+    
+    # Dense index types -> the search parameter that trades recall for latency
+    DENSE_INDEX_SEARCH_PARAM = {
+        "HNSW": "ef",
+        "IVF_FLAT": "nprobe",
+        "IVF_SQ8": "nprobe",
+        "IVF_PQ": "nprobe",
+        "DISKANN": "search_list",
+        "FLAT": None,
+        "BIN_FLAT": None,
+        "BIN_IVF_FLAT": "nprobe"
+    }
+    BINARY_INDEX_TYPES = {"BIN_FLAT", "BIN_IVF_FLAT"}
+    # Indexes that score with compressed vectors; re-ranking uses the raw field
+    LOSSY_INDEX_TYPES = {"IVF_SQ8", "IVF_PQ"}
+    
+    # Binary collections keep a float16 copy for re-ranking; DiskANN keeps it
+    # on disk instead of in query node memory (Milvus requires an index on
+    # every vector field before loading)
+    RERANK_VECTOR_FIELD = "dense_rerank_vector"
+    RERANK_INDEX_PARAMS = {"index_type": "DISKANN", "metric_type": "IP", "params": {}}
+    
     def __init__(
         self,
         host: str = "localhost",
         port: int = 19530,
-        collection_name: str = "rag_documents"
+        collection_name: str = "rag_documents",
+        flush_interval_seconds: float = 30.0,
+        flush_max_pending: int = 10000,
+        num_partitions: int = 64,
+        dense_index: Optional[DenseIndexConfig] = None
     ):
         """
         Initialize Milvus connection
@@ -34,12 +113,34 @@ class MilvusService:
             host: Milvus server host
             port: Milvus server port
             collection_name: Name of the collection to use
+            flush_interval_seconds: Flush unflushed writes at least this often
+            flush_max_pending: Flush as soon as this many rows are unflushed
+            num_partitions: Partitions behind the room_id partition key (new collections only)
+            dense_index: Dense vector type and index (new collections only) and
+                search defaults
         """
         self.host = host
         self.port = port
         self.collection_name = collection_name
+        self.num_partitions = num_partitions
+        self.dense_index = dense_index or DenseIndexConfig()
         self.collection: Optional[Collection] = None
         
+        # Actual dense layout, read from the collection (see _inspect_dense)
+        self.dense_vector_type = self.dense_index.vector_type
+        self.dense_index_type = self.dense_index.index_type
+        self.dense_metric = "IP"
+        self.insert_fields = list(self.INSERT_FIELDS)
+        
+        # Writes land in Milvus growing segments; sealing them with flush()
+        # is batched by the scheduler instead of done on every request
+        self.flush_scheduler = FlushScheduler(
+            self._flush_collection,
+            interval_seconds=flush_interval_seconds,
+            max_pending=flush_max_pending,
+            name="milvus"
+        )
+        
         # Connect to Milvus
         self._connect()
     
@@ -72,49 +173,159 @@ class MilvusService:
         if utility.has_collection(self.collection_name):
             self.collection = Collection(self.collection_name)
             print(f"✅ Using existing collection: {self.collection_name}")
+            self._check_schema()
+            self._create_scalar_indexes()
+            self._inspect_dense()
             return
         
+        self._validate_dense_index()
+        vector_type = self.dense_index.vector_type
+        
         # Define schema
         fields = [
             FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
             FieldSchema(name="document_id", dtype=DataType.VARCHAR, max_length=255),
             FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=65535),
-            FieldSchema(name="dense_vector", dtype=DataType.FLOAT_VECTOR, dim=1024),
+            FieldSchema(name="chunk_hash", dtype=DataType.VARCHAR, max_length=64),
+            FieldSchema(name="chunk_index", dtype=DataType.INT64),
+            FieldSchema(name="total_chunks", dtype=DataType.INT64),
+            FieldSchema(
+                name="room_id",
+                dtype=DataType.VARCHAR,
+                max_length=64,
+                is_partition_key=True
+            ),
+            FieldSchema(name="user_id", dtype=DataType.VARCHAR, max_length=64),
+            FieldSchema(name="doc_type", dtype=DataType.VARCHAR, max_length=64),
+            FieldSchema(name="metadata", dtype=DataType.JSON),
+            FieldSchema(
+                name="dense_vector",
+                dtype=self.DENSE_VECTOR_TYPES[vector_type],
+                dim=self.DENSE_DIM
+            ),
             FieldSchema(name="sparse_vector", dtype=DataType.SPARSE_FLOAT_VECTOR)
         ]
+        if vector_type == "binary" and self.dense_index.rerank:
+            fields.append(
+                FieldSchema(name=self.RERANK_VECTOR_FIELD, dtype=DataType.FLOAT16_VECTOR, dim=self.DENSE_DIM)
+            )
         
         schema = CollectionSchema(
             fields=fields,
             description="RAG documents with hybrid search support"
         )
         
-        # Create collection
+        # Create collection (rows are routed to partitions by room_id)
         self.collection = Collection(
             name=self.collection_name,
-            schema=schema
+            schema=schema,
+            num_partitions=self.num_partitions
+        )
+        print(
+            f"✅ Created collection: {self.collection_name} "
+            f"({self.num_partitions} partitions by {self.PARTITION_KEY_FIELD})"
         )
-        print(f"✅ Created collection: {self.collection_name}")
         
         # Create indexes
         self._create_indexes()
+        self._inspect_dense()
+    
+    def _validate_dense_index(self):
+        """Reject vector type / index type combinations Milvus cannot build"""
+        config = self.dense_index
+        if config.vector_type not in self.DENSE_VECTOR_TYPES:
+            raise ValueError(f"Invalid dense vector type: {config.vector_type}")
+        if config.index_type not in self.DENSE_INDEX_SEARCH_PARAM:
+            raise ValueError(f"Invalid dense index type: {config.index_type}")
+        if (config.vector_type == "binary") != (config.index_type in self.BINARY_INDEX_TYPES):
+            raise ValueError(
+                f"Index {config.index_type} does not support {config.vector_type} vectors "
+                f"(binary vectors need BIN_FLAT or BIN_IVF_FLAT)"
+            )
+        if config.index_type == "IVF_PQ" and self.DENSE_DIM % config.pq_m:
+            raise ValueError(f"pq_m={config.pq_m} must divide the dimension {self.DENSE_DIM}")
+    
+    def _inspect_dense(self):
+        """Read the dense vector type and index of the collection (it may predate the config)"""
+        fields = {field.name: field for field in self.collection.schema.fields}
+        dtypes = {dtype: name for name, dtype in self.DENSE_VECTOR_TYPES.items()}
+        self.dense_vector_type = dtypes.get(fields["dense_vector"].dtype, "float")
+        
+        self.dense_index_type, self.dense_metric = "HNSW", "IP"
+        for index in self.collection.indexes:
+            if index.field_name == "dense_vector":
+                self.dense_index_type = index.params.get("index_type", self.dense_index_type)
+                self.dense_metric = index.params.get("metric_type", self.dense_metric)
+        
+        self.insert_fields = list(self.INSERT_FIELDS)
+        if self.RERANK_VECTOR_FIELD in fields:
+            self.insert_fields.append(self.RERANK_VECTOR_FIELD)
+        
+        if (self.dense_vector_type, self.dense_index_type) != (
+            self.dense_index.vector_type, self.dense_index.index_type
+        ):
+            print(
+                f"⚠️ Collection {self.collection_name} stores {self.dense_vector_type} vectors "
+                f"under {self.dense_index_type}; configured {self.dense_index.vector_type} / "
+                f"{self.dense_index.index_type} only applies to new collections "
+                f"(convert with scripts/migrate_collection.py)"
+            )
+    
+    def _check_schema(self):
+        """Warn if an existing collection was created with an older schema"""
+        existing = {field.name for field in self.collection.schema.fields}
+        missing = [name for name in self.INSERT_FIELDS if name not in existing]
+        if missing:
+            print(
+                f"⚠️ Collection {self.collection_name} is missing fields {missing}. "
+                f"Recreate it with create_collection(drop_existing=True) and re-index."
+            )
+        if self.partition_key_field() != self.PARTITION_KEY_FIELD:
+            print(
+                f"⚠️ Collection {self.collection_name} has no {self.PARTITION_KEY_FIELD} partition key, "
+                f"room-scoped searches scan all data. Re-shard it with scripts/migrate_collection.py."
+            )
+    
+    def partition_key_field(self) -> Optional[str]:
+        """Name of the collection's partition key field, if any"""
+        for field in self.collection.schema.fields:
+            if getattr(field, "is_partition_key", False):
+                return field.name
+        return None
+    
+    def _dense_index_params(self) -> Dict:
+        """Build parameters of the configured dense index"""
+        config = self.dense_index
+        build_params = {
+            "HNSW": {"M": 16, "efConstruction": 200},
+            "IVF_FLAT": {"nlist": config.nlist},
+            "IVF_SQ8": {"nlist": config.nlist},
+            "IVF_PQ": {"nlist": config.nlist, "m": config.pq_m, "nbits": 8},
+            "BIN_IVF_FLAT": {"nlist": config.nlist}
+        }
+        return {
+            "index_type": config.index_type,
+            # Inner Product (cosine similarity for normalized vectors); Hamming
+            # distance between sign bits for binary vectors
+            "metric_type": "HAMMING" if config.vector_type == "binary" else "IP",
+            "params": build_params.get(config.index_type, {})
+        }
     
     def _create_indexes(self):
         """Create indexes for dense and sparse vectors"""
-        # Dense vector index (HNSW)
-        dense_index_params = {
-            "index_type": "HNSW",
-            "metric_type": "IP",  # Inner Product (cosine similarity for normalized vectors)
-            "params": {
-                "M": 16,
-                "efConstruction": 200
-            }
-        }
-        
+        dense_index_params = self._dense_index_params()
         self.collection.create_index(
             field_name="dense_vector",
             index_params=dense_index_params
         )
-        print("✅ Created HNSW index for dense vectors")
+        print(f"✅ Created {dense_index_params['index_type']} index for dense vectors")
+        
+        if self.RERANK_VECTOR_FIELD in {field.name for field in self.collection.schema.fields}:
+            self.collection.create_index(
+                field_name=self.RERANK_VECTOR_FIELD,
+                index_params=self.RERANK_INDEX_PARAMS
+            )
+            print("✅ Created DISKANN index for full-precision re-rank vectors")
         
         # Sparse vector index (Inverted Index)
         sparse_index_params = {
@@ -131,86 +342,402 @@ class MilvusService:
         )
         print("✅ Created SPARSE_INVERTED_INDEX for sparse vectors")
         
+        self._create_scalar_indexes()
+        
         # Load collection into memory
         self.collection.load()
         print("✅ Collection loaded into memory")
     
-    def insert_documents(self, chunks: List[Dict]):
+    def _create_scalar_indexes(self):
+        """Create missing scalar indexes (used by filters and document lookups)"""
+        existing = {field.name for field in self.collection.schema.fields}
+        for field_name, index_type in self.SCALAR_INDEXES.items():
+            index_name = f"{field_name}_idx"
+            if field_name not in existing or self.collection.has_index(index_name=index_name):
+                continue
+            self.collection.create_index(
+                field_name=field_name,
+                index_params={"index_type": index_type},
+                index_name=index_name
+            )
+            print(f"✅ Created {index_type} index for {field_name}")
+    
+    def insert_documents(self, chunks: List[Dict], flush: bool = False) -> List[int]:
         """
         Insert document chunks with embeddings
         
+        Inserted rows are searchable right away (growing segments); the
+        collection is flushed by the flush scheduler unless flush=True.
+        
         Args:
-            chunks: List of dicts with 'text', 'document_id', 'dense_vector', 'sparse_vector'
+            chunks: List of dicts with 'text', 'chunk_hash', 'document_id', 'dense_vector', 'sparse_vector'
+            flush: Flush the collection immediately after inserting
+            
+        Returns:
+            Auto-generated primary keys of the inserted chunks
         """
         if not chunks:
+            return []
+        
+        # Prepare data for insertion (column-based, in schema order)
+        data = []
+        for name in self.insert_fields:
+            if name == "dense_vector":
+                data.append([self._dense_value(chunk["dense_vector"]) for chunk in chunks])
+            elif name == self.RERANK_VECTOR_FIELD:
+                data.append([np.asarray(chunk["dense_vector"], dtype=np.float16) for chunk in chunks])
+            else:
+                data.append([chunk[name] for chunk in chunks])
+        
+        # Insert
+        result = self.collection.insert(data)
+        self.flush_scheduler.record(len(chunks))
+        if flush:
+            self.flush()
+        print(f"✅ Inserted {len(chunks)} chunks into Milvus")
+        return list(result.primary_keys)
+    
+    def get_chunk_hashes(self, document_id: str) -> List[Dict]:
+        """
+        Get primary keys and content hashes of all stored chunks of a document
+        
+        Args:
+            document_id: Document ID to look up
+            
+        Returns:
+            List of dicts with 'id', 'chunk_hash' and the chunk position and metadata
+        """
+        return self._query_all(
+            expr=self._document_expr(document_id),
+            output_fields=["id", "chunk_hash", "chunk_index", "total_chunks", "metadata"]
+        )
+    
+    def get_document_chunks(
+        self,
+        document_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Dict:
+        """
+        Fetch stored chunks of a document ordered by chunk_index
+        
+        Uses scalar queries on the document_id index instead of an ANN search,
+        so results are exact and not truncated.
+        
+        Args:
+            document_id: Document ID to fetch
+            offset: Number of chunks to skip
+            limit: Maximum number of chunks to return (None for all)
+            
+        Returns:
+            Dict with 'total' (chunks in the document) and 'chunks' (the page)
+        """
+        ids = self._document_chunk_ids(document_id)
+        end = offset + limit if limit is not None else None
+        return {
+            "total": len(ids),
+            "chunks": self._fetch_chunks(ids[offset:end])
+        }
+    
+    def iter_document_chunks(self, document_id: str, batch_size: int = 1000) -> Iterator[Dict]:
+        """
+        Iterate over all chunks of a document ordered by chunk_index,
+        fetching batch_size chunks at a time
+        """
+        ids = self._document_chunk_ids(document_id)
+        for start in range(0, len(ids), batch_size):
+            yield from self._fetch_chunks(ids[start:start + batch_size])
+    
+    def _document_chunk_ids(self, document_id: str) -> List[int]:
+        """Primary keys of a document's chunks, ordered by chunk_index"""
+        rows = self._query_all(
+            expr=self._document_expr(document_id),
+            output_fields=["id", "chunk_index"]
+        )
+        rows.sort(key=lambda row: (row["chunk_index"], row["id"]))
+        return [row["id"] for row in rows]
+    
+    def _fetch_chunks(self, ids: List[int]) -> List[Dict]:
+        """Fetch chunks by primary key, preserving the order of ids"""
+        chunks = []
+        for start in range(0, len(ids), self.QUERY_BATCH_SIZE):
+            batch = ids[start:start + self.QUERY_BATCH_SIZE]
+            rows = self.collection.query(
+                expr=f"id in {batch}",
+                output_fields=self.CHUNK_OUTPUT_FIELDS
+            )
+            by_id = {row["id"]: row for row in rows}
+            chunks.extend(by_id[pk] for pk in batch if pk in by_id)
+        return chunks
+    
+    def _query_all(self, expr: str, output_fields: List[str]) -> List[Dict]:
+        """Run a scalar query without the query result window limit"""
+        iterator = self.collection.query_iterator(
+            batch_size=self.QUERY_BATCH_SIZE,
+            expr=expr,
+            output_fields=output_fields
+        )
+        rows = []
+        try:
+            while True:
+                batch = iterator.next()
+                if not batch:
+                    break
+                rows.extend(batch)
+        finally:
+            iterator.close()
+        return rows
+    
+    @classmethod
+    def _document_expr(cls, document_id: str) -> str:
+        """Filter expression for a single document"""
+        return f"document_id == {cls._literal(document_id)}"
+    
+    @classmethod
+    def _filter_expr(cls, filters: Optional[Dict]) -> Optional[str]:
+        """
+        Build a boolean expression pushed down into the Milvus search
+        
+        Args:
+            filters: Output of VectorStore.merge_filters
+            
+        Returns:
+            Expression string, or None when there is nothing to filter on
+            
+        Raises:
+            ValueError: On unknown filter fields or invalid metadata keys
+        """
+        clauses = []
+        for field, value in (filters or {}).items():
+            if field == "metadata":
+                for key, json_value in value.items():
+                    if not cls.METADATA_KEY_PATTERN.match(key):
+                        raise ValueError(f"Invalid metadata filter key: {key}")
+                    clauses.append(cls._match_clause(f'metadata["{key}"]', json_value))
+            elif field in cls.FILTER_FIELDS:
+                clauses.append(cls._match_clause(field, value))
+            else:
+                raise ValueError(f"Invalid filter field: {field}")
+        return " and ".join(clauses) if clauses else None
+    
+    @classmethod
+    def _match_clause(cls, field: str, value: Any) -> str:
+        """field == value, or field in [...] for lists"""
+        if isinstance(value, (list, tuple)):
+            return f"{field} in [{', '.join(cls._literal(item) for item in value)}]"
+        return f"{field} == {cls._literal(value)}"
+    
+    @staticmethod
+    def _literal(value: Any) -> str:
+        """Render a value as an expression literal (strings are escaped)"""
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, (int, float)):
+            return repr(value)
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        return f'"{escaped}"'
+    
+    def update_chunk_fields(self, updates: List[Dict], flush: bool = False):
+        """
+        Rewrite scalar fields of stored chunks without re-embedding
+        
+        Primary keys are auto-generated, so each row is re-inserted with its
+        stored vectors and the new scalars, then the old row is deleted.
+        
+        Args:
+            updates: Dicts with 'id' and the fields to change
+            flush: Flush the collection immediately after updating
+        """
+        if not updates:
+            return
+        by_id = {update["id"]: update for update in updates}
+        ids = list(by_id)
+        rows = []
+        for start in range(0, len(ids), self.QUERY_BATCH_SIZE):
+            batch = ids[start:start + self.QUERY_BATCH_SIZE]
+            rows.extend(self.collection.query(
+                expr=f"id in {batch}",
+                output_fields=["id"] + self.insert_fields
+            ))
+        if not rows:
             return
         
-        # Prepare data for insertion
-        data = [
-            [chunk["document_id"] for chunk in chunks],
-            [chunk["text"] for chunk in chunks],
-            [chunk["dense_vector"] for chunk in chunks],
-            [chunk["sparse_vector"] for chunk in chunks]
-        ]
+        data = []
+        for name in self.insert_fields:
+            if name in ("dense_vector", self.RERANK_VECTOR_FIELD):
+                data.append([self._stored_vector(name, row[name]) for row in rows])
+            else:
+                data.append([by_id[row["id"]].get(name, row[name]) for row in rows])
         
-        # Insert
         self.collection.insert(data)
+        self.collection.delete(f"id in {[row['id'] for row in rows]}")
+        self.flush_scheduler.record(len(rows))
+        if flush:
+            self.flush()
+        print(f"✅ Updated {len(rows)} chunks in Milvus")
+    
+    def _stored_vector(self, name: str, value):
+        """Queried dense vector field back in insert form (no re-embedding)"""
+        if isinstance(value, list) and len(value) == 1 and isinstance(value[0], bytes):
+            value = value[0]
+        if name == self.RERANK_VECTOR_FIELD or self.dense_vector_type == "float16":
+            return self._vector_array(value).astype(np.float16)
+        return value
+    
+    def delete_by_ids(self, ids: List[int], flush: bool = False):
+        """
+        Delete chunks by primary key
+        
+        Args:
+            ids: Primary keys to delete
+            flush: Flush the collection immediately after deleting
+        """
+        if not ids:
+            return
+        self.collection.delete(f"id in {list(ids)}")
+        self.flush_scheduler.record(len(ids))
+        if flush:
+            self.flush()
+        print(f"✅ Deleted {len(ids)} chunks from Milvus")
+    
+    def flush(self):
+        """Flush unflushed writes now (e.g. at the end of a bulk load)"""
+        self.flush_scheduler.flush()
+    
+    def _flush_collection(self):
+        """Seal growing segments to persistent storage"""
         self.collection.flush()
-        print(f"✅ Inserted {len(chunks)} chunks into Milvus")
     
-    def convert_sparse_to_milvus_format(self, sparse_dict: Dict) -> Dict:
+    def close(self):
+        """Flush remaining writes and stop the flush scheduler"""
+        self.flush_scheduler.close()
+    
+    def convert_sparse_to_milvus_format(self, sparse: SparseVector) -> Dict[int, float]:
         """
-        Convert sparse vector from dict format to Milvus sparse format
+        Convert a sparse vector to Milvus sparse format
         
         Args:
-            sparse_dict: Dictionary with token indices as keys and weights as values
+            sparse: Integer token ids + weights
             
         Returns:
             Milvus-compatible sparse vector
         """
-        # Milvus expects sparse vectors in {index: weight} format
-        return sparse_dict
+        # Milvus expects sparse vectors in {index: weight} format with int indices
+        return sparse.to_dict()
+    
+    def convert_sparse_vector(self, sparse: SparseVector) -> Dict[int, float]:
+        """VectorStore hook: sparse vector -> Milvus sparse format"""
+        return self.convert_sparse_to_milvus_format(sparse)
     
     def dense_search(
         self,
         query_vector: np.ndarray,
         top_k: int = 5,
-        document_id_filter: Optional[str] = None
+        document_id_filter: Optional[str] = None,
+        consistency_level: Optional[str] = None,
+        filters: Optional[Dict] = None,
+        dense_params: Optional[Dict] = None
     ) -> List[Dict]:
         """
         Search using dense vectors only
         
+        With re-ranking, rerank_multiplier * top_k candidates are fetched from
+        the (binary or quantized) index with their full-precision vectors and
+        re-scored by exact inner product.
+        
         Args:
             query_vector: Dense query vector
             top_k: Number of results to return
             document_id_filter: Optional filter by document_id
+            consistency_level: Milvus consistency level for this search
+                ("Strong" gives read-your-writes; default: collection level)
+            filters: Scalar/metadata filters evaluated inside Milvus
+            dense_params: Per-request ef / nprobe / search_list / rerank /
+                rerank_multiplier (default: DenseIndexConfig)
             
         Returns:
             List of search results with scores
         """
-        search_params = {
-            "metric_type": "IP",
-            "params": {"ef": 100}
-        }
+        options = self.dense_index.search_options(dense_params)
+        rerank_field = self._rerank_field() if options["rerank"] else None
+        limit = top_k * max(1, options["rerank_multiplier"]) if rerank_field else top_k
         
-        expr = f'document_id == "{document_id_filter}"' if document_id_filter else None
+        expr = self._filter_expr(self.merge_filters(filters, document_id_filter))
         
         results = self.collection.search(
-            data=[query_vector.tolist()],
+            data=[self._dense_value(query_vector)],
             anns_field="dense_vector",
-            param=search_params,
-            limit=top_k,
+            param=self._dense_search_params(options, limit),
+            limit=limit,
             expr=expr,
-            output_fields=["document_id", "text"]
+            output_fields=self.SEARCH_OUTPUT_FIELDS + ([rerank_field] if rerank_field else []),
+            **self._consistency_kwargs(consistency_level)
         )
         
-        return self._format_results(results[0])
+        if rerank_field:
+            return self._rerank(query_vector, results[0], rerank_field, top_k)
+        
+        formatted = self._format_results(results[0])
+        if self.dense_metric == "HAMMING":
+            # Hamming distance -> similarity in [-1, 1] (fraction of agreeing signs)
+            for result in formatted:
+                result["score"] = 1.0 - 2.0 * result["score"] / self.DENSE_DIM
+        return formatted
+    
+    def _dense_value(self, vector):
+        """Dense vector in the collection's storage type (insert rows and query data)"""
+        vector = np.asarray(vector, dtype=np.float32)
+        if self.dense_vector_type == "float16":
+            return vector.astype(np.float16)
+        if self.dense_vector_type == "binary":
+            return np.packbits(vector > 0).tobytes()
+        return vector.tolist()
+    
+    def _dense_search_params(self, options: Dict, limit: int) -> Dict:
+        """Search params for the collection's dense index"""
+        key = self.DENSE_INDEX_SEARCH_PARAM.get(self.dense_index_type)
+        params = {}
+        if key == "nprobe":
+            params["nprobe"] = options["nprobe"]
+        elif key is not None:
+            # ef / search_list must not be smaller than the number of results
+            params[key] = max(options[key], limit)
+        return {"metric_type": self.dense_metric, "params": params}
+    
+    def _rerank_field(self) -> Optional[str]:
+        """Field with full-precision vectors to re-rank candidates with (None: scores are exact)"""
+        if self.dense_vector_type == "binary":
+            return self.RERANK_VECTOR_FIELD if self.RERANK_VECTOR_FIELD in self.insert_fields else None
+        if self.dense_index_type in self.LOSSY_INDEX_TYPES:
+            return "dense_vector"
+        return None
+    
+    def _rerank(self, query_vector: np.ndarray, hits, field: str, top_k: int) -> List[Dict]:
+        """Re-score ANN candidates by inner product with their full-precision vectors"""
+        formatted = self._format_results(hits)
+        if not formatted:
+            return formatted
+        vectors = np.stack([self._vector_array(hit.entity.get(field)) for hit in hits])
+        scores = vectors @ np.asarray(query_vector, dtype=np.float32)
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        return [{**formatted[i], "score": float(scores[i])} for i in order]
+    
+    @staticmethod
+    def _vector_array(value) -> np.ndarray:
+        """Vector field of a search hit as float32 (float16 fields come back as bytes)"""
+        if isinstance(value, list) and len(value) == 1 and isinstance(value[0], bytes):
+            value = value[0]
+        if isinstance(value, bytes):
+            return np.frombuffer(value, dtype=np.float16).astype(np.float32)
+        return np.asarray(value, dtype=np.float32)
     
     def sparse_search(
         self,
-        query_sparse: Dict,
+        query_sparse: SparseVector,
         top_k: int = 5,
-        document_id_filter: Optional[str] = None
+        document_id_filter: Optional[str] = None,
+        consistency_level: Optional[str] = None,
+        filters: Optional[Dict] = None
     ) -> List[Dict]:
         """
         Search using sparse vectors only
@@ -219,24 +746,25 @@ class MilvusService:
             query_sparse: Sparse query vector
             top_k: Number of results to return
             document_id_filter: Optional filter by document_id
+            consistency_level: Milvus consistency level for this search
+                ("Strong" gives read-your-writes; default: collection level)
+            filters: Scalar/metadata filters evaluated inside Milvus
             
         Returns:
             List of search results with scores
         """
-        search_params = {
-            "metric_type": "IP",
-            "params": {}
-        }
+        search_params = self.SPARSE_SEARCH_PARAMS
         
-        expr = f'document_id == "{document_id_filter}"' if document_id_filter else None
+        expr = self._filter_expr(self.merge_filters(filters, document_id_filter))
         
         results = self.collection.search(
-            data=[query_sparse],
+            data=[self.convert_sparse_to_milvus_format(query_sparse)],
             anns_field="sparse_vector",
             param=search_params,
             limit=top_k,
             expr=expr,
-            output_fields=["document_id", "text"]
+            output_fields=self.SEARCH_OUTPUT_FIELDS,
+            **self._consistency_kwargs(consistency_level)
         )
         
         return self._format_results(results[0])
@@ -244,13 +772,27 @@ class MilvusService:
     def hybrid_search(
         self,
         query_dense: np.ndarray,
-        query_sparse: Dict,
+        query_sparse: SparseVector,
         top_k: int = 5,
         dense_weight: float = 0.5,
-        sparse_weight: float = 0.5
+        sparse_weight: float = 0.5,
+        consistency_level: Optional[str] = None,
+        engine: str = "native",
+        fusion: str = "rrf",
+        candidate_multiplier: int = 3,
+        filters: Optional[Dict] = None,
+        dense_params: Optional[Dict] = None
     ) -> List[Dict]:
         """
-        Hybrid search using RRF (Reciprocal Rank Fusion)
+        Hybrid search combining dense and sparse results
+        
+        engine="native" sends both ANN requests in one Milvus hybrid_search
+        call and fuses them server-side (RRFRanker or WeightedRanker).
+        engine="python" runs two searches and fuses them here with weighted
+        RRF (regardless of fusion); it is also used as a fallback when the
+        native call fails, when the dense leg is re-ranked (re-ranking
+        needs the dense candidates before fusion) and for fusion="rrf" with
+        unequal weights (Milvus RRFRanker cannot weight the legs).
         
         Args:
             query_dense: Dense query vector
@@ -258,14 +800,36 @@ class MilvusService:
             top_k: Number of results to return
             dense_weight: Weight for dense search results
             sparse_weight: Weight for sparse search results
+            consistency_level: Milvus consistency level for both searches
+            engine: "native" or "python"
+            fusion: "rrf" (reciprocal rank fusion) or "weighted" (weighted scores)
+            candidate_multiplier: Candidates fetched per leg = top_k * candidate_multiplier
+            filters: Scalar/metadata filters applied to both legs inside Milvus
+            dense_params: Per-request dense search params (see dense_search)
             
         Returns:
-            List of search results ranked by RRF
+            List of search results ranked by the fused score
         """
+        rerank = self.dense_index.search_options(dense_params)["rerank"] and self._rerank_field()
+        weighted_rrf = fusion == "rrf" and dense_weight != sparse_weight
+        if engine == "native" and not rerank and not weighted_rrf:
+            try:
+                return self._native_hybrid_search(
+                    query_dense, query_sparse, top_k, dense_weight, sparse_weight,
+                    consistency_level, fusion, candidate_multiplier, filters, dense_params
+                )
+            except Exception as e:
+                print(f"⚠️ Native hybrid search failed, falling back to Python fusion: {e}")
+        
         # Get results from both searches (get more to ensure good fusion)
-        k_multiplier = 3
-        dense_results = self.dense_search(query_dense, top_k * k_multiplier)
-        sparse_results = self.sparse_search(query_sparse, top_k * k_multiplier)
+        dense_results = self.dense_search(
+            query_dense, top_k * candidate_multiplier,
+            consistency_level=consistency_level, filters=filters, dense_params=dense_params
+        )
+        sparse_results = self.sparse_search(
+            query_sparse, top_k * candidate_multiplier,
+            consistency_level=consistency_level, filters=filters
+        )
         
         # Apply RRF
         fused_results = self._reciprocal_rank_fusion(
@@ -273,68 +837,72 @@ class MilvusService:
             sparse_results,
             dense_weight,
             sparse_weight,
-            k=60
+            k=self.RRF_K
         )
         
         # Return top_k
         return fused_results[:top_k]
     
-    def _reciprocal_rank_fusion(
+    def _native_hybrid_search(
         self,
-        dense_results: List[Dict],
-        sparse_results: List[Dict],
+        query_dense: np.ndarray,
+        query_sparse: SparseVector,
+        top_k: int,
         dense_weight: float,
         sparse_weight: float,
-        k: int = 60
+        consistency_level: Optional[str],
+        fusion: str,
+        candidate_multiplier: int,
+        filters: Optional[Dict] = None,
+        dense_params: Optional[Dict] = None
     ) -> List[Dict]:
-        """
-        Combine results using Reciprocal Rank Fusion
+        """Single-call hybrid search with a server-side reranker"""
+        candidates = top_k * candidate_multiplier
+        expr = self._filter_expr(self.merge_filters(filters))
+        dense_options = self.dense_index.search_options(dense_params)
+        requests = [
+            AnnSearchRequest(
+                data=[self._dense_value(query_dense)],
+                anns_field="dense_vector",
+                param=self._dense_search_params(dense_options, candidates),
+                limit=candidates,
+                expr=expr
+            ),
+            AnnSearchRequest(
+                data=[self.convert_sparse_to_milvus_format(query_sparse)],
+                anns_field="sparse_vector",
+                param=self.SPARSE_SEARCH_PARAMS,
+                limit=candidates,
+                expr=expr
+            )
+        ]
         
-        Args:
-            dense_results: Results from dense search
-            sparse_results: Results from sparse search
-            dense_weight: Weight for dense results
-            sparse_weight: Weight for sparse results
-            k: RRF constant (usually 60)
-            
-        Returns:
-            Fused and ranked results
-        """
-        # Create a mapping of document text to RRF score
-        scores = {}
-        
-        # Process dense results
-        for rank, result in enumerate(dense_results, 1):
-            text = result["text"]
-            rrf_score = dense_weight / (k + rank)
-            if text not in scores:
-                scores[text] = {"score": 0, "data": result}
-            scores[text]["score"] += rrf_score
-        
-        # Process sparse results
-        for rank, result in enumerate(sparse_results, 1):
-            text = result["text"]
-            rrf_score = sparse_weight / (k + rank)
-            if text not in scores:
-                scores[text] = {"score": 0, "data": result}
-            scores[text]["score"] += rrf_score
-        
-        # Sort by RRF score
-        sorted_results = sorted(
-            scores.values(),
-            key=lambda x: x["score"],
-            reverse=True
+        if fusion == "weighted":
+            ranker = WeightedRanker(dense_weight, sparse_weight)
+        elif fusion == "rrf":
+            # Milvus RRF is unweighted; hybrid_search only gets here with equal weights
+            ranker = RRFRanker(self.RRF_K)
+        else:
+            raise ValueError(f"Invalid fusion: {fusion}")
+        
+        results = self.collection.hybrid_search(
+            requests,
+            rerank=ranker,
+            limit=top_k,
+            output_fields=self.SEARCH_OUTPUT_FIELDS,
+            **self._consistency_kwargs(consistency_level)
         )
         
-        # Format results
         return [
-            {
-                **item["data"],
-                "rrf_score": item["score"]
-            }
-            for item in sorted_results
+            {**result, "rrf_score": result["score"]}
+            for result in self._format_results(results[0])
         ]
     
+    @staticmethod
+    def _consistency_kwargs(consistency_level: Optional[str]) -> Dict:
+        """Search kwargs for an optional per-request consistency level"""
+        return {"consistency_level": consistency_level} if consistency_level else {}
+    
     def _format_results(self, results) -> List[Dict]:
         """Format Milvus search results"""
         formatted = []
@@ -343,6 +911,9 @@ class MilvusService:
                 "id": hit.id,
                 "document_id": hit.entity.get("document_id"),
                 "text": hit.entity.get("text"),
+                "chunk_index": hit.entity.get("chunk_index"),
+                "total_chunks": hit.entity.get("total_chunks"),
+                "metadata": hit.entity.get("metadata"),
                 "score": hit.score
             })
         return formatted
@@ -358,9 +929,8 @@ class MilvusService:
             True if successful
         """
         try:
-            expr = f'document_id == "{document_id}"'
-            self.collection.delete(expr)
-            self.collection.flush()
+            result = self.collection.delete(self._document_expr(document_id))
+            self.flush_scheduler.record(max(result.delete_count, 1))
             print(f"✅ Deleted document: {document_id}")
             return True
         except Exception as e:
@@ -372,5 +942,11 @@ class MilvusService:
         return {
             "name": self.collection_name,
             "num_entities": self.collection.num_entities,
-            "loaded": utility.load_state(self.collection_name)
+            "loaded": utility.load_state(self.collection_name),
+            "partition_key": self.partition_key_field(),
+            "num_partitions": len(self.collection.partitions),
+            "dense_vector_type": self.dense_vector_type,
+            "dense_index_type": self.dense_index_type,
+            "dense_rerank_field": self._rerank_field(),
+            "flush": self.flush_scheduler.stats()
         }
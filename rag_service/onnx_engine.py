@@ -0,0 +1,152 @@
+"""
+ONNX Runtime Engine for BGE-M3
+CPU inference of an exported (optionally int8-quantized) BGE-M3 graph with
+the same encode() interface and outputs as FlagEmbedding's BGEM3FlagModel
+"""
+
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:  # only needed when RAG_EMBEDDING_ENGINE=onnx
+    ort = None
+
+
+# File names inside an exported model directory (see scripts/export_onnx.py)
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model_int8.onnx"
+
+
+class OnnxBGEM3Model:
+    """
+    BGE-M3 dense + lexical (sparse) encoder running on onnxruntime
+
+    The exported graph takes input_ids / attention_mask and returns the
+    normalized CLS embedding ("dense") and the per-token ReLU sparse weights
+    ("sparse"). Token weights are turned into lexical weights exactly like
+    FlagEmbedding does: special tokens are dropped and each token id keeps
+    its maximum weight.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        quantized: bool = True,
+        intra_op_threads: int = 0,
+        batch_size: int = 12,
+        max_length: int = 8192
+    ):
+        """
+        Load the tokenizer and create the inference session
+
+        Args:
+            model_dir: Directory produced by scripts/export_onnx.py
+            quantized: Use the int8 model (model_int8.onnx) instead of fp32
+            intra_op_threads: Threads per operator (0: one per CPU core)
+            batch_size: Texts per session run
+            max_length: Maximum tokens per text (longer texts are truncated)
+        """
+        if ort is None:
+            raise ImportError("onnxruntime is not installed (poetry install -E onnx)")
+        from transformers import AutoTokenizer
+
+        model_path = Path(model_dir) / (INT8_MODEL_FILE if quantized else FP32_MODEL_FILE)
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"ONNX model not found at {model_path}, export it with scripts/export_onnx.py"
+            )
+
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.unused_tokens = {
+            token_id for token_id in (
+                self.tokenizer.cls_token_id,
+                self.tokenizer.eos_token_id,
+                self.tokenizer.pad_token_id,
+                self.tokenizer.unk_token_id
+            )
+            if token_id is not None
+        }
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        # One request runs at a time per session; all cores go to a single op
+        options.intra_op_num_threads = intra_op_threads or (os.cpu_count() or 1)
+        options.inter_op_num_threads = 1
+
+        self.session = ort.InferenceSession(
+            str(model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.model_path = model_path
+
+    def encode(
+        self,
+        sentences: List[str],
+        batch_size: int = None,
+        max_length: int = None,
+        return_dense: bool = True,
+        return_sparse: bool = False,
+        return_colbert_vecs: bool = False
+    ) -> Dict:
+        """
+        Encode texts (same result keys as BGEM3FlagModel.encode)
+
+        Returns:
+            Dict with 'dense_vecs' (float32 array, n x 1024) and
+            'lexical_weights' (list of {token_id_str: weight})
+        """
+        if return_colbert_vecs:
+            raise ValueError("ColBERT vectors are not exported to the ONNX engine")
+
+        batch_size = batch_size or self.batch_size
+        max_length = max_length or self.max_length
+
+        dense_vecs, lexical_weights = [], []
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            tokens = self.tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=max_length,
+                return_tensors="np"
+            )
+            input_ids = tokens["input_ids"].astype(np.int64)
+            attention_mask = tokens["attention_mask"].astype(np.int64)
+
+            dense, sparse = self.session.run(
+                ["dense", "sparse"],
+                {"input_ids": input_ids, "attention_mask": attention_mask}
+            )
+            if return_dense:
+                dense_vecs.append(dense.astype(np.float32))
+            if return_sparse:
+                for ids, weights, mask in zip(input_ids, sparse, attention_mask):
+                    lexical_weights.append(self._token_weights(ids[mask == 1], weights[mask == 1]))
+
+        result = {"dense_vecs": None, "lexical_weights": None, "colbert_vecs": None}
+        if return_dense:
+            result["dense_vecs"] = np.concatenate(dense_vecs) if dense_vecs else np.zeros((0, 1024), np.float32)
+        if return_sparse:
+            result["lexical_weights"] = lexical_weights
+        return result
+
+    def _token_weights(self, input_ids: np.ndarray, weights: np.ndarray) -> Dict[str, float]:
+        """Max weight per token id, without special tokens (as in FlagEmbedding)"""
+        result: Dict[str, float] = defaultdict(int)
+        for token_id, weight in zip(input_ids.tolist(), weights.tolist()):
+            if token_id in self.unused_tokens or weight <= 0:
+                continue
+            key = str(token_id)
+            if weight > result[key]:
+                result[key] = weight
+        return dict(result)
@@ -3,12 +3,22 @@ RAG Orchestrator Service
 Coordinates the entire RAG pipeline: chunking -> embedding -> storage -> search
 """
 
-from typing import List, Dict, Optional
+import json
+from typing import AsyncIterator, Iterable, List, Dict, Optional, Tuple
 import numpy as np
 
-from embedding_service import EmbeddingService
-from chunking_service import ChunkingService
-from milvus_service import MilvusService
+from embedding_service import get_embedding_service
+from chunking_service import ChunkingService, StreamWindow
+from vector_store import DenseIndexConfig, VectorStore, create_vector_store
+from executor_service import ExecutorPools, BackpressureError
+from search_cache import SearchResultCache
+from sparse_vector import SparseVector
+from reranker import Reranker, create_reranker
+from metrics import registry
+from config import settings
+
+
+SPARSE_NNZ_BUCKETS = (16, 32, 64, 128, 256, 512)
 
 
 class RAGOrchestrator:
@@ -19,33 +29,80 @@ class RAGOrchestrator:
     
     def __init__(
         self,
-        milvus_host: str = "localhost",
-        milvus_port: int = 19530,
-        chunk_size: int = 500,
-        chunk_overlap: int = 50
+        milvus_host: Optional[str] = None,
+        milvus_port: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        chunking_mode: Optional[str] = None,
+        vector_store: Optional[VectorStore] = None
     ):
         """
         Initialize RAG orchestrator with all required services
         
         Args:
-            milvus_host: Milvus server host
-            milvus_port: Milvus server port
-            chunk_size: Size of text chunks
-            chunk_overlap: Overlap between chunks
+            milvus_host: Milvus server host (default: settings)
+            milvus_port: Milvus server port (default: settings)
+            chunk_size: Size of text chunks (default: settings)
+            chunk_overlap: Overlap between chunks (default: settings)
+            chunking_mode: "character", "token" or "sentence" (default: settings)
+            vector_store: Vector store to use (default: backend from settings)
         """
         # Initialize services
-        self.embedding_service = EmbeddingService()
+        self.embedding_service = get_embedding_service()
+        chunking_mode = chunking_mode or settings.chunking_mode
+        chunk_size = chunk_size or settings.chunk_size
+        if chunking_mode != "character" and chunk_size > settings.max_length - 2:
+            print(
+                f"⚠️ chunk_size={chunk_size} tokens exceeds max_length={settings.max_length}, "
+                f"chunks will be truncated when embedded"
+            )
         self.chunking_service = ChunkingService(
             chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
+            chunk_overlap=settings.chunk_overlap if chunk_overlap is None else chunk_overlap,
+            mode=chunking_mode,
+            tokenizer_name=settings.model_path or self.embedding_service.model_name
         )
-        self.milvus_service = MilvusService(
-            host=milvus_host,
-            port=milvus_port
+        self.vector_store = vector_store or create_vector_store(
+            backend=settings.vector_store_backend,
+            milvus_host=milvus_host or settings.milvus_host,
+            milvus_port=milvus_port or settings.milvus_port,
+            local_path=settings.local_store_path,
+            flush_interval_seconds=settings.flush_interval_seconds,
+            flush_max_pending=settings.flush_max_pending_rows,
+            num_partitions=settings.num_partitions,
+            dense_index=DenseIndexConfig.from_settings(settings)
         )
         
         # Ensure collection exists
-        self.milvus_service.create_collection(drop_existing=False)
+        self.vector_store.create_collection(drop_existing=False)
+        
+        # Non-zero sparse entries per stored chunk (after pruning)
+        self._sparse_nnz_hist = registry.histogram("sparse_vector_nnz", SPARSE_NNZ_BUCKETS)
+        
+        # Optional second-stage reranker
+        self.reranker: Optional[Reranker] = None
+        if settings.reranker:
+            if settings.reranker == "colbert" and settings.embedding_engine == "onnx":
+                raise ValueError("The colbert reranker needs the torch engine (ONNX export has no ColBERT head)")
+            self.reranker = create_reranker(
+                settings.reranker,
+                self.embedding_service,
+                model_name=settings.reranker_model,
+                candidates=settings.rerank_candidates,
+                batch_size=settings.rerank_batch_size,
+                budget_ms=settings.rerank_budget_ms,
+                max_length=settings.max_length
+            )
+        
+        # Search result cache, invalidated by the write paths below. Off with
+        # several HTTP workers: a write only bumps the generations of the worker
+        # that served it, so the others would return stale results until TTL
+        self.search_cache = None
+        if settings.search_cache_size > 0 and settings.workers <= 1:
+            self.search_cache = SearchResultCache(
+                max_entries=settings.search_cache_size,
+                ttl_seconds=settings.search_cache_ttl_seconds
+            )
     
     def process_text(
         self,
@@ -59,7 +116,7 @@ class RAGOrchestrator:
         Pipeline:
         1. Chunk text into segments
         2. Generate embeddings (dense + sparse) for each chunk
-        3. Store in Milvus
+        3. Store in the vector store
         
         Args:
             text: Input text to process
@@ -86,23 +143,13 @@ class RAGOrchestrator:
                 }
             
             # Step 2: Generate embeddings
-            texts = [chunk["text"] for chunk in chunks_data]
-            dense_vecs, sparse_vecs = self.embedding_service.encode_batch_hybrid(texts)
-            
-            # Step 3: Prepare data for Milvus
-            milvus_chunks = []
-            for i, chunk in enumerate(chunks_data):
-                milvus_chunks.append({
-                    "document_id": chunk["document_id"],
-                    "text": chunk["text"],
-                    "dense_vector": dense_vecs[i].tolist(),
-                    "sparse_vector": self.milvus_service.convert_sparse_to_milvus_format(
-                        sparse_vecs[i]
-                    )
-                })
+            store_rows = self.embed_chunks(chunks_data)
             
-            # Step 4: Insert into Milvus
-            self.milvus_service.insert_documents(milvus_chunks)
+            # Step 3: Insert into the vector store
+            try:
+                self.vector_store.insert_documents(store_rows)
+            finally:
+                self._invalidate_search_cache(document_id, metadata)
             
             return {
                 "status": "success",
@@ -118,13 +165,627 @@ class RAGOrchestrator:
                 "message": f"Processing failed: {str(e)}"
             }
     
+    async def process_text_async(
+        self,
+        text: str,
+        document_id: str,
+        metadata: Optional[Dict],
+        executors: ExecutorPools
+    ) -> Dict:
+        """
+        Same pipeline as process_text, but every blocking stage runs
+        in its dedicated executor pool so the event loop stays free
+        
+        Args:
+            text: Input text to process
+            document_id: Unique identifier for this document
+            metadata: Optional metadata to attach
+            executors: Executor pools for chunking, inference and I/O
+            
+        Returns:
+            Processing result with statistics
+            
+        Raises:
+            BackpressureError: If one of the pools cannot accept the work
+        """
+        try:
+            chunks_data = await executors.chunking.run(
+                self.chunking_service.chunk_with_metadata,
+                text=text,
+                document_id=document_id,
+                metadata=metadata
+            )
+            
+            if not chunks_data:
+                return {
+                    "status": "error",
+                    "message": "No chunks generated from text",
+                    "document_id": document_id,
+                    "chunk_count": 0
+                }
+            
+            store_rows = await executors.inference.run(self.embed_chunks, chunks_data)
+            try:
+                await executors.io.run(self.vector_store.insert_documents, store_rows)
+            finally:
+                self._invalidate_search_cache(document_id, metadata)
+            
+            return {
+                "status": "success",
+                "document_id": document_id,
+                "chunk_count": len(chunks_data),
+                "message": f"Successfully processed {len(chunks_data)} chunks"
+            }
+            
+        except BackpressureError:
+            raise
+        except Exception as e:
+            return {
+                "status": "error",
+                "document_id": document_id,
+                "message": f"Processing failed: {str(e)}"
+            }
+    
+    def process_stream(
+        self,
+        pieces: Iterable[str],
+        document_id: str,
+        metadata: Optional[Dict] = None,
+        replace: bool = False,
+        batch_size: Optional[int] = None
+    ) -> Dict:
+        """
+        Index a document read piece by piece, in bounded memory
+        
+        Text is chunked in windows of settings.stream_window_chars and chunks
+        are embedded and inserted batch_size at a time, so memory does not
+        grow with the document. Stored chunks get total_chunks=0 (the count
+        is not known until the stream ends).
+        
+        Args:
+            pieces: Text pieces in document order (e.g. lines of an open file)
+            document_id: Unique identifier for this document
+            metadata: Optional metadata to attach
+            replace: Delete the stored chunks of document_id first
+            batch_size: Chunks per embedding/insert call (default: settings)
+            
+        Returns:
+            Processing result with statistics
+        """
+        batch_size = batch_size or settings.bulk_batch_size
+        chunk_count = 0
+        try:
+            if replace:
+                self.vector_store.delete_by_document_id(document_id)
+            
+            batch: List[str] = []
+            for chunk in self.chunking_service.iter_stream(pieces, settings.stream_window_chars):
+                batch.append(chunk)
+                if len(batch) >= batch_size:
+                    chunk_count += self._write_stream_batch(batch, document_id, metadata, chunk_count)
+                    batch = []
+            if batch:
+                chunk_count += self._write_stream_batch(batch, document_id, metadata, chunk_count)
+            
+            return self._stream_result(document_id, chunk_count)
+            
+        except Exception as e:
+            return self._stream_error(document_id, chunk_count, e)
+        finally:
+            self._invalidate_search_cache(document_id, None if replace else metadata)
+    
+    async def process_stream_async(
+        self,
+        pieces: AsyncIterator[str],
+        document_id: str,
+        metadata: Optional[Dict],
+        executors: ExecutorPools,
+        replace: bool = False,
+        batch_size: Optional[int] = None
+    ) -> Dict:
+        """
+        Same as process_stream for an async source (HTTP request body), with
+        chunking, embedding and insertion run in their executor pools
+        
+        Raises:
+            BackpressureError: If one of the pools cannot accept the work
+        """
+        batch_size = batch_size or settings.bulk_batch_size
+        chunk_count = 0
+        window = StreamWindow(settings.stream_window_chars)
+        batch: List[str] = []
+        
+        async def write(chunks: List[str], final: bool = False):
+            nonlocal chunk_count, batch
+            batch.extend(chunks)
+            while len(batch) >= batch_size or (final and batch):
+                chunks_data = self.chunking_service.attach_metadata(
+                    batch[:batch_size], document_id, metadata, start_index=chunk_count
+                )
+                batch = batch[batch_size:]
+                store_rows = await executors.inference.run(self.embed_chunks, chunks_data)
+                await executors.io.run(self.vector_store.insert_documents, store_rows)
+                chunk_count += len(chunks_data)
+        
+        try:
+            if replace:
+                await executors.io.run(self.vector_store.delete_by_document_id, document_id)
+            
+            async for piece in pieces:
+                if window.feed(piece):
+                    chunks, carry = await executors.chunking.run(
+                        self.chunking_service.split_window, window.take()
+                    )
+                    window.feed(carry)
+                    await write(chunks)
+            
+            chunks, _ = await executors.chunking.run(
+                self.chunking_service.split_window, window.take(), True
+            )
+            await write(chunks, final=True)
+            
+            return self._stream_result(document_id, chunk_count)
+            
+        except BackpressureError:
+            raise
+        except Exception as e:
+            return self._stream_error(document_id, chunk_count, e)
+        finally:
+            self._invalidate_search_cache(document_id, None if replace else metadata)
+    
+    def _write_stream_batch(
+        self,
+        chunks: List[str],
+        document_id: str,
+        metadata: Optional[Dict],
+        start_index: int
+    ) -> int:
+        """Embed and insert one batch of streamed chunks, return the number written"""
+        chunks_data = self.chunking_service.attach_metadata(
+            chunks, document_id, metadata, start_index=start_index
+        )
+        self.vector_store.insert_documents(self.embed_chunks(chunks_data))
+        return len(chunks_data)
+    
+    @staticmethod
+    def _stream_result(document_id: str, chunk_count: int) -> Dict:
+        """Build the result dict of a streamed document"""
+        if not chunk_count:
+            return {
+                "status": "error",
+                "message": "No chunks generated from text",
+                "document_id": document_id,
+                "chunk_count": 0
+            }
+        return {
+            "status": "success",
+            "document_id": document_id,
+            "chunk_count": chunk_count,
+            "message": f"Successfully processed {chunk_count} chunks"
+        }
+    
+    @staticmethod
+    def _stream_error(document_id: str, chunk_count: int, error: Exception) -> Dict:
+        """Build the error dict of a stream that failed part way"""
+        return {
+            "status": "error",
+            "document_id": document_id,
+            "chunk_count": chunk_count,
+            "message": (
+                f"Processing failed after {chunk_count} chunks: {str(error)} "
+                f"(retry with replace to drop the partial document)"
+            )
+        }
+    
+    def upsert_text(
+        self,
+        text: str,
+        document_id: str,
+        metadata: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Incrementally re-index a document
+        
+        The text is re-chunked and chunk hashes are compared with what is
+        already stored for document_id. Only new chunks are embedded and
+        inserted and only vanished chunks are deleted.
+        
+        Args:
+            text: New document text
+            document_id: Document to update (created if it does not exist)
+            metadata: Optional metadata to attach to new chunks
+            
+        Returns:
+            Processing result with inserted/deleted/unchanged counts
+        """
+        try:
+            chunks_data = self.chunking_service.chunk_with_metadata(
+                text=text,
+                document_id=document_id,
+                metadata=metadata
+            )
+            
+            if not chunks_data:
+                return {
+                    "status": "error",
+                    "message": "No chunks generated from text",
+                    "document_id": document_id,
+                    "chunk_count": 0
+                }
+            
+            stored = self.vector_store.get_chunk_hashes(document_id)
+            to_insert, delete_ids, to_update = self._diff_chunks(chunks_data, stored)
+            
+            try:
+                if to_insert:
+                    self.vector_store.insert_documents(self.embed_chunks(to_insert))
+                self.vector_store.update_chunk_fields(to_update)
+                self.vector_store.delete_by_ids(delete_ids)
+            finally:
+                self._invalidate_search_cache(document_id, metadata)
+            
+            return self._upsert_result(document_id, chunks_data, to_insert, delete_ids, to_update)
+            
+        except Exception as e:
+            return {
+                "status": "error",
+                "document_id": document_id,
+                "message": f"Processing failed: {str(e)}"
+            }
+    
+    async def upsert_text_async(
+        self,
+        text: str,
+        document_id: str,
+        metadata: Optional[Dict],
+        executors: ExecutorPools
+    ) -> Dict:
+        """
+        Same as upsert_text, with every blocking stage run in its executor pool
+        
+        Raises:
+            BackpressureError: If one of the pools cannot accept the work
+        """
+        try:
+            chunks_data = await executors.chunking.run(
+                self.chunking_service.chunk_with_metadata,
+                text=text,
+                document_id=document_id,
+                metadata=metadata
+            )
+            
+            if not chunks_data:
+                return {
+                    "status": "error",
+                    "message": "No chunks generated from text",
+                    "document_id": document_id,
+                    "chunk_count": 0
+                }
+            
+            stored = await executors.io.run(self.vector_store.get_chunk_hashes, document_id)
+            to_insert, delete_ids, to_update = self._diff_chunks(chunks_data, stored)
+            
+            try:
+                if to_insert:
+                    store_rows = await executors.inference.run(self.embed_chunks, to_insert)
+                    await executors.io.run(self.vector_store.insert_documents, store_rows)
+                await executors.io.run(self.vector_store.update_chunk_fields, to_update)
+                await executors.io.run(self.vector_store.delete_by_ids, delete_ids)
+            finally:
+                self._invalidate_search_cache(document_id, metadata)
+            
+            return self._upsert_result(document_id, chunks_data, to_insert, delete_ids, to_update)
+            
+        except BackpressureError:
+            raise
+        except Exception as e:
+            return {
+                "status": "error",
+                "document_id": document_id,
+                "message": f"Processing failed: {str(e)}"
+            }
+    
+    @staticmethod
+    def _diff_chunks(chunks_data: List[Dict], stored: List[Dict]) -> Tuple[List[Dict], List[int], List[Dict]]:
+        """
+        Compare new chunks with stored ones by content hash
+        
+        Duplicated chunks are matched as a multiset, so a paragraph that
+        appears twice is kept twice (a stored copy at the same position is
+        preferred). A chunk whose text is unchanged but whose position,
+        total_chunks or metadata changed keeps its embedding: only its
+        scalar fields are rewritten.
+        
+        Args:
+            chunks_data: Freshly chunked document
+            stored: Stored chunks as returned by VectorStore.get_chunk_hashes
+            
+        Returns:
+            Tuple of (chunks to embed and insert, primary keys to delete,
+            scalar updates {"id": ..., <fields>} for VectorStore.update_chunk_fields)
+        """
+        stored_by_hash: Dict[str, List[Dict]] = {}
+        for row in stored:
+            stored_by_hash.setdefault(row["chunk_hash"], []).append(row)
+        
+        to_insert, to_update = [], []
+        for chunk in chunks_data:
+            rows = stored_by_hash.get(chunk["chunk_hash"])
+            if not rows:
+                to_insert.append(chunk)
+                continue
+            row = next((r for r in rows if r.get("chunk_index") == chunk["chunk_index"]), rows[-1])
+            rows.remove(row)
+            fields = RAGOrchestrator._scalar_fields(chunk)
+            if any(RAGOrchestrator._field_changed(row, name, value) for name, value in fields.items()):
+                to_update.append({"id": row["id"], **fields})
+        
+        delete_ids = [row["id"] for rows in stored_by_hash.values() for row in rows]
+        return to_insert, delete_ids, to_update
+    
+    @staticmethod
+    def _field_changed(row: Dict, name: str, value) -> bool:
+        """Whether a stored scalar differs (fields get_chunk_hashes does not return count as unchanged)"""
+        if name not in row:
+            return False
+        if name == "metadata":
+            return (row[name] or {}) != value
+        return row[name] != value
+    
+    @staticmethod
+    def _scalar_fields(chunk: Dict) -> Dict:
+        """Position, metadata and promoted filter columns of a chunk row"""
+        metadata = chunk.get("metadata") or {}
+        return {
+            "chunk_index": chunk["chunk_index"],
+            "total_chunks": chunk["total_chunks"],
+            # Filterable fields are promoted from metadata ("" = unset)
+            "room_id": RAGOrchestrator._filter_value(metadata.get("room_id")),
+            "user_id": RAGOrchestrator._filter_value(metadata.get("user_id")),
+            "doc_type": RAGOrchestrator._filter_value(metadata.get("doc_type")),
+            "metadata": metadata
+        }
+    
+    @staticmethod
+    def _upsert_result(
+        document_id: str,
+        chunks_data: List[Dict],
+        to_insert: List[Dict],
+        delete_ids: List[int],
+        to_update: List[Dict]
+    ) -> Dict:
+        """Build the upsert result dict"""
+        unchanged = len(chunks_data) - len(to_insert) - len(to_update)
+        return {
+            "status": "success",
+            "document_id": document_id,
+            "chunk_count": len(chunks_data),
+            "inserted": len(to_insert),
+            "updated": len(to_update),
+            "deleted": len(delete_ids),
+            "unchanged": unchanged,
+            "message": (
+                f"Upserted {len(chunks_data)} chunks: {len(to_insert)} inserted, "
+                f"{len(to_update)} updated, {len(delete_ids)} deleted, {unchanged} unchanged"
+            )
+        }
+    
+    async def process_bulk_async(
+        self,
+        documents: AsyncIterator[Dict],
+        executors: ExecutorPools,
+        batch_size: int = 256,
+        flush: bool = True
+    ) -> AsyncIterator[Dict]:
+        """
+        Index a stream of documents with cross-document batching
+        
+        Chunks of consecutive documents are embedded and inserted together in
+        batches of batch_size, and the collection is flushed once at the end
+        (or left to the flush policy with flush=False).
+        A status dict is yielded for every document as soon as all of its
+        chunks are written, followed by a final summary.
+        A document whose chunks fail in any batch is reported as failed, its
+        remaining batches are skipped and the chunks it already inserted are
+        deleted again, so no document is left half-written.
+        
+        Args:
+            documents: Async iterator of dicts with 'text', 'document_id',
+                optional 'metadata' and 'mode' ("insert" or "upsert"). Items
+                with an 'error' key are reported as failed and skipped.
+            executors: Executor pools for chunking, inference and I/O
+            batch_size: Number of chunks per embedding/insert call
+            flush: Flush the collection at the end of the stream
+            
+        Yields:
+            Per-document status dicts, then {"status": "done", ...}
+        """
+        jobs: List[Dict] = []      # documents not yet reported, in input order
+        buffer: List[Tuple[Dict, Dict]] = []  # (job, chunk) waiting to be embedded
+        totals = {"documents": 0, "succeeded": 0, "failed": 0, "chunks": 0}
+        
+        async def write_batch(batch: List[Tuple[Dict, Dict]]):
+            for job, _ in batch:
+                job["remaining"] -= 1
+            # Chunks of documents that already failed in an earlier batch are skipped
+            batch = [(job, chunk) for job, chunk in batch if "error" not in job]
+            if not batch:
+                return
+            try:
+                store_rows = await executors.inference.run(
+                    self.embed_chunks, [chunk for _, chunk in batch]
+                )
+                ids = await executors.io.run(self.vector_store.insert_documents, store_rows)
+            except Exception as e:
+                for job, _ in batch:
+                    job["error"] = f"Processing failed: {str(e)}"
+                return
+            for (job, _), pk in zip(batch, ids):
+                job["inserted_ids"].append(pk)
+            for job in {id(job): job for job, _ in batch}.values():
+                self._invalidate_search_cache(job["document_id"], job["metadata"])
+        
+        async def finish_job(job: Dict) -> Dict:
+            if "error" in job and job["inserted_ids"]:
+                # Roll back the batches that did succeed; an upserted document
+                # keeps its previous chunks (deletes and updates were not applied)
+                try:
+                    await executors.io.run(self.vector_store.delete_by_ids, job["inserted_ids"])
+                except Exception as e:
+                    job["error"] += f"; rollback failed: {str(e)}"
+                self._invalidate_search_cache(job["document_id"], job["metadata"])
+            elif "error" not in job and (job["delete_ids"] or job["updates"]):
+                try:
+                    await executors.io.run(self.vector_store.update_chunk_fields, job["updates"])
+                    await executors.io.run(self.vector_store.delete_by_ids, job["delete_ids"])
+                except Exception as e:
+                    job["error"] = f"Deletion failed: {str(e)}"
+                self._invalidate_search_cache(job["document_id"], job["metadata"])
+            
+            totals["documents"] += 1
+            if "error" in job:
+                totals["failed"] += 1
+                return {"status": "error", "document_id": job["document_id"], "message": job["error"]}
+            
+            totals["succeeded"] += 1
+            totals["chunks"] += job["inserted"]
+            return {
+                "status": "success",
+                "document_id": job["document_id"],
+                "chunk_count": job["chunk_count"],
+                "inserted": job["inserted"],
+                "updated": len(job["updates"]),
+                "deleted": len(job["delete_ids"]),
+                "unchanged": job["chunk_count"] - job["inserted"] - len(job["updates"])
+            }
+        
+        async def drain_completed():
+            while jobs and jobs[0]["remaining"] == 0:
+                yield await finish_job(jobs.pop(0))
+        
+        async for document in documents:
+            document_id = document.get("document_id")
+            job = {"document_id": document_id, "metadata": document.get("metadata"),
+                   "remaining": 0, "delete_ids": [], "updates": [], "chunk_count": 0, "inserted": 0,
+                   "inserted_ids": []}
+            jobs.append(job)
+            
+            if "error" in document:
+                job["error"] = document["error"]
+            else:
+                try:
+                    chunks_data = await executors.chunking.run(
+                        self.chunking_service.chunk_with_metadata,
+                        text=document["text"],
+                        document_id=document_id,
+                        metadata=document.get("metadata")
+                    )
+                    if not chunks_data:
+                        job["error"] = "No chunks generated from text"
+                    else:
+                        to_insert = chunks_data
+                        if document.get("mode") == "upsert":
+                            stored = await executors.io.run(self.vector_store.get_chunk_hashes, document_id)
+                            to_insert, job["delete_ids"], job["updates"] = self._diff_chunks(chunks_data, stored)
+                        
+                        job["chunk_count"] = len(chunks_data)
+                        job["inserted"] = len(to_insert)
+                        job["remaining"] = len(to_insert)
+                        buffer.extend((job, chunk) for chunk in to_insert)
+                except Exception as e:
+                    job["error"] = f"Processing failed: {str(e)}"
+            
+            while len(buffer) >= batch_size:
+                batch, buffer = buffer[:batch_size], buffer[batch_size:]
+                await write_batch(batch)
+            
+            async for result in drain_completed():
+                yield result
+        
+        if buffer:
+            await write_batch(buffer)
+            buffer = []
+        async for result in drain_completed():
+            yield result
+        
+        # Single flush for the whole stream
+        flush_error = None
+        if flush and totals["succeeded"]:
+            try:
+                await executors.io.run(self.vector_store.flush)
+            except Exception as e:
+                flush_error = f"Flush failed: {str(e)}"
+        
+        yield {
+            "status": "error" if flush_error else "done",
+            **totals,
+            **({"message": flush_error} if flush_error else {})
+        }
+    
+    def embed_chunks(self, chunks_data: List[Dict]) -> List[Dict]:
+        """
+        Generate embeddings for chunks and build vector store rows
+        
+        Args:
+            chunks_data: Chunks produced by ChunkingService.chunk_with_metadata
+            
+        Returns:
+            Rows ready for VectorStore.insert_documents
+        """
+        texts = [chunk["text"] for chunk in chunks_data]
+        dense_vecs, sparse_vecs = self.embedding_service.encode_batch_hybrid(texts)
+        
+        store_rows = []
+        for i, chunk in enumerate(chunks_data):
+            # Pruned after the embedding cache, so changing the limits needs no cache flush
+            sparse = sparse_vecs[i].prune(
+                top_k=settings.sparse_top_k,
+                min_weight=settings.sparse_min_weight
+            )
+            self._sparse_nnz_hist.observe(sparse.nnz)
+            store_rows.append({
+                "document_id": chunk["document_id"],
+                "text": chunk["text"],
+                "chunk_hash": chunk["chunk_hash"],
+                **self._scalar_fields(chunk),
+                "dense_vector": dense_vecs[i],  # converted to the storage type by the store
+                "sparse_vector": self.vector_store.convert_sparse_vector(sparse)
+            })
+        return store_rows
+    
+    def _invalidate_search_cache(self, document_id: str, metadata: Optional[Dict] = None):
+        """
+        Bump search cache generations after a write to a document
+        
+        Args:
+            document_id: Written document
+            metadata: Metadata of the written chunks (None when the room is unknown, e.g. deletes)
+        """
+        if self.search_cache is None:
+            return
+        room_id = None if metadata is None else self._filter_value(metadata.get("room_id"))
+        self.search_cache.invalidate(document_id, room_id)
+    
+    @staticmethod
+    def _filter_value(value) -> str:
+        """Scalar filter column value for a metadata entry"""
+        return "" if value is None else str(value)
+    
     def search(
         self,
         query: str,
         top_k: int = 5,
         search_type: str = "hybrid",
         dense_weight: float = 0.5,
-        sparse_weight: float = 0.5
+        sparse_weight: float = 0.5,
+        consistency_level: Optional[str] = None,
+        fusion: str = "rrf",
+        hybrid_engine: Optional[str] = None,
+        filters: Optional[Dict] = None,
+        dense_params: Optional[Dict] = None,
+        rerank: Optional[bool] = None,
+        rerank_candidates: Optional[int] = None,
+        rerank_budget_ms: Optional[float] = None
     ) -> List[Dict]:
         """
         Search for relevant documents
@@ -135,69 +796,180 @@ class RAGOrchestrator:
             search_type: "hybrid", "dense", or "sparse"
             dense_weight: Weight for dense search (hybrid only)
             sparse_weight: Weight for sparse search (hybrid only)
+            consistency_level: Optional Milvus consistency level ("Strong" for read-your-writes)
+            fusion: "rrf" or "weighted" (hybrid only)
+            hybrid_engine: "native" (server-side fusion) or "python" (default: settings)
+            filters: Field/metadata filters evaluated by the vector store, e.g.
+                {"room_id": "42", "doc_type": ["pdf", "md"], "metadata": {"lang": "ru"}}
+            dense_params: Dense ANN overrides, e.g. {"ef": 200} or {"nprobe": 32, "rerank": True}
+            rerank: Re-score candidates with the reranker (default: on when one is configured)
+            rerank_candidates: Fused results to re-score (default: settings)
+            rerank_budget_ms: Reranking latency budget (default: settings)
             
         Returns:
             List of search results with scores
         """
         try:
+            candidates = self.rerank_candidates(top_k, rerank, rerank_candidates)
+            
             # Generate query embeddings
+            query_dense, query_sparse = None, None
             if search_type in ["hybrid", "dense"]:
                 query_dense = self.embedding_service.encode_dense(query)
             
             if search_type in ["hybrid", "sparse"]:
                 query_sparse = self.embedding_service.encode_sparse(query)
             
-            # Perform search based on type
-            if search_type == "dense":
-                results = self.milvus_service.dense_search(
-                    query_vector=query_dense,
-                    top_k=top_k
-                )
-            elif search_type == "sparse":
-                results = self.milvus_service.sparse_search(
-                    query_sparse=query_sparse,
-                    top_k=top_k
-                )
-            elif search_type == "hybrid":
-                results = self.milvus_service.hybrid_search(
-                    query_dense=query_dense,
-                    query_sparse=query_sparse,
-                    top_k=top_k,
-                    dense_weight=dense_weight,
-                    sparse_weight=sparse_weight
+            results = self.search_with_embeddings(
+                query_dense=query_dense,
+                query_sparse=query_sparse,
+                top_k=max(top_k, candidates),
+                search_type=search_type,
+                dense_weight=dense_weight,
+                sparse_weight=sparse_weight,
+                consistency_level=consistency_level,
+                fusion=fusion,
+                hybrid_engine=hybrid_engine,
+                filters=filters,
+                dense_params=dense_params
+            )
+            if candidates:
+                results, _ = self.reranker.rerank(
+                    query,
+                    results,
+                    top_k,
+                    candidates=candidates,
+                    budget_ms=rerank_budget_ms
                 )
-            else:
-                raise ValueError(f"Invalid search_type: {search_type}")
-            
             return results
             
         except Exception as e:
             print(f"❌ Search failed: {e}")
             return []
     
-    def get_document_chunks(self, document_id: str) -> List[Dict]:
+    def rerank_candidates(
+        self,
+        top_k: int,
+        rerank: Optional[bool] = None,
+        candidates: Optional[int] = None
+    ) -> int:
         """
-        Retrieve all chunks for a specific document
+        Number of fused results to fetch and re-score for a search
+        
+        Args:
+            top_k: Results the caller wants
+            rerank: Per-request switch (None: on when a reranker is configured)
+            candidates: Per-request candidate count (default: settings)
+            
+        Returns:
+            Candidate count (at least top_k), 0 when the search is not reranked
+            
+        Raises:
+            ValueError: If reranking is requested but no reranker is configured
+        """
+        if rerank is False:
+            return 0
+        if self.reranker is None:
+            if rerank:
+                raise ValueError("Reranking is not enabled on this service (RAG_RERANKER)")
+            return 0
+        return max(top_k, candidates or self.reranker.candidates)
+    
+    def search_with_embeddings(
+        self,
+        query_dense: Optional[np.ndarray],
+        query_sparse: Optional[SparseVector],
+        top_k: int = 5,
+        search_type: str = "hybrid",
+        dense_weight: float = 0.5,
+        sparse_weight: float = 0.5,
+        consistency_level: Optional[str] = None,
+        fusion: str = "rrf",
+        hybrid_engine: Optional[str] = None,
+        filters: Optional[Dict] = None,
+        dense_params: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Search with query embeddings that were already computed
+        (e.g. by the micro-batcher)
+        
+        Args:
+            query_dense: Dense query vector (hybrid/dense only)
+            query_sparse: Sparse query vector (hybrid/sparse only)
+            top_k: Number of results to return
+            search_type: "hybrid", "dense", or "sparse"
+            dense_weight: Weight for dense search (hybrid only)
+            sparse_weight: Weight for sparse search (hybrid only)
+            consistency_level: Optional Milvus consistency level ("Strong" for read-your-writes)
+            fusion: "rrf" or "weighted" (hybrid only)
+            hybrid_engine: "native" (server-side fusion) or "python" (default: settings)
+            filters: Field/metadata filters evaluated by the vector store, e.g.
+                {"room_id": "42", "doc_type": ["pdf", "md"], "metadata": {"lang": "ru"}}
+            dense_params: Dense ANN overrides, e.g. {"ef": 200} or {"nprobe": 32, "rerank": True}
+            
+        Returns:
+            List of search results with scores
+        """
+        if query_sparse is not None:
+            query_sparse = query_sparse.prune(top_k=settings.sparse_query_top_k)
+        
+        if search_type == "dense":
+            return self.vector_store.dense_search(
+                query_vector=query_dense,
+                top_k=top_k,
+                consistency_level=consistency_level,
+                filters=filters,
+                dense_params=dense_params
+            )
+        elif search_type == "sparse":
+            return self.vector_store.sparse_search(
+                query_sparse=query_sparse,
+                top_k=top_k,
+                consistency_level=consistency_level,
+                filters=filters
+            )
+        elif search_type == "hybrid":
+            return self.vector_store.hybrid_search(
+                query_dense=query_dense,
+                query_sparse=query_sparse,
+                top_k=top_k,
+                dense_weight=dense_weight,
+                sparse_weight=sparse_weight,
+                consistency_level=consistency_level,
+                engine=hybrid_engine or settings.hybrid_engine,
+                fusion=fusion,
+                filters=filters,
+                dense_params=dense_params
+            )
+        else:
+            raise ValueError(f"Invalid search_type: {search_type}")
+    
+    def get_document_chunks(
+        self,
+        document_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Dict:
+        """
+        Retrieve chunks of a specific document with a scalar query
         
         Args:
             document_id: Document ID to retrieve
+            offset: Number of chunks to skip
+            limit: Maximum number of chunks to return (None for all)
             
         Returns:
-            List of chunks belonging to the document
+            Dict with total chunk count and the requested page of chunks
         """
         try:
-            # Use dense search with document filter
-            # We need to provide a dummy query vector
-            dummy_vector = np.zeros(1024)
-            results = self.milvus_service.dense_search(
-                query_vector=dummy_vector,
-                top_k=1000,  # Get all chunks
-                document_id_filter=document_id
+            return self.vector_store.get_document_chunks(
+                document_id,
+                offset=offset,
+                limit=limit
             )
-            return results
         except Exception as e:
             print(f"❌ Failed to get document chunks: {e}")
-            return []
+            return {"total": 0, "chunks": []}
     
     def delete_document(self, document_id: str) -> Dict:
         """
@@ -210,7 +982,10 @@ class RAGOrchestrator:
             Deletion result
         """
         try:
-            success = self.milvus_service.delete_by_document_id(document_id)
+            try:
+                success = self.vector_store.delete_by_document_id(document_id)
+            finally:
+                self._invalidate_search_cache(document_id)
             
             if success:
                 return {
@@ -232,6 +1007,10 @@ class RAGOrchestrator:
                 "message": f"Deletion failed: {str(e)}"
             }
     
+    def close(self):
+        """Flush outstanding writes and release resources"""
+        self.vector_store.close()
+    
     def get_stats(self) -> Dict:
         """
         Get RAG system statistics
@@ -240,10 +1019,11 @@ class RAGOrchestrator:
             System statistics
         """
         try:
-            collection_stats = self.milvus_service.get_collection_stats()
+            collection_stats = self.vector_store.get_collection_stats()
             return {
                 "status": "healthy",
                 "model_loaded": True,
+                "reranker": self.reranker.scorer.name if self.reranker is not None else None,
                 "collection": collection_stats
             }
         except Exception as e:
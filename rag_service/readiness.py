@@ -0,0 +1,120 @@
+"""
+Service Readiness
+Runs slow startup work (model download/load/warmup, vector store connection)
+in the background and lets requests wait for it with a bounded timeout
+"""
+
+import asyncio
+import time
+from threading import Thread
+from typing import Callable, Dict, Optional
+
+
+class Readiness:
+    """
+    Background startup state
+
+    start() runs load_fn in a daemon thread so the server accepts connections
+    (and answers liveness probes) immediately. Requests that need the loaded
+    services call wait() first. A failed load is retried with exponential
+    backoff; after `retries` failed retries the state is failed for good and
+    the liveness probe reports it, so the process gets restarted.
+    """
+
+    def __init__(
+        self,
+        name: str = "model",
+        retries: int = 5,
+        backoff_seconds: float = 5.0,
+        max_backoff_seconds: float = 60.0
+    ):
+        self.name = name
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.error: Optional[str] = None
+        self.last_error: Optional[str] = None  # error of the latest attempt, kept while retrying
+        self.attempts = 0
+        self.started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self.ready_at is not None
+
+    @property
+    def is_failed(self) -> bool:
+        return self.error is not None
+
+    def start(self, load_fn: Callable[[], None]):
+        """Start loading (must be called inside the running event loop)"""
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self.started_at = time.monotonic()
+        Thread(target=self._run, args=(load_fn,), name=f"{self.name}-loader", daemon=True).start()
+
+    def _run(self, load_fn: Callable[[], None]):
+        try:
+            while True:
+                self.attempts += 1
+                try:
+                    load_fn()
+                except Exception as e:
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    if self.attempts > self.retries:
+                        self.error = self.last_error
+                        print(f"❌ {self.name} failed to load after {self.attempts} attempts: {self.error}")
+                        return
+                    delay = min(self.backoff_seconds * 2 ** (self.attempts - 1), self.max_backoff_seconds)
+                    print(f"⚠️ {self.name} failed to load: {self.last_error}, retrying in {delay:.0f}s")
+                    time.sleep(delay)
+                    continue
+                self.ready_at = time.monotonic()
+                print(f"✅ {self.name} ready in {self.ready_at - self.started_at:.1f}s")
+                return
+        finally:
+            # Wake waiters on success and on final failure
+            self._loop.call_soon_threadsafe(self._event.set)
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Wait until startup finished
+
+        Args:
+            timeout: Maximum seconds to wait (0 = do not wait)
+
+        Returns:
+            True if the services are ready
+        """
+        if self.is_ready or self.is_failed or self._event is None:
+            return self.is_ready
+        if timeout > 0:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.is_ready
+
+    def status(self) -> Dict:
+        if self.is_ready:
+            state = "ready"
+        elif self.is_failed:
+            state = "failed"
+        elif self.started_at is not None:
+            state = "loading"
+        else:
+            state = "not_started"
+
+        now = time.monotonic()
+        return {
+            "status": state,
+            "error": self.error or (None if self.is_ready else self.last_error),
+            "attempts": self.attempts,
+            "loading_seconds": (
+                round((self.ready_at or now) - self.started_at, 1)
+                if self.started_at is not None else None
+            )
+        }
@@ -0,0 +1,192 @@
+"""
+Second-Stage Reranking
+Re-scores the top fused search candidates with BGE-M3 ColBERT multi-vector
+similarity or a cross-encoder, within a candidate and latency budget
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import registry
+
+
+RERANK_MS_BUCKETS = (5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+RERANK_CANDIDATE_BUCKETS = (5, 10, 20, 50, 100, 200)
+
+
+def colbert_score(query_vecs: np.ndarray, passage_vecs: np.ndarray) -> float:
+    """
+    Late-interaction score as in FlagEmbedding's BGEM3FlagModel.colbert_score
+
+    Every query token takes its best matching passage token; the score is the
+    mean of those maxima (vectors are already L2-normalized by the model).
+    """
+    if not len(query_vecs) or not len(passage_vecs):
+        return 0.0
+    return float((query_vecs @ passage_vecs.T).max(axis=1).mean())
+
+
+class ColbertScorer:
+    """
+    Scores passages with the BGE-M3 ColBERT head of the embedding model
+
+    No second model is loaded. The query is encoded in the same forward pass
+    as each batch of passages, so reranking costs one model call per batch.
+    """
+
+    name = "colbert"
+
+    def __init__(self, embedding_service):
+        self.embedding_service = embedding_service
+
+    def score(self, query: str, passages: List[str]) -> np.ndarray:
+        vecs = self.embedding_service.encode_colbert([query] + passages)
+        return np.array([colbert_score(vecs[0], p) for p in vecs[1:]], dtype=np.float32)
+
+
+class CrossEncoderScorer:
+    """
+    Scores (query, passage) pairs with a cross-encoder (FlagEmbedding FlagReranker)
+
+    The model is loaded in the process that creates the scorer, i.e. once per
+    HTTP worker in multi-worker mode.
+    """
+
+    name = "cross-encoder"
+
+    def __init__(self, model_name: str, max_length: int = 512):
+        import torch
+        from FlagEmbedding import FlagReranker
+
+        print(f"🚀 Loading reranker {model_name}...")
+        self.model = FlagReranker(model_name, use_fp16=torch.cuda.is_available())
+        self.max_length = max_length
+        print("✅ Reranker loaded successfully!")
+
+    def score(self, query: str, passages: List[str]) -> np.ndarray:
+        scores = self.model.compute_score(
+            [[query, passage] for passage in passages],
+            batch_size=len(passages),
+            max_length=self.max_length,
+            normalize=True
+        )
+        return np.atleast_1d(np.asarray(scores, dtype=np.float32))
+
+
+class Reranker:
+    """
+    Re-orders the best fused results of a search
+
+    Up to `candidates` results are scored in batches of `batch_size`. Before
+    each batch the latency budget is checked; once it is spent, reranking
+    stops and the candidates that were not scored keep their fused order
+    after the scored ones. Since candidates arrive in fused order, the
+    batches that do get scored are always the most promising ones.
+    """
+
+    def __init__(
+        self,
+        scorer,
+        candidates: int = 30,
+        batch_size: int = 16,
+        budget_ms: float = 200.0
+    ):
+        """
+        Initialize the reranker
+
+        Args:
+            scorer: ColbertScorer or CrossEncoderScorer
+            candidates: Fused results to re-score per query
+            batch_size: Passages per model call
+            budget_ms: Default latency budget per query (0 = unlimited)
+        """
+        self.scorer = scorer
+        self.candidates = candidates
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+
+        self._latency_hist = registry.histogram("rerank_ms", RERANK_MS_BUCKETS)
+        self._scored_hist = registry.histogram("rerank_scored_candidates", RERANK_CANDIDATE_BUCKETS)
+        self._budget_exceeded = registry.counter("rerank_budget_exceeded")
+
+    def rerank(
+        self,
+        query: str,
+        results: List[Dict],
+        top_k: int,
+        candidates: Optional[int] = None,
+        budget_ms: Optional[float] = None,
+        started_at: Optional[float] = None
+    ) -> Tuple[List[Dict], bool]:
+        """
+        Re-score and re-order search results
+
+        Args:
+            query: Search query text
+            results: Fused results, best first
+            top_k: Number of results to return
+            candidates: Results to re-score (default: the reranker's)
+            budget_ms: Latency budget for this query (default: the reranker's)
+            started_at: time.perf_counter() the budget counts from (default: now,
+                i.e. when the rerank job starts running, so executor queue wait
+                does not eat into the budget)
+
+        Returns:
+            Tuple of (top_k results, whether every candidate was scored).
+            Scored results carry a "rerank_score".
+        """
+        started_at = time.perf_counter() if started_at is None else started_at
+        budget_ms = self.budget_ms if budget_ms is None else budget_ms
+        deadline = started_at + budget_ms / 1000 if budget_ms > 0 else None
+
+        candidates = results[:candidates or self.candidates]
+        scores: List[float] = []
+        while len(scores) < len(candidates):
+            if deadline is not None and time.perf_counter() >= deadline:
+                self._budget_exceeded.inc()
+                break
+            batch = candidates[len(scores):len(scores) + self.batch_size]
+            scores.extend(self.scorer.score(query, [result["text"] for result in batch]).tolist())
+
+        self._latency_hist.observe((time.perf_counter() - started_at) * 1000)
+        self._scored_hist.observe(len(scores))
+
+        scored = sorted(
+            ({**result, "rerank_score": score} for result, score in zip(candidates, scores)),
+            key=lambda result: result["rerank_score"],
+            reverse=True
+        )
+        reranked = scored + results[len(scores):]
+        return reranked[:top_k], len(scores) == len(candidates)
+
+
+def create_reranker(
+    reranker_type: str,
+    embedding_service,
+    model_name: str = "BAAI/bge-reranker-v2-m3",
+    candidates: int = 30,
+    batch_size: int = 16,
+    budget_ms: float = 200.0,
+    max_length: int = 512
+) -> Reranker:
+    """
+    Build the configured reranker
+
+    Args:
+        reranker_type: "colbert" (BGE-M3 multi-vector) or "cross-encoder"
+        embedding_service: Embedding service (colbert only)
+        model_name: Cross-encoder model (cross-encoder only)
+        candidates: Fused results to re-score per query
+        batch_size: Passages per model call
+        budget_ms: Default latency budget per query (0 = unlimited)
+        max_length: Maximum tokens per (query, passage) pair (cross-encoder only)
+    """
+    if reranker_type == "colbert":
+        scorer = ColbertScorer(embedding_service)
+    elif reranker_type == "cross-encoder":
+        scorer = CrossEncoderScorer(model_name, max_length=max_length)
+    else:
+        raise ValueError(f"Invalid reranker: {reranker_type}")
+    return Reranker(scorer, candidates=candidates, batch_size=batch_size, budget_ms=budget_ms)
@@ -3,11 +3,22 @@ FastAPI Routes for RAG Microservice
 Provides endpoints for document management and search
 """
 
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+import asyncio
+import codecs
+import json
+import re
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from typing import Annotated, AsyncIterator, List, Optional, Dict, Literal, Union
 
 from orchestrator import RAGOrchestrator
+from batching_service import EmbeddingBatcher
+from executor_service import ExecutorPools, BackpressureError
+from config import settings
+from metrics import registry
+from readiness import Readiness
+from codec import CodecRoute, codec_info, decompressor, encode_response, media_type
 
 
 # Pydantic models for request/response
@@ -16,6 +27,46 @@ class DocumentRequest(BaseModel):
     text: str = Field(..., description="Text content to index")
     document_id: str = Field(..., description="Unique document identifier")
     metadata: Optional[Dict] = Field(None, description="Optional metadata")
+    mode: Literal["insert", "upsert"] = Field(
+        "insert",
+        description="insert: append all chunks; upsert: diff against stored chunks and only write changes"
+    )
+
+
+# An empty "any of" list would match nothing (or fail to parse in Milvus)
+FilterValue = Union[str, Annotated[List[str], Field(min_length=1)]]
+
+
+class SearchFilters(BaseModel):
+    """Filters pushed down into the vector store search (a list means "any of")"""
+    document_id: Optional[FilterValue] = None
+    room_id: Optional[FilterValue] = None
+    user_id: Optional[FilterValue] = None
+    doc_type: Optional[FilterValue] = None
+    metadata: Optional[Dict[str, Union[str, int, float, bool]]] = Field(
+        None,
+        description="Equality filters on keys of the chunk metadata JSON"
+    )
+    
+    @field_validator("metadata")
+    @classmethod
+    def validate_metadata_keys(cls, value):
+        for key in value or {}:
+            if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", key):
+                raise ValueError(f"Invalid metadata filter key: {key}")
+        return value
+
+
+class DenseSearchParams(BaseModel):
+    """Per-request dense ANN parameters (unset = service defaults)"""
+    ef: Optional[int] = Field(None, ge=1, le=4096, description="HNSW candidate list size")
+    nprobe: Optional[int] = Field(None, ge=1, le=65536, description="IVF clusters to probe")
+    search_list: Optional[int] = Field(None, ge=1, le=4096, description="DISKANN candidate list size")
+    rerank: Optional[bool] = Field(
+        None,
+        description="Re-score binary/quantized candidates with full-precision vectors"
+    )
+    rerank_multiplier: Optional[int] = Field(None, ge=1, le=20, description="Candidates per result when re-ranking")
 
 
 class SearchRequest(BaseModel):
@@ -25,6 +76,58 @@ class SearchRequest(BaseModel):
     search_type: str = Field("hybrid", description="Search type: hybrid, dense, or sparse")
     dense_weight: float = Field(0.5, ge=0.0, le=1.0, description="Weight for dense search")
     sparse_weight: float = Field(0.5, ge=0.0, le=1.0, description="Weight for sparse search")
+    consistency_level: Optional[Literal["Strong", "Bounded", "Session", "Eventually"]] = Field(
+        None,
+        description="Milvus consistency level; use Strong to read your own recent writes"
+    )
+    fusion: Literal["rrf", "weighted"] = Field(
+        "rrf",
+        description="Hybrid fusion: rrf (rank-based, weights scale each leg) or weighted (score-based)"
+    )
+    hybrid_engine: Optional[Literal["native", "python"]] = Field(
+        None,
+        description="native: single Milvus hybrid_search call; python: two searches fused in the service"
+    )
+    filters: Optional[SearchFilters] = Field(
+        None,
+        description="Restrict the search by document, room, user, doc type or metadata"
+    )
+    room_id: Optional[str] = Field(
+        None,
+        description="Tenant (room) to search in; only that room's partition is scanned"
+    )
+    dense_params: Optional[DenseSearchParams] = Field(
+        None,
+        description="Dense index search parameters (ef, nprobe, search_list, rerank)"
+    )
+    rerank: Optional[bool] = Field(
+        None,
+        description="Re-score the top candidates with the second-stage reranker (default: on when configured)"
+    )
+    rerank_candidates: Optional[int] = Field(
+        None,
+        ge=1,
+        le=200,
+        description="Fused results to re-score before returning top_k"
+    )
+    rerank_budget_ms: Optional[float] = Field(
+        None,
+        ge=0,
+        le=10000,
+        description="Reranking latency budget; unscored candidates keep their fused order (0 = no limit)"
+    )
+    
+    def search_filters(self) -> Optional[Dict]:
+        """Filters for the vector store, with room_id folded in"""
+        filters = self.filters.model_dump(exclude_none=True) if self.filters else {}
+        if self.room_id is not None:
+            filters["room_id"] = self.room_id
+        return filters or None
+
+
+class SearchBatchRequest(BaseModel):
+    """Request model for several searches in one call"""
+    searches: List[SearchRequest] = Field(..., min_length=1, max_length=64)
 
 
 class DocumentResponse(BaseModel):
@@ -33,6 +136,10 @@ class DocumentResponse(BaseModel):
     document_id: str
     message: str
     chunk_count: Optional[int] = None
+    inserted: Optional[int] = None
+    updated: Optional[int] = None
+    deleted: Optional[int] = None
+    unchanged: Optional[int] = None
 
 
 class SearchResult(BaseModel):
@@ -41,6 +148,18 @@ class SearchResult(BaseModel):
     document_id: str
     score: float
     id: Optional[int] = None
+    chunk_index: Optional[int] = None
+    total_chunks: Optional[int] = None
+    metadata: Optional[Dict] = None
+    rerank_score: Optional[float] = None
+
+
+class SearchBatchItem(BaseModel):
+    """Outcome of one search of a batch (errors are reported per search)"""
+    status_code: int = 200
+    detail: Optional[str] = None
+    retry_after: Optional[int] = None
+    results: List[SearchResult] = []
 
 
 class HealthResponse(BaseModel):
@@ -51,12 +170,25 @@ class HealthResponse(BaseModel):
     collection_stats: Optional[Dict] = None
 
 
-# Initialize router
-router = APIRouter()
+# Initialize router (bodies may be msgpack and/or gzip/zstd compressed, see codec.py)
+router = APIRouter(route_class=CodecRoute)
 
 # Initialize RAG orchestrator (singleton-like, created once)
 rag_orchestrator: Optional[RAGOrchestrator] = None
 
+# Query micro-batcher (created lazily, stopped on shutdown)
+embedding_batcher: Optional[EmbeddingBatcher] = None
+
+# Executor pools for blocking work (created lazily, shut down on shutdown)
+executor_pools: Optional[ExecutorPools] = None
+
+# Background startup: model load + vector store connection
+readiness = Readiness(
+    name="RAG services",
+    retries=settings.startup_retries,
+    backoff_seconds=settings.startup_retry_backoff_seconds
+)
+
 
 def get_orchestrator() -> RAGOrchestrator:
     """Get or create RAG orchestrator instance"""
@@ -66,7 +198,58 @@ def get_orchestrator() -> RAGOrchestrator:
     return rag_orchestrator
 
 
-@router.post("/documents", response_model=DocumentResponse)
+def get_executors() -> ExecutorPools:
+    """Get or create the executor pools"""
+    global executor_pools
+    if executor_pools is None:
+        executor_pools = ExecutorPools()
+    return executor_pools
+
+
+def get_batcher() -> EmbeddingBatcher:
+    """Get or create the query embedding micro-batcher"""
+    global embedding_batcher
+    if embedding_batcher is None:
+        embedding_batcher = EmbeddingBatcher(
+            embedding_service=get_orchestrator().embedding_service,
+            max_batch_size=settings.batch_max_size,
+            max_wait_ms=settings.batch_max_wait_ms,
+            executor=get_executors().inference,
+            max_queue=settings.batch_max_queue
+        )
+    return embedding_batcher
+
+
+def start_background_startup():
+    """Load the model and connect to the vector store without blocking startup"""
+    readiness.start(get_orchestrator)
+
+
+async def require_ready():
+    """
+    Dependency for endpoints that need the model or the vector store
+    
+    Waits up to RAG_READY_WAIT_SECONDS for startup, then rejects with 503
+    and Retry-After instead of holding the request until the model loads.
+    """
+    if await readiness.wait(settings.ready_wait_seconds):
+        return
+    if readiness.is_failed:
+        raise BackpressureError(f"Service failed to start: {readiness.error}", status_code=503, retry_after=30)
+    raise BackpressureError("Model is loading, retry later", status_code=503, retry_after=5)
+
+
+async def shutdown_workers():
+    """Stop the micro-batcher, shut down the executor pools and flush writes"""
+    if embedding_batcher is not None:
+        await embedding_batcher.stop()
+    if executor_pools is not None:
+        executor_pools.shutdown(wait=True)
+    if rag_orchestrator is not None:
+        rag_orchestrator.close()
+
+
+@router.post("/documents", response_model=DocumentResponse, dependencies=[Depends(require_ready)])
 async def index_document(request: DocumentRequest):
     """
     Index a text document in the RAG system
@@ -75,14 +258,23 @@ async def index_document(request: DocumentRequest):
     1. Chunks the text into segments
     2. Generates embeddings (dense + sparse)
     3. Stores in Milvus vector database
+    
+    With mode="upsert" only chunks whose content changed are
+    embedded, inserted or deleted.
     """
     try:
         orchestrator = get_orchestrator()
         
-        result = orchestrator.process_text(
+        index = (
+            orchestrator.upsert_text_async
+            if request.mode == "upsert"
+            else orchestrator.process_text_async
+        )
+        result = await index(
             text=request.text,
             document_id=request.document_id,
-            metadata=request.metadata
+            metadata=request.metadata,
+            executors=get_executors()
         )
         
         if result["status"] == "error":
@@ -93,7 +285,7 @@ async def index_document(request: DocumentRequest):
         
         return DocumentResponse(**result)
         
-    except HTTPException:
+    except (HTTPException, BackpressureError):
         raise
     except Exception as e:
         raise HTTPException(
@@ -102,8 +294,220 @@ async def index_document(request: DocumentRequest):
         )
 
 
-@router.post("/search", response_model=List[SearchResult])
-async def search_documents(request: SearchRequest):
+class _BodyQueue:
+    """
+    Request body pumped into a bounded queue by a task started in the endpoint
+    
+    With ASGI spec < 2.4 StreamingResponse listens for http.disconnect by
+    calling receive() next to the body generator, and that listener swallows
+    http.request messages, so a body read inside the response loses chunks.
+    Here the pump is the only receiver until the body ends; the response's
+    listener gets receive(), which waits for the pump and then reports the
+    disconnect it saw (or keeps listening on the connection).
+    Raw ASGI messages bypass CodecRequest.stream(), so gzip / zstd bodies are
+    decoded here.
+    """
+    
+    def __init__(self, request: Request, maxsize: int = 64):
+        self._receive = request.receive
+        encoding = media_type(request.headers.get("content-encoding"))
+        # 415 for an unsupported encoding before the response starts
+        self._decode = decompressor(encoding) if encoding not in ("", "identity") else None
+        self._chunks: asyncio.Queue = asyncio.Queue(maxsize)
+        self._done = asyncio.Event()
+        self._disconnect: Optional[Dict] = None
+        self._error: Optional[Exception] = None
+        self.task = asyncio.create_task(self._pump())
+    
+    async def _pump(self):
+        try:
+            while True:
+                message = await self._receive()
+                if message["type"] == "http.disconnect":
+                    self._disconnect = message
+                    break
+                body = message.get("body", b"")
+                if body and self._decode is not None:
+                    body = self._decode(body)
+                if body:
+                    await self._chunks.put(body)
+                if not message.get("more_body", False):
+                    if self._decode is not None:
+                        tail = self._decode(None)
+                        if tail:
+                            await self._chunks.put(tail)
+                    break
+        except Exception as e:
+            self._error = e  # e.g. a corrupt compressed body, raised by stream()
+        finally:
+            self._done.set()
+        await self._chunks.put(None)
+    
+    async def stream(self) -> AsyncIterator[bytes]:
+        """Decoded body pieces in order (ends early if the client disconnects)"""
+        while (piece := await self._chunks.get()) is not None:
+            yield piece
+        if self._error is not None:
+            raise self._error
+    
+    async def receive(self) -> Dict:
+        """ASGI receive for the response: only called once the body is read"""
+        await self._done.wait()
+        if self._disconnect is not None:
+            return self._disconnect
+        return await self._receive()
+
+
+class _BodyQueueStreamingResponse(StreamingResponse):
+    """StreamingResponse whose disconnect listener receives through a _BodyQueue"""
+    
+    def __init__(self, content, body: _BodyQueue, **kwargs):
+        super().__init__(content, **kwargs)
+        self.body = body
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, self.body.receive, send)
+        finally:
+            self.body.task.cancel()
+
+
+async def _read_ndjson_documents(body: AsyncIterator[bytes]) -> AsyncIterator[Dict]:
+    """
+    Parse an NDJSON request body into document dicts as it arrives
+    Invalid lines are yielded as {"document_id": ..., "error": ...}
+    """
+    buffer = b""
+    line_number = 0
+    
+    def parse(line: bytes) -> Optional[Dict]:
+        if not line.strip():
+            return None
+        try:
+            return DocumentRequest.model_validate_json(line).model_dump()
+        except ValidationError as e:
+            try:
+                document_id = json.loads(line).get("document_id")
+            except Exception:
+                document_id = None
+            return {
+                "document_id": document_id,
+                "error": f"Invalid document on line {line_number}: {e.errors(include_url=False)}"
+            }
+    
+    async for piece in body:
+        buffer += piece
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            document = parse(line)
+            if document is not None:
+                yield document
+    
+    line_number += 1
+    document = parse(buffer)
+    if document is not None:
+        yield document
+
+
+@router.post("/documents/bulk", dependencies=[Depends(require_ready)])
+async def index_documents_bulk(
+    request: Request,
+    flush: bool = Query(True, description="Flush at the end (false: leave it to the flush policy)")
+):
+    """
+    Bulk-index a stream of documents
+    
+    Request body is NDJSON (application/x-ndjson), one DocumentRequest per line.
+    Chunks of many documents are embedded and inserted in large batches and
+    the collection is flushed once at the end. The response is NDJSON too:
+    one status line per document as soon as it is written, then a summary line.
+    Small frequent batches (e.g. coalesced client calls) should pass flush=false.
+    """
+    orchestrator = get_orchestrator()
+    executors = get_executors()
+    # The body is read here, not from inside the streaming response
+    body = _BodyQueue(request)
+    
+    async def stream_results():
+        async for result in orchestrator.process_bulk_async(
+            _read_ndjson_documents(body.stream()),
+            executors,
+            batch_size=settings.bulk_batch_size,
+            flush=flush
+        ):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    
+    return _BodyQueueStreamingResponse(stream_results(), body, media_type="application/x-ndjson")
+
+
+async def _read_text_body(request: Request) -> AsyncIterator[str]:
+    """Decode a UTF-8 request body piece by piece (multi-byte characters may span pieces)"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    async for piece in request.stream():
+        text = decoder.decode(piece)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+@router.post(
+    "/documents/stream",
+    response_model=DocumentResponse,
+    dependencies=[Depends(require_ready)]
+)
+async def index_document_stream(
+    request: Request,
+    document_id: str = Query(..., description="Unique document identifier"),
+    metadata: Optional[str] = Query(None, description="Optional metadata as a JSON object"),
+    replace: bool = Query(False, description="Delete the stored chunks of the document first")
+):
+    """
+    Index a large document streamed as the raw request body (UTF-8 text)
+    
+    The body is chunked, embedded and inserted in bounded windows while it
+    is being received, so memory use does not depend on the document size:
+    
+        curl -X POST --data-binary @book.txt \\
+            "http://localhost:8001/documents/stream?document_id=book-1"
+    """
+    try:
+        parsed_metadata = json.loads(metadata) if metadata else None
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid metadata JSON: {e}")
+    if parsed_metadata is not None and not isinstance(parsed_metadata, dict):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="metadata must be a JSON object")
+    
+    try:
+        result = await get_orchestrator().process_stream_async(
+            _read_text_body(request),
+            document_id=document_id,
+            metadata=parsed_metadata,
+            executors=get_executors(),
+            replace=replace
+        )
+        
+        if result["status"] == "error":
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=result["message"]
+            )
+        
+        return DocumentResponse(**result)
+        
+    except (HTTPException, BackpressureError):
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to index document: {str(e)}"
+        )
+
+
+@router.post("/search", response_model=List[SearchResult], dependencies=[Depends(require_ready)])
+async def search_documents(request: SearchRequest, http_request: Request):
     """
     Search for relevant documents using hybrid search
     
@@ -111,20 +515,119 @@ async def search_documents(request: SearchRequest):
     - hybrid: Combines dense and sparse search with RRF
     - dense: Semantic vector search only
     - sparse: Keyword-based search only
+    
+    With RAG_RERANKER set, the top rerank_candidates fused results are
+    re-scored by the reranker and the best top_k are returned.
+    
+    The response is msgpack when the client accepts application/msgpack and
+    gzip/zstd compressed when large and accepted.
+    """
+    results = await _search(request)
+    return encode_response(
+        [result.model_dump() for result in results],
+        http_request,
+        min_compress_bytes=settings.compress_min_bytes
+    )
+
+
+@router.post("/search/batch", response_model=List[SearchBatchItem], dependencies=[Depends(require_ready)])
+async def search_documents_batch(request: SearchBatchRequest, http_request: Request):
     """
+    Run several searches in one request
+    
+    Searches run concurrently, so their query encodes share micro-batches.
+    Results are returned in request order; a failed search gets its own
+    status_code / detail instead of failing the whole batch.
+    """
+    async def run(search: SearchRequest) -> SearchBatchItem:
+        try:
+            return SearchBatchItem(results=await _search(search))
+        except HTTPException as e:
+            return SearchBatchItem(status_code=e.status_code, detail=str(e.detail))
+        except BackpressureError as e:
+            return SearchBatchItem(status_code=e.status_code, detail=str(e), retry_after=e.retry_after)
+    
+    items = await asyncio.gather(*(run(search) for search in request.searches))
+    return encode_response(
+        [item.model_dump() for item in items],
+        http_request,
+        min_compress_bytes=settings.compress_min_bytes
+    )
+
+
+async def _search(request: SearchRequest) -> List[SearchResult]:
+    """Run one search (raises HTTPException / BackpressureError)"""
+    if request.search_type not in ("hybrid", "dense", "sparse"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid search_type: {request.search_type}"
+        )
+    
     try:
         orchestrator = get_orchestrator()
+        filters = request.search_filters()
+        candidates = orchestrator.rerank_candidates(request.top_k, request.rerank, request.rerank_candidates)
         
-        results = orchestrator.search(
-            query=request.query,
-            top_k=request.top_k,
+        # Repeated queries are answered from the result cache without
+        # embedding or touching the vector store. Strong reads always go
+        # to the store.
+        cache = orchestrator.search_cache
+        cache_key = None
+        if cache is not None and request.consistency_level != "Strong":
+            cache_key = cache.make_key(request.query, {
+                **request.model_dump(exclude={"query", "filters", "room_id"}),
+                "filters": filters
+            })
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return [SearchResult(**result) for result in cached]
+            # Generations are read before searching so concurrent writes invalidate the result
+            cache_token = cache.token(filters)
+        
+        # Concurrent queries share one model forward pass
+        query_dense, query_sparse = await get_batcher().encode(request.query)
+        
+        results = await get_executors().io.run(
+            orchestrator.search_with_embeddings,
+            query_dense=query_dense,
+            query_sparse=query_sparse,
+            top_k=max(request.top_k, candidates),
             search_type=request.search_type,
             dense_weight=request.dense_weight,
-            sparse_weight=request.sparse_weight
+            sparse_weight=request.sparse_weight,
+            consistency_level=request.consistency_level,
+            fusion=request.fusion,
+            hybrid_engine=request.hybrid_engine,
+            filters=filters,
+            dense_params=request.dense_params.model_dump(exclude_none=True) if request.dense_params else None
         )
         
+        # Reranking runs on the inference pool next to the query encodes; the
+        # budget clock starts when the job runs, not while it waits for a slot
+        reranked = True
+        if candidates:
+            results, reranked = await get_executors().inference.run(
+                orchestrator.reranker.rerank,
+                request.query,
+                results,
+                request.top_k,
+                candidates=candidates,
+                budget_ms=request.rerank_budget_ms
+            )
+        
+        # Results cut short by the rerank budget are not cached
+        if cache_key is not None and reranked:
+            cache.put(cache_key, cache_token, filters, results)
+        
         return [SearchResult(**result) for result in results]
         
+    except BackpressureError:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -132,28 +635,42 @@ async def search_documents(request: SearchRequest):
         )
 
 
-@router.get("/documents/{document_id}")
-async def get_document(document_id: str):
+@router.get("/documents/{document_id}", dependencies=[Depends(require_ready)])
+async def get_document(
+    document_id: str,
+    http_request: Request,
+    offset: int = Query(0, ge=0, description="Number of chunks to skip"),
+    limit: Optional[int] = Query(None, ge=1, le=10000, description="Page size (all chunks if omitted)")
+):
     """
-    Retrieve all chunks for a specific document
+    Retrieve chunks for a specific document (paginated)
     """
     try:
         orchestrator = get_orchestrator()
-        chunks = orchestrator.get_document_chunks(document_id)
+        page = await get_executors().io.run(
+            orchestrator.get_document_chunks,
+            document_id,
+            offset,
+            limit
+        )
         
-        if not chunks:
+        if page["total"] == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Document {document_id} not found"
             )
         
-        return {
+        # Plain dicts: encoded directly (orjson / msgpack), no jsonable_encoder pass over every chunk
+        return encode_response({
             "document_id": document_id,
-            "chunk_count": len(chunks),
-            "chunks": chunks
-        }
+            "total_chunks": page["total"],
+            "chunk_count": len(page["chunks"]),
+            "offset": offset,
+            "limit": limit,
+            "chunks": page["chunks"]
+        }, http_request, min_compress_bytes=settings.compress_min_bytes)
         
-    except HTTPException:
+    except (HTTPException, BackpressureError):
         raise
     except Exception as e:
         raise HTTPException(
@@ -162,14 +679,18 @@ async def get_document(document_id: str):
         )
 
 
-@router.delete("/documents/{document_id}", response_model=DocumentResponse)
+@router.delete(
+    "/documents/{document_id}",
+    response_model=DocumentResponse,
+    dependencies=[Depends(require_ready)]
+)
 async def delete_document(document_id: str):
     """
     Delete all chunks belonging to a document
     """
     try:
         orchestrator = get_orchestrator()
-        result = orchestrator.delete_document(document_id)
+        result = await get_executors().io.run(orchestrator.delete_document, document_id)
         
         if result["status"] == "error":
             raise HTTPException(
@@ -179,7 +700,7 @@ async def delete_document(document_id: str):
         
         return DocumentResponse(**result, chunk_count=None)
         
-    except HTTPException:
+    except (HTTPException, BackpressureError):
         raise
     except Exception as e:
         raise HTTPException(
@@ -198,9 +719,18 @@ async def health_check():
     - Milvus connection status
     - Collection statistics
     """
+    if not readiness.is_ready:
+        startup = readiness.status()
+        return HealthResponse(
+            status=startup["status"],
+            model_loaded=False,
+            milvus_connected=False,
+            collection_stats={"error": startup["error"]} if startup["error"] else None
+        )
+    
     try:
         orchestrator = get_orchestrator()
-        stats = orchestrator.get_stats()
+        stats = await get_executors().io.run(orchestrator.get_stats)
         
         return HealthResponse(
             status=stats["status"],
@@ -216,3 +746,28 @@ async def health_check():
             milvus_connected=False,
             collection_stats={"error": str(e)}
         )
+
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Service metrics
+    
+    Returns counters and histograms (e.g. embedding batch size and wait time)
+    and executor pool occupancy
+    """
+    embedding_cache = search_cache = None
+    if readiness.is_ready:
+        orchestrator = get_orchestrator()
+        embedding_cache = await get_executors().io.run(orchestrator.embedding_service.cache_stats)
+        if orchestrator.search_cache is not None:
+            search_cache = orchestrator.search_cache.stats()
+    return {
+        "metrics": registry.snapshot(),
+        "executors": get_executors().stats(),
+        "startup": readiness.status(),
+        "embedding_cache": embedding_cache,
+        "search_cache": search_cache,
+        "wire": codec_info()
+    }
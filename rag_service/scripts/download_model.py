@@ -0,0 +1,46 @@
+"""
+Download BGE-M3 into a local directory
+Used to pre-bake the model into an image so that startup never hits the network
+
+Usage (from rag_service/):
+    python scripts/download_model.py --output ./models/bge-m3
+    RAG_MODEL_PATH=./models/bge-m3 HF_HUB_OFFLINE=1 python main.py
+"""
+
+import argparse
+from pathlib import Path
+
+from huggingface_hub import snapshot_download
+
+
+# Weights and configs needed by BGEM3FlagModel (skips the ONNX/colbert extras)
+ALLOW_PATTERNS = [
+    "*.json",
+    "*.txt",
+    "*.model",
+    "pytorch_model.bin",
+    "colbert_linear.pt",
+    "sparse_linear.pt",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download BGE-M3 for offline startup")
+    parser.add_argument("--model", default="BAAI/bge-m3", help="Hugging Face model id")
+    parser.add_argument("--output", type=Path, default=Path("./models/bge-m3"))
+    parser.add_argument("--revision", default=None, help="Commit or tag to pin")
+    args = parser.parse_args()
+
+    print(f"🚀 Downloading {args.model} to {args.output}...")
+    path = snapshot_download(
+        repo_id=args.model,
+        revision=args.revision,
+        local_dir=str(args.output),
+        allow_patterns=ALLOW_PATTERNS
+    )
+    print(f"✅ Model saved to {path}")
+    print(f"   Set RAG_MODEL_PATH={path} (and HF_HUB_OFFLINE=1) to load it without network access")
+
+
+if __name__ == "__main__":
+    main()
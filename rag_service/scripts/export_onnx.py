@@ -0,0 +1,101 @@
+"""
+Export BGE-M3 to ONNX (+ dynamic int8 quantization)
+Produces the model directory used by RAG_EMBEDDING_ENGINE=onnx
+
+The graph returns the normalized CLS embedding ("dense") and the per-token
+ReLU sparse weights ("sparse"); lexical weights are built from them in
+onnx_engine.py the same way FlagEmbedding does.
+
+Usage (from rag_service/, needs torch, FlagEmbedding, onnx and onnxruntime):
+    python scripts/export_onnx.py --output ./models/bge-m3-onnx
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import torch  # noqa: E402
+from FlagEmbedding import BGEM3FlagModel  # noqa: E402
+from onnxruntime.quantization import QuantType, quantize_dynamic  # noqa: E402
+
+from onnx_engine import FP32_MODEL_FILE, INT8_MODEL_FILE  # noqa: E402
+
+
+class BGEM3OnnxWrapper(torch.nn.Module):
+    """Encoder + sparse head of BGE-M3 with plain tensor outputs"""
+
+    def __init__(self, flag_model: BGEM3FlagModel):
+        super().__init__()
+        self.encoder = flag_model.model.model
+        self.sparse_linear = flag_model.model.sparse_linear
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor):
+        hidden = self.encoder(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            return_dict=True
+        ).last_hidden_state
+        dense = torch.nn.functional.normalize(hidden[:, 0], dim=-1)
+        sparse = torch.relu(self.sparse_linear(hidden)).squeeze(-1)
+        return dense, sparse
+
+
+def export(model_name: str, output: Path, opset: int):
+    output.mkdir(parents=True, exist_ok=True)
+
+    print(f"🚀 Loading {model_name}...")
+    flag_model = BGEM3FlagModel(model_name, use_fp16=False, device="cpu")
+    wrapper = BGEM3OnnxWrapper(flag_model).eval()
+    flag_model.tokenizer.save_pretrained(output)
+
+    sample = flag_model.tokenizer(
+        ["ONNX export sample", "второй пример для динамических осей"],
+        padding=True,
+        return_tensors="pt"
+    )
+
+    fp32_path = output / FP32_MODEL_FILE
+    print(f"📦 Exporting fp32 graph to {fp32_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper,
+            (sample["input_ids"], sample["attention_mask"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["dense", "sparse"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "dense": {0: "batch"},
+                "sparse": {0: "batch", 1: "sequence"}
+            },
+            opset_version=opset,
+            do_constant_folding=True
+        )
+
+    int8_path = output / INT8_MODEL_FILE
+    print(f"🗜️ Quantizing weights to int8: {int8_path}...")
+    # Only the linear layers are quantized; the embedding table stays fp32
+    quantize_dynamic(
+        str(fp32_path),
+        str(int8_path),
+        op_types_to_quantize=["MatMul"],
+        weight_type=QuantType.QInt8,
+        per_channel=True
+    )
+    print("✅ Export complete")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export BGE-M3 to ONNX with int8 quantization")
+    parser.add_argument("--model", default="BAAI/bge-m3", help="Hugging Face id or local path")
+    parser.add_argument("--output", type=Path, default=Path("./models/bge-m3-onnx"))
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+    export(args.model, args.output, args.opset)
+
+
+if __name__ == "__main__":
+    main()
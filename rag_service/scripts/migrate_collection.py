@@ -0,0 +1,169 @@
+"""
+Collection Migration (re-sharding)
+Copies an existing Milvus collection into a new one with the current schema
+(room_id partition key, chunk position and metadata fields) and optionally
+swaps the names so the service picks up the new collection.
+
+Vectors are copied, nothing is re-embedded. Dense vectors are converted to the
+configured RAG_DENSE_VECTOR_TYPE / RAG_DENSE_INDEX_TYPE, so the same script
+moves a collection to float16 or binary storage (a binary source cannot be
+converted back to float). Fields missing in an
+older source collection are filled in: chunk_hash from the text, room_id /
+user_id / doc_type from metadata, chunk_index in primary key order
+(total_chunks is then computed per document).
+
+Usage (from rag_service/, with the RAG service stopped or read-only):
+    python scripts/migrate_collection.py --source rag_documents --num-partitions 128 --swap
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+from pymilvus import Collection, DataType, utility  # noqa: E402
+
+from chunking_service import compute_chunk_hash  # noqa: E402
+from config import settings  # noqa: E402
+from milvus_service import MilvusService  # noqa: E402
+from vector_store import DenseIndexConfig  # noqa: E402
+
+
+PROMOTED_FIELDS = ("room_id", "user_id", "doc_type")
+
+
+def iter_source(source: Collection, output_fields: List[str], batch_size: int) -> Iterator[List[Dict]]:
+    """Stream the source collection in primary key order"""
+    iterator = source.query_iterator(
+        batch_size=batch_size,
+        expr="id >= 0",
+        output_fields=output_fields
+    )
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+            yield batch
+    finally:
+        iterator.close()
+
+
+def count_chunks(source: Collection, batch_size: int) -> Dict[str, int]:
+    """Chunks per document (only needed when the source has no total_chunks)"""
+    counts: Dict[str, int] = {}
+    for batch in iter_source(source, ["id", "document_id"], batch_size):
+        for row in batch:
+            counts[row["document_id"]] = counts.get(row["document_id"], 0) + 1
+    return counts
+
+
+class FieldFiller:
+    """Derives fields that older schemas did not store"""
+
+    def __init__(self, chunk_counts: Optional[Dict[str, int]], binary_source: bool = False):
+        self.chunk_counts = chunk_counts
+        self.binary_source = binary_source
+        self.next_index: Dict[str, int] = {}
+    
+    def dense(self, row: Dict) -> Dict:
+        """Decode float16 / binary vectors (read back as bytes) so the target can convert them"""
+        value = row["dense_vector"]
+        if isinstance(value, list) and len(value) == 1 and isinstance(value[0], bytes):
+            value = value[0]
+        if isinstance(value, bytes):
+            if self.binary_source:
+                # Sign bits -> +-1, packed back into the same bits by the target
+                bits = np.unpackbits(np.frombuffer(value, dtype=np.uint8))
+                row["dense_vector"] = bits.astype(np.float32) * 2 - 1
+            else:
+                row["dense_vector"] = np.frombuffer(value, dtype=np.float16)
+        return row
+
+    def fill(self, row: Dict) -> Dict:
+        metadata = row.get("metadata") or {}
+        row["metadata"] = metadata
+        if row.get("chunk_hash") is None:
+            row["chunk_hash"] = compute_chunk_hash(row["text"])
+        for name in PROMOTED_FIELDS:
+            if row.get(name) is None:
+                value = metadata.get(name)
+                row[name] = "" if value is None else str(value)
+        if row.get("chunk_index") is None:
+            # Rows arrive in primary key order, i.e. insertion order
+            row["chunk_index"] = self.next_index.get(row["document_id"], 0)
+            self.next_index[row["document_id"]] = row["chunk_index"] + 1
+        if row.get("total_chunks") is None:
+            row["total_chunks"] = self.chunk_counts[row["document_id"]]
+        return row
+
+
+def migrate(args: argparse.Namespace):
+    if not utility.has_collection(args.source):
+        raise SystemExit(f"❌ Source collection {args.source} does not exist")
+    if utility.has_collection(args.target) and not args.drop_target:
+        raise SystemExit(f"❌ Target collection {args.target} exists (use --drop-target)")
+
+    target = MilvusService(
+        host=args.host,
+        port=args.port,
+        collection_name=args.target,
+        num_partitions=args.num_partitions,
+        dense_index=DenseIndexConfig.from_settings(settings)
+    )
+    target.create_collection(drop_existing=args.drop_target)
+
+    source = Collection(args.source)
+    source.load()
+    available = {field.name for field in source.schema.fields}
+    source_dense = next(field for field in source.schema.fields if field.name == "dense_vector")
+    if source_dense.dtype == DataType.BINARY_VECTOR and target.dense_vector_type != "binary":
+        raise SystemExit("❌ Source stores binary vectors, they cannot be converted to float")
+    output_fields = ["id"] + [name for name in MilvusService.INSERT_FIELDS if name in available]
+
+    started = time.perf_counter()
+    filler = FieldFiller(
+        None if "total_chunks" in available else count_chunks(source, args.batch_size),
+        binary_source=source_dense.dtype == DataType.BINARY_VECTOR
+    )
+
+    read = 0
+    for batch in iter_source(source, output_fields, args.batch_size):
+        target.insert_documents([filler.dense(filler.fill(row)) for row in batch])
+        read += len(batch)
+    target.flush()
+    target.close()
+
+    copied = target.collection.num_entities
+    print(f"✅ Copied {copied} rows in {time.perf_counter() - started:.1f}s")
+    if copied != read:
+        raise SystemExit(f"❌ Row count mismatch: read {read}, target has {copied}")
+
+    if args.swap:
+        backup = f"{args.source}_backup_{int(time.time())}"
+        utility.rename_collection(args.source, backup)
+        utility.rename_collection(args.target, args.source)
+        print(f"🔁 {args.target} -> {args.source} (old collection kept as {backup})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-shard a RAG collection by room_id partition key")
+    parser.add_argument("--host", default=settings.milvus_host)
+    parser.add_argument("--port", type=int, default=settings.milvus_port)
+    parser.add_argument("--source", default="rag_documents", help="Collection to copy")
+    parser.add_argument("--target", default=None, help="New collection (default: <source>_resharded)")
+    parser.add_argument("--num-partitions", type=int, default=settings.num_partitions)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--drop-target", action="store_true", help="Drop the target if it exists")
+    parser.add_argument("--swap", action="store_true", help="Rename target to source, keeping a backup")
+    args = parser.parse_args()
+    args.target = args.target or f"{args.source}_resharded"
+    migrate(args)
+
+
+if __name__ == "__main__":
+    main()
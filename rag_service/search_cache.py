@@ -0,0 +1,182 @@
+"""
+Search Result Cache
+TTL + LRU cache of search results, invalidated by write generation counters
+"""
+
+import hashlib
+import json
+import time
+import unicodedata
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from metrics import registry
+
+
+class SearchResultCache:
+    """
+    In-process cache of /search results
+
+    Keys are built from the normalized query and every search parameter.
+    Validity is tracked with generation counters instead of scanning entries:
+    each write bumps the global, room and document generations it touches,
+    and an entry is only served while the generations it was computed under
+    are unchanged. Searches filtered by document depend on that document's
+    generation, searches filtered by room on the room's generation, all other
+    searches on the global one.
+
+    Per-document state is an LRU of max_documents entries. A document's
+    generation is the global counter value of its last write, so an evicted
+    document reads as the highest evicted generation: never equal to a token
+    taken before a later write to it, at worst a spurious miss.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 30.0, max_documents: int = 100000):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of cached result lists
+            ttl_seconds: Maximum age of a cached result
+            max_documents: Maximum number of documents whose generation and room are tracked
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_documents = max_documents
+
+        self._entries: "OrderedDict[str, Tuple[float, Tuple, Dict, List[Dict]]]" = OrderedDict()
+        self._lock = Lock()
+
+        # Write generations
+        self._epoch = 0          # bumped when the affected room is unknown
+        self._global = 0
+        self._rooms: Dict[str, int] = {}
+        # document_id -> (generation, room_id), least recently written first
+        self._documents: "OrderedDict[str, Tuple[int, Optional[str]]]" = OrderedDict()
+        self._evicted_generation = 0  # generation of documents no longer tracked
+
+        self._hits = registry.counter("search_cache_hits")
+        self._misses = registry.counter("search_cache_misses")
+        self._invalidations = registry.counter("search_cache_invalidations")
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Unicode-normalize and collapse whitespace (case is kept, the model is cased)"""
+        return " ".join(unicodedata.normalize("NFKC", query).split())
+
+    def make_key(self, query: str, params: Dict) -> str:
+        """Cache key for a query and its search parameters (including filters)"""
+        payload = json.dumps(
+            {"query": self.normalize_query(query), **params},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def token(self, filters: Optional[Dict]) -> Tuple:
+        """
+        Generations a search with these filters depends on
+
+        Take the token before running the search and pass it to put(), so a
+        write that lands during the search invalidates the stored result.
+        """
+        filters = filters or {}
+        with self._lock:
+            if filters.get("document_id") is not None:
+                documents = self._as_list(filters["document_id"])
+                return (self._epoch, "doc", tuple(self._document_generation(d) for d in documents))
+            if filters.get("room_id") is not None:
+                rooms = self._as_list(filters["room_id"])
+                return (self._epoch, "room", tuple(self._rooms.get(r, 0) for r in rooms))
+            return (self._epoch, "all", self._global)
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """Cached results, or None if missing, expired or invalidated"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            self._misses.inc()
+            return None
+
+        expires_at, token, filters, results = entry
+        if expires_at < time.monotonic() or token != self.token(filters):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            self._misses.inc()
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        self._hits.inc()
+        return results
+
+    def put(self, key: str, token: Tuple, filters: Optional[Dict], results: List[Dict]):
+        """Store results computed under token"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, token, filters or {}, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, document_id: str, room_id: Optional[str] = None):
+        """
+        Record a write to a document
+
+        Args:
+            document_id: Document that was inserted, updated or deleted
+            room_id: Room (partition) of the document; None if unknown, in which
+                case the last room seen for the document is used, or every
+                entry is invalidated
+        """
+        with self._lock:
+            previous_room = self._documents.pop(document_id, (0, None))[1]
+            if room_id is None:
+                room_id = previous_room
+
+            self._global += 1
+            self._documents[document_id] = (self._global, room_id)
+            while len(self._documents) > self.max_documents:
+                _, (generation, _) = self._documents.popitem(last=False)
+                self._evicted_generation = max(self._evicted_generation, generation)
+            if room_id is None:
+                self._epoch += 1
+            else:
+                # A document moved to another room affects both rooms
+                for room in {room_id, previous_room} - {None}:
+                    self._rooms[room] = self._rooms.get(room, 0) + 1
+        self._invalidations.inc()
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+
+    def stats(self) -> Dict:
+        hits = self._hits.value
+        misses = self._misses.value
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "documents": len(self._documents),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": hits,
+            "misses": misses,
+            "invalidations": self._invalidations.value,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0
+        }
+
+    def _document_generation(self, document_id: str) -> int:
+        """Generation of a document (caller holds the lock)"""
+        entry = self._documents.get(document_id)
+        return self._evicted_generation if entry is None else entry[0]
+
+    @staticmethod
+    def _as_list(value) -> List:
+        return list(value) if isinstance(value, (list, tuple)) else [value]
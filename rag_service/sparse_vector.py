@@ -0,0 +1,69 @@
+"""
+Compact Sparse Vectors
+BGE-M3 lexical weights as parallel arrays of integer token ids and weights,
+with top-k / threshold pruning
+"""
+
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+
+class SparseVector(NamedTuple):
+    """
+    Sparse lexical vector
+
+    BGE-M3 returns {"token_id_str": weight} dicts. They are converted once,
+    right after the model, into two arrays; the embedding cache, the
+    inference IPC and the vector stores all work on the arrays and only the
+    Milvus client gets an {int: float} dict at the very end.
+    """
+
+    indices: np.ndarray  # uint32 token ids
+    values: np.ndarray   # float32 weights
+
+    @classmethod
+    def from_lexical_weights(cls, weights: Dict) -> "SparseVector":
+        """Convert a BGE-M3 lexical_weights dict (string or int token ids)"""
+        return cls(
+            np.fromiter((int(token) for token in weights.keys()), dtype=np.uint32, count=len(weights)),
+            np.fromiter(weights.values(), dtype=np.float32, count=len(weights))
+        )
+
+    @classmethod
+    def empty(cls) -> "SparseVector":
+        return cls(np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float32))
+
+    @property
+    def nnz(self) -> int:
+        """Number of non-zero entries"""
+        return len(self.indices)
+
+    def to_dict(self) -> Dict[int, float]:
+        """{token_id: weight} with Python int keys (Milvus SPARSE_FLOAT_VECTOR row)"""
+        return dict(zip(self.indices.tolist(), self.values.tolist()))
+
+    def prune(self, top_k: int = 0, min_weight: float = 0.0) -> "SparseVector":
+        """
+        Drop low-weight tokens
+
+        Args:
+            top_k: Keep at most this many highest-weight tokens (0 = no limit)
+            min_weight: Drop tokens with a weight below this (0 = keep all)
+
+        Returns:
+            Pruned vector (self if nothing was dropped)
+        """
+        indices, values = self.indices, self.values
+        if min_weight > 0:
+            keep = values >= min_weight
+            if not keep.all():
+                indices, values = indices[keep], values[keep]
+        if 0 < top_k < len(values):
+            # argpartition: O(nnz) selection of the top_k weights
+            keep = np.argpartition(values, len(values) - top_k)[len(values) - top_k:]
+            keep.sort()  # keep the original token order
+            indices, values = indices[keep], values[keep]
+        if indices is self.indices:
+            return self
+        return SparseVector(indices, values)
@@ -0,0 +1,70 @@
+"""
+Tests for reading bulk NDJSON bodies outside the streaming response
+"""
+import gzip
+import json
+
+from fastapi import Request
+
+from routes import _BodyQueue, _read_ndjson_documents
+
+
+def make_request(pieces, headers) -> Request:
+    messages = [
+        {"type": "http.request", "body": piece, "more_body": i < len(pieces) - 1}
+        for i, piece in enumerate(pieces)
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/documents/bulk",
+        "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+    }
+    return Request(scope, receive)
+
+
+def ndjson(count: int) -> bytes:
+    return "\n".join(
+        json.dumps({"text": f"документ {i}", "document_id": f"doc-{i}"}, ensure_ascii=False)
+        for i in range(count)
+    ).encode("utf-8")
+
+
+def split(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+async def read_documents(request: Request):
+    body = _BodyQueue(request)
+    return [document async for document in _read_ndjson_documents(body.stream())]
+
+
+async def test_plain_body():
+    documents = await read_documents(make_request(split(ndjson(20), 37), {"content-type": "application/x-ndjson"}))
+
+    assert [d["document_id"] for d in documents] == [f"doc-{i}" for i in range(20)]
+    assert documents[3]["text"] == "документ 3"
+
+
+async def test_gzip_body_is_decoded():
+    body = gzip.compress(ndjson(50))
+    request = make_request(split(body, 64), {"content-type": "application/x-ndjson", "content-encoding": "gzip"})
+
+    documents = await read_documents(request)
+
+    assert len(documents) == 50
+    assert all("error" not in d for d in documents)
+    assert documents[-1]["document_id"] == "doc-49"
+
+
+async def test_invalid_line_is_reported():
+    request = make_request([b'{"document_id": "doc-1"}\n' + ndjson(1)], {})
+
+    documents = await read_documents(request)
+
+    assert documents[0]["document_id"] == "doc-1" and "error" in documents[0]
+    assert documents[1]["document_id"] == "doc-0" and "error" not in documents[1]
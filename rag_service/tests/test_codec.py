@@ -0,0 +1,92 @@
+"""
+Tests for wire format negotiation and compressed request bodies
+"""
+import gzip
+
+import pytest
+from fastapi import HTTPException
+
+import codec
+from codec import JSON, MSGPACK, CodecRequest, negotiate
+
+
+def test_negotiate_defaults_to_plain_json():
+    assert negotiate(None, None) == (JSON, None)
+    assert negotiate("application/json", "br, deflate") == (JSON, None)
+
+
+def test_negotiate_msgpack(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(codec, "msgpack", object())
+
+    assert negotiate("application/x-msgpack; q=0.9, application/json", None)[0] == MSGPACK
+    assert negotiate("text/html, */*", None)[0] == JSON
+
+
+def test_negotiate_without_msgpack(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(codec, "msgpack", None)
+
+    assert negotiate("application/msgpack", None)[0] == JSON
+
+
+def test_negotiate_prefers_zstd(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(codec, "zstandard", object())
+    assert negotiate(None, "gzip, zstd")[1] == "zstd"
+
+    monkeypatch.setattr(codec, "zstandard", None)
+    assert negotiate(None, "gzip, zstd")[1] == "gzip"
+    assert negotiate(None, "zstd")[1] is None
+
+
+def make_request(pieces, headers) -> CodecRequest:
+    messages = [
+        {"type": "http.request", "body": piece, "more_body": i < len(pieces) - 1}
+        for i, piece in enumerate(pieces)
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+    }
+    return CodecRequest(scope, receive)
+
+
+def split(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+async def read(request: CodecRequest) -> bytes:
+    return b"".join([piece async for piece in request.stream()])
+
+
+async def test_stream_identity_body():
+    request = make_request([b'{"a":', b' 1}'], {"content-type": JSON})
+
+    assert await read(request) == b'{"a": 1}'
+
+
+async def test_stream_decompresses_gzip_in_pieces():
+    payload = b'{"text": "' + "длинный текст ".encode("utf-8") * 500 + b'"}'
+    request = make_request(split(gzip.compress(payload), 100), {"content-encoding": "gzip"})
+
+    assert await read(request) == payload
+
+
+async def test_json_reads_compressed_body():
+    request = make_request([gzip.compress(b'{"query": "q"}')], {"content-encoding": "gzip"})
+
+    assert await request.json() == {"query": "q"}
+    # body() caches the decoded body; stream() replays it
+    assert await read(request) == b'{"query": "q"}'
+
+
+async def test_stream_rejects_unknown_encoding():
+    request = make_request([b"data"], {"content-encoding": "br"})
+
+    with pytest.raises(HTTPException) as error:
+        await read(request)
+    assert error.value.status_code == 415
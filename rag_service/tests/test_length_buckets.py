@@ -0,0 +1,47 @@
+"""
+Tests for length-bucketed embedding batches
+"""
+from embedding_service import plan_length_buckets
+
+
+def test_buckets_cover_every_input_once():
+    lengths = [5, 300, 40, 41, 512, 7, 120, 3]
+
+    buckets = plan_length_buckets(lengths, token_budget=600, max_batch_size=4)
+
+    assert sorted(i for bucket in buckets for i in bucket) == list(range(len(lengths)))
+
+
+def test_buckets_are_sorted_longest_first():
+    lengths = [5, 300, 40, 41, 512, 7, 120, 3]
+
+    buckets = plan_length_buckets(lengths, token_budget=600, max_batch_size=4)
+
+    order = [lengths[i] for bucket in buckets for i in bucket]
+    assert order == sorted(lengths, reverse=True)
+
+
+def test_padded_size_stays_within_budget():
+    lengths = [100, 90, 80, 70, 60, 50, 40, 30, 20, 10]
+
+    buckets = plan_length_buckets(lengths, token_budget=200, max_batch_size=64)
+
+    for bucket in buckets:
+        assert len(bucket) * max(lengths[i] for i in bucket) <= 200
+    assert [len(bucket) for bucket in buckets] == [2, 2, 3, 3]
+
+
+def test_max_batch_size():
+    buckets = plan_length_buckets([1] * 10, token_budget=1000, max_batch_size=4)
+
+    assert [len(bucket) for bucket in buckets] == [4, 4, 2]
+
+
+def test_input_longer_than_budget_gets_own_batch():
+    buckets = plan_length_buckets([1000, 10, 10], token_budget=100, max_batch_size=8)
+
+    assert buckets == [[0], [1, 2]]
+
+
+def test_empty():
+    assert plan_length_buckets([], token_budget=100, max_batch_size=8) == []
@@ -0,0 +1,227 @@
+"""
+Tests for the local (in-process) vector store: writes, search, filters,
+tombstones, compaction and persistence
+"""
+import numpy as np
+import pytest
+
+import local_vector_store
+from local_vector_store import LocalVectorStore
+from sparse_vector import SparseVector
+
+
+DIM = 4
+
+
+def sparse(weights: dict) -> SparseVector:
+    return SparseVector(
+        np.array(list(weights), dtype=np.int64),
+        np.array(list(weights.values()), dtype=np.float32)
+    )
+
+
+def chunk(document_id: str, index: int, dense, weights: dict, room_id: str = "", total: int = 2) -> dict:
+    return {
+        "document_id": document_id,
+        "text": f"{document_id} chunk {index}",
+        "chunk_hash": f"{document_id}-{index}",
+        "chunk_index": index,
+        "total_chunks": total,
+        "room_id": room_id,
+        "user_id": "",
+        "doc_type": "",
+        "metadata": {"room_id": room_id} if room_id else {},
+        "dense_vector": np.asarray(dense, dtype=np.float32),
+        "sparse_vector": sparse(weights)
+    }
+
+
+def open_store(path, **kwargs) -> LocalVectorStore:
+    store = LocalVectorStore(path=str(path), dim=DIM, initial_capacity=2, **kwargs)
+    store.create_collection()
+    return store
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = open_store(tmp_path)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def filled(store: LocalVectorStore):
+    ids = store.insert_documents([
+        chunk("doc-a", 0, [1, 0, 0, 0], {1: 0.9, 2: 0.1}, room_id="room-1"),
+        chunk("doc-a", 1, [0, 1, 0, 0], {2: 0.8}, room_id="room-1"),
+        chunk("doc-b", 0, [0, 0, 1, 0], {3: 0.7, 1: 0.2}, room_id="room-2"),
+    ])
+    return store, ids
+
+
+def test_insert_returns_ids_and_grows_capacity(filled):
+    store, ids = filled
+
+    assert len(set(ids)) == 3
+    assert store.get_collection_stats()["num_entities"] == 3
+    assert store.get_collection_stats()["capacity"] >= 3
+    hashes = store.get_chunk_hashes("doc-a")
+    assert [row["chunk_hash"] for row in hashes] == ["doc-a-0", "doc-a-1"]
+    assert [row["id"] for row in hashes] == ids[:2]
+
+
+def test_dense_search_ranks_by_inner_product(filled):
+    store, ids = filled
+
+    results = store.dense_search(np.array([0.1, 0.2, 0.9, 0.0]), top_k=2)
+
+    assert [r["id"] for r in results] == [ids[2], ids[1]]
+    assert results[0]["score"] == pytest.approx(0.9, abs=1e-3)
+    assert results[0]["document_id"] == "doc-b"
+
+
+def test_sparse_search_scores_shared_tokens(filled):
+    store, ids = filled
+
+    results = store.sparse_search(sparse({1: 1.0}), top_k=5)
+
+    # doc-a/1 has no token 1 and is not returned
+    assert [r["id"] for r in results] == [ids[0], ids[2]]
+    assert results[0]["score"] == pytest.approx(0.9)
+
+
+def test_filters(filled):
+    store, ids = filled
+    query = np.array([0.0, 0.0, 1.0, 0.0])
+
+    by_document = store.dense_search(query, top_k=5, document_id_filter="doc-a")
+    by_room = store.sparse_search(sparse({1: 1.0}), top_k=5, filters={"room_id": "room-2"})
+    by_metadata = store.dense_search(query, top_k=5, filters={"metadata": {"room_id": "room-1"}})
+
+    assert {r["document_id"] for r in by_document} == {"doc-a"}
+    assert [r["id"] for r in by_room] == [ids[2]]
+    assert {r["id"] for r in by_metadata} == set(ids[:2])
+    with pytest.raises(ValueError):
+        store.dense_search(query, filters={"unknown": "x"})
+    with pytest.raises(ValueError):
+        store.sparse_search(sparse({1: 1.0}), filters={"room_id": []})
+
+
+def test_hybrid_search_applies_weights(filled):
+    store, ids = filled
+    dense_query = np.array([0.0, 0.0, 1.0, 0.0])  # prefers doc-b
+    sparse_query = sparse({1: 1.0})                 # prefers doc-a/0
+
+    dense_heavy = store.hybrid_search(dense_query, sparse_query, top_k=1, dense_weight=0.9, sparse_weight=0.1)
+    sparse_heavy = store.hybrid_search(dense_query, sparse_query, top_k=1, dense_weight=0.1, sparse_weight=0.9)
+
+    assert dense_heavy[0]["id"] == ids[2]
+    assert sparse_heavy[0]["id"] == ids[0]
+
+
+def test_delete_hides_rows(filled):
+    store, ids = filled
+
+    store.delete_by_ids([ids[0]])
+    assert ids[0] not in {r["id"] for r in store.sparse_search(sparse({1: 1.0}), top_k=5)}
+    assert [row["id"] for row in store.get_chunk_hashes("doc-a")] == [ids[1]]
+
+    assert store.delete_by_document_id("doc-b")
+    assert store.get_chunk_hashes("doc-b") == []
+    assert store.get_collection_stats()["num_entities"] == 1
+
+
+def test_update_chunk_fields_keeps_vectors(filled):
+    store, ids = filled
+
+    store.update_chunk_fields([{"id": ids[1], "chunk_index": 5, "total_chunks": 6, "room_id": "room-2"}])
+
+    results = store.dense_search(np.array([0.0, 1.0, 0.0, 0.0]), top_k=1, filters={"room_id": "room-2"})
+    assert results[0]["id"] == ids[1]
+    assert (results[0]["chunk_index"], results[0]["total_chunks"]) == (5, 6)
+
+
+def test_compaction_drops_tombstones(tmp_path):
+    store = open_store(tmp_path, compact_ratio=0.25)
+    ids = store.insert_documents([chunk("doc", i, [i + 1, 0, 0, 0], {i: 1.0}, total=8) for i in range(8)])
+    store.delete_by_ids(ids[:4])
+    assert store.get_collection_stats()["deleted_rows"] == 4
+
+    store.flush()
+
+    stats = store.get_collection_stats()
+    assert stats["deleted_rows"] == 0
+    assert stats["num_entities"] == 4
+    # Primary keys survive compaction and new ones keep increasing
+    assert [row["id"] for row in store.get_chunk_hashes("doc")] == ids[4:]
+    assert [r["id"] for r in store.sparse_search(sparse({6: 1.0}))] == [ids[6]]
+    new_id, = store.insert_documents([chunk("doc", 8, [0, 1, 0, 0], {8: 1.0})])
+    assert new_id > max(ids)
+    store.close()
+
+
+def test_crash_during_compaction_keeps_ids_aligned(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    store = open_store(tmp_path, compact_ratio=0.25)
+    ids = store.insert_documents([chunk("doc", i, np.eye(DIM)[i % DIM] * (i + 1), {i: 1.0}, total=8) for i in range(8)])
+    store.flush()
+    store.delete_by_ids(ids[:4])
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    # The compacted dense file is written, then the process dies before meta.json
+    monkeypatch.setattr(local_vector_store.json, "dump", crash)
+    with pytest.raises(OSError):
+        store.flush()
+    monkeypatch.undo()
+
+    reopened = open_store(tmp_path)
+    try:
+        # Last committed state: all 8 rows, each id still next to its own vector
+        scores = {hit["id"]: hit["score"] for hit in reopened.dense_search(np.ones(DIM), top_k=8)}
+        assert scores == pytest.approx({pk: i + 1 for i, pk in enumerate(ids)})
+        assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+            ["meta.json", reopened._dense_file, reopened._sparse_file]
+        )
+    finally:
+        reopened.close()
+
+
+def test_reload_from_disk(tmp_path):
+    store = open_store(tmp_path)
+    ids = store.insert_documents([
+        chunk("doc-a", 0, [1, 0, 0, 0], {1: 0.9}, room_id="room-1"),
+        chunk("doc-a", 1, [0, 1, 0, 0], {2: 0.8}, room_id="room-1"),
+    ])
+    store.delete_by_ids([ids[1]])
+    store.close()
+
+    reopened = open_store(tmp_path)
+    try:
+        assert [row["id"] for row in reopened.get_chunk_hashes("doc-a")] == [ids[0]]
+        dense = reopened.dense_search(np.array([1.0, 0.0, 0.0, 0.0]), top_k=5)
+        assert [r["id"] for r in dense] == [ids[0]]
+        assert dense[0]["metadata"] == {"room_id": "room-1"}
+        assert [r["id"] for r in reopened.sparse_search(sparse({1: 1.0}), filters={"room_id": "room-1"})] == [ids[0]]
+    finally:
+        reopened.close()
+
+
+def test_drop_existing(tmp_path):
+    store = open_store(tmp_path)
+    store.insert_documents([chunk("doc-a", 0, [1, 0, 0, 0], {1: 0.9})])
+    store.close()
+
+    dropped = LocalVectorStore(path=str(tmp_path), dim=DIM)
+    dropped.create_collection(drop_existing=True)
+    try:
+        assert dropped.get_collection_stats()["num_entities"] == 0
+    finally:
+        dropped.close()
+
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    open_store(tmp_path).close()
+
+    with pytest.raises(ValueError):
+        LocalVectorStore(path=str(tmp_path), dim=DIM + 1).create_collection()
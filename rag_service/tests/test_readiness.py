@@ -0,0 +1,53 @@
+"""
+Tests for background startup retries
+"""
+import asyncio
+
+from readiness import Readiness
+
+
+def flaky_loader(failures: int):
+    calls = []
+
+    def load():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise RuntimeError("model download failed")
+
+    return load, calls
+
+
+async def test_failed_load_is_retried():
+    readiness = Readiness(retries=3, backoff_seconds=0.0)
+    load, calls = flaky_loader(failures=2)
+    readiness.start(load)
+
+    assert await readiness.wait(timeout=5.0)
+    assert len(calls) == 3
+    assert not readiness.is_failed
+    assert readiness.status()["error"] is None
+
+
+async def test_failed_for_good_after_retries():
+    readiness = Readiness(retries=2, backoff_seconds=0.0)
+    load, calls = flaky_loader(failures=10)
+    readiness.start(load)
+
+    assert not await readiness.wait(timeout=5.0)
+    assert len(calls) == 3
+    assert readiness.is_failed
+    status = readiness.status()
+    assert status["status"] == "failed"
+    assert status["error"] == "RuntimeError: model download failed"
+
+
+async def test_error_is_reported_while_retrying():
+    readiness = Readiness(retries=5, backoff_seconds=30.0)
+    load, _ = flaky_loader(failures=10)
+    readiness.start(load)
+    await asyncio.sleep(0.1)
+
+    status = readiness.status()
+    assert status["status"] == "loading"
+    assert status["error"] == "RuntimeError: model download failed"
+    assert not readiness.is_failed
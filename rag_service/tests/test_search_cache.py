@@ -0,0 +1,124 @@
+"""
+Tests for SearchResultCache generations, room moves, TTL and the document LRU
+"""
+import pytest
+
+import search_cache
+from search_cache import SearchResultCache
+
+
+RESULTS = [{"text": "chunk", "document_id": "doc-1", "score": 1.0}]
+
+
+def cache_search(cache: SearchResultCache, query: str, filters=None) -> str:
+    """Store a result the way the orchestrator does (token taken before the search)"""
+    key = cache.make_key(query, {"filters": filters})
+    cache.put(key, cache.token(filters), filters, RESULTS)
+    return key
+
+
+def test_write_bumps_document_generation():
+    cache = SearchResultCache()
+    doc_key = cache_search(cache, "q", {"document_id": "doc-1"})
+    other_key = cache_search(cache, "q", {"document_id": "doc-2"})
+    global_key = cache_search(cache, "q")
+
+    cache.invalidate("doc-1", "room-1")
+
+    assert cache.get(doc_key) is None
+    assert cache.get(other_key) == RESULTS
+    assert cache.get(global_key) is None
+
+
+def test_write_during_search_invalidates_result():
+    cache = SearchResultCache()
+    filters = {"document_id": "doc-1"}
+    token = cache.token(filters)
+    cache.invalidate("doc-1", "room-1")  # lands while the search runs
+    key = cache.make_key("q", {"filters": filters})
+    cache.put(key, token, filters, RESULTS)
+
+    assert cache.get(key) is None
+
+
+def test_room_move_invalidates_both_rooms():
+    cache = SearchResultCache()
+    cache.invalidate("doc-1", "room-a")
+    room_a = cache_search(cache, "q", {"room_id": "room-a"})
+    room_b = cache_search(cache, "q", {"room_id": "room-b"})
+    room_c = cache_search(cache, "q", {"room_id": "room-c"})
+
+    cache.invalidate("doc-1", "room-b")
+
+    assert cache.get(room_a) is None
+    assert cache.get(room_b) is None
+    assert cache.get(room_c) == RESULTS
+
+
+def test_unknown_room_uses_last_seen_room():
+    cache = SearchResultCache()
+    cache.invalidate("doc-1", "room-a")
+    room_a = cache_search(cache, "q", {"room_id": "room-a"})
+    room_b = cache_search(cache, "q", {"room_id": "room-b"})
+
+    cache.invalidate("doc-1")  # e.g. a delete
+
+    assert cache.get(room_a) is None
+    assert cache.get(room_b) == RESULTS
+
+
+def test_ttl_expiry(monkeypatch: pytest.MonkeyPatch):
+    now = [1000.0]
+    monkeypatch.setattr(search_cache.time, "monotonic", lambda: now[0])
+    cache = SearchResultCache(ttl_seconds=30.0)
+    key = cache_search(cache, "q")
+
+    now[0] += 29.0
+    assert cache.get(key) == RESULTS
+    now[0] += 2.0
+    assert cache.get(key) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_are_lru_bounded():
+    cache = SearchResultCache(max_entries=2)
+    first = cache_search(cache, "first")
+    second = cache_search(cache, "second")
+    assert cache.get(first) == RESULTS  # first is now the most recent
+    cache_search(cache, "third")
+
+    assert cache.get(second) is None
+    assert cache.get(first) == RESULTS
+
+
+def test_document_tracking_is_bounded():
+    cache = SearchResultCache(max_documents=3)
+    for i in range(10):
+        cache.invalidate(f"doc-{i}", f"room-{i}")
+
+    assert cache.stats()["documents"] == 3
+
+
+def test_evicted_document_never_serves_stale_results():
+    cache = SearchResultCache(max_documents=1)
+    filters = {"document_id": "doc-1"}
+    cache.invalidate("doc-1", "room-1")
+    key = cache_search(cache, "q", filters)
+
+    cache.invalidate("doc-2", "room-1")  # evicts doc-1
+    assert cache.get(key) == RESULTS  # no write to doc-1 since the search
+
+    cache.invalidate("doc-1", "room-1")
+    cache.invalidate("doc-3", "room-1")  # evicts doc-1 again
+    assert cache.get(key) is None
+
+
+def test_evicted_document_room_falls_back_to_epoch():
+    cache = SearchResultCache(max_documents=1)
+    cache.invalidate("doc-1", "room-a")
+    room_b = cache_search(cache, "q", {"room_id": "room-b"})
+    cache.invalidate("doc-2", "room-a")  # evicts doc-1 and its room
+
+    cache.invalidate("doc-1")  # room unknown now
+
+    assert cache.get(room_b) is None
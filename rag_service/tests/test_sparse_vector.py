@@ -0,0 +1,52 @@
+"""
+Tests for SparseVector conversion and pruning
+"""
+import numpy as np
+import pytest
+
+from sparse_vector import SparseVector
+
+
+def vector() -> SparseVector:
+    return SparseVector.from_lexical_weights({"10": 0.5, "3": 0.05, "7": 0.3, "42": 0.01})
+
+
+def test_from_lexical_weights():
+    sparse = vector()
+
+    assert sparse.indices.dtype == np.uint32
+    assert sparse.values.dtype == np.float32
+    assert sparse.nnz == 4
+    assert sparse.to_dict() == pytest.approx({10: 0.5, 3: 0.05, 7: 0.3, 42: 0.01})
+
+
+def test_prune_without_limits_returns_self():
+    sparse = vector()
+
+    assert sparse.prune() is sparse
+    assert sparse.prune(top_k=10, min_weight=0.001) is sparse
+
+
+def test_prune_min_weight():
+    pruned = vector().prune(min_weight=0.05)
+
+    assert pruned.indices.tolist() == [10, 3, 7]
+
+
+def test_prune_top_k_keeps_token_order():
+    pruned = vector().prune(top_k=2)
+
+    assert pruned.indices.tolist() == [10, 7]
+    assert pruned.values.tolist() == [np.float32(0.5), np.float32(0.3)]
+
+
+def test_prune_top_k_and_min_weight():
+    pruned = vector().prune(top_k=3, min_weight=0.1)
+
+    assert pruned.indices.tolist() == [10, 7]
+
+
+def test_prune_empty():
+    empty = SparseVector.empty()
+
+    assert empty.prune(top_k=5, min_weight=0.1).nnz == 0
@@ -0,0 +1,96 @@
+"""
+Tests for upsert diffing (RAGOrchestrator._diff_chunks)
+"""
+from orchestrator import RAGOrchestrator
+
+
+def new_chunks(*hashes, metadata=None):
+    return [
+        {
+            "document_id": "doc",
+            "text": f"text {chunk_hash}",
+            "chunk_hash": chunk_hash,
+            "chunk_index": index,
+            "total_chunks": len(hashes),
+            "metadata": dict(metadata or {})
+        }
+        for index, chunk_hash in enumerate(hashes)
+    ]
+
+
+def stored_chunks(*hashes, metadata=None):
+    """Rows as returned by VectorStore.get_chunk_hashes (primary key = 100 + position)"""
+    return [
+        {"id": 100 + chunk["chunk_index"], **{k: chunk[k] for k in ("chunk_hash", "chunk_index", "total_chunks", "metadata")}}
+        for chunk in new_chunks(*hashes, metadata=metadata)
+    ]
+
+
+def test_unchanged_document():
+    to_insert, delete_ids, to_update = RAGOrchestrator._diff_chunks(new_chunks("a", "b"), stored_chunks("a", "b"))
+
+    assert (to_insert, delete_ids, to_update) == ([], [], [])
+
+
+def test_changed_and_removed_chunks():
+    to_insert, delete_ids, to_update = RAGOrchestrator._diff_chunks(
+        new_chunks("a", "x", "c"),
+        stored_chunks("a", "b", "c", "d")
+    )
+
+    assert [chunk["chunk_hash"] for chunk in to_insert] == ["x"]
+    assert sorted(delete_ids) == [101, 103]
+    # total_chunks went from 4 to 3: positions are rewritten, not re-embedded
+    assert [(update["id"], update["chunk_index"], update["total_chunks"]) for update in to_update] == [
+        (100, 0, 3), (102, 2, 3)
+    ]
+
+
+def test_inserted_paragraph_only_embeds_new_chunk():
+    to_insert, delete_ids, to_update = RAGOrchestrator._diff_chunks(
+        new_chunks("new", "a", "b"),
+        stored_chunks("a", "b")
+    )
+
+    assert [chunk["chunk_hash"] for chunk in to_insert] == ["new"]
+    assert delete_ids == []
+    assert [(update["id"], update["chunk_index"]) for update in to_update] == [(100, 1), (101, 2)]
+
+
+def test_duplicate_chunks_are_matched_as_multiset():
+    to_insert, delete_ids, to_update = RAGOrchestrator._diff_chunks(
+        new_chunks("a", "a", "a"),
+        stored_chunks("a", "a")
+    )
+
+    assert len(to_insert) == 1
+    assert delete_ids == []
+    # stored copies keep their positions; only total_chunks changes
+    assert [(update["id"], update["chunk_index"]) for update in to_update] == [(100, 0), (101, 1)]
+
+
+def test_duplicate_prefers_stored_copy_at_same_position():
+    stored = stored_chunks("a", "b", "a")
+
+    to_insert, delete_ids, _ = RAGOrchestrator._diff_chunks(new_chunks("x", "y", "a"), stored)
+
+    assert delete_ids == [100, 101]
+    assert len(to_insert) == 2
+
+
+def test_metadata_change_updates_filter_columns():
+    to_insert, delete_ids, to_update = RAGOrchestrator._diff_chunks(
+        new_chunks("a", metadata={"room_id": 7, "doc_type": "note"}),
+        stored_chunks("a", metadata={"room_id": 3})
+    )
+
+    assert to_insert == [] and delete_ids == []
+    assert to_update == [{
+        "id": 100,
+        "chunk_index": 0,
+        "total_chunks": 1,
+        "room_id": "7",
+        "user_id": "",
+        "doc_type": "note",
+        "metadata": {"room_id": 7, "doc_type": "note"}
+    }]
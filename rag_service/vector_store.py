@@ -0,0 +1,299 @@
+"""
+Vector Store Interface
+Common contract for the Milvus backend and the in-process local backend
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from sparse_vector import SparseVector
+
+
+@dataclass
+class DenseIndexConfig:
+    """
+    Dense vector storage, ANN index and default search parameters
+
+    vector_type, index_type, nlist and pq_m apply when a collection is
+    created; ef, nprobe, search_list and rerank are search defaults that a
+    request can override with dense_params. The local backend searches
+    exactly and ignores all of them.
+    """
+
+    vector_type: str = "float"    # float | float16 | binary
+    index_type: str = "HNSW"      # HNSW | IVF_FLAT | IVF_SQ8 | IVF_PQ | DISKANN | FLAT | BIN_FLAT | BIN_IVF_FLAT
+    nlist: int = 1024             # IVF clusters
+    pq_m: int = 64                # IVF_PQ sub-quantizers (must divide the dimension)
+    ef: int = 100                 # HNSW candidate list size
+    nprobe: int = 16              # IVF clusters probed per search
+    search_list: int = 100        # DISKANN candidate list size
+    rerank: bool = False          # Re-score candidates with full-precision vectors
+    rerank_multiplier: int = 4    # Candidates fetched per result when re-ranking
+
+    @classmethod
+    def from_settings(cls, settings) -> "DenseIndexConfig":
+        """Build from the RAG_DENSE_* settings"""
+        return cls(
+            vector_type=settings.dense_vector_type,
+            index_type=settings.dense_index_type,
+            nlist=settings.dense_nlist,
+            pq_m=settings.dense_pq_m,
+            ef=settings.dense_ef,
+            nprobe=settings.dense_nprobe,
+            search_list=settings.dense_search_list,
+            rerank=settings.dense_rerank,
+            rerank_multiplier=settings.dense_rerank_multiplier
+        )
+
+    def search_options(self, overrides: Optional[Dict] = None) -> Dict:
+        """Search defaults with the non-None per-request overrides applied"""
+        options = {
+            "ef": self.ef,
+            "nprobe": self.nprobe,
+            "search_list": self.search_list,
+            "rerank": self.rerank,
+            "rerank_multiplier": self.rerank_multiplier
+        }
+        options.update({k: v for k, v in (overrides or {}).items() if v is not None and k in options})
+        return options
+
+
+class VectorStore(ABC):
+    """
+    Storage and retrieval of chunk embeddings (dense + sparse)
+    RAGOrchestrator only talks to this interface
+    """
+
+    # RRF constant (usually 60)
+    RRF_K = 60
+
+    # Scalar fields that search filters can match on (equality or "in" a list);
+    # room_id, user_id and doc_type are promoted from chunk metadata, "" = unset
+    FILTER_FIELDS = ["document_id", "room_id", "user_id", "doc_type"]
+
+    @abstractmethod
+    def create_collection(self, drop_existing: bool = False):
+        """Create (or open) the underlying collection"""
+
+    @abstractmethod
+    def insert_documents(self, chunks: List[Dict], flush: bool = False) -> List[int]:
+        """Insert chunk rows with 'dense_vector' and 'sparse_vector'; returns their primary keys"""
+
+    @abstractmethod
+    def get_chunk_hashes(self, document_id: str) -> List[Dict]:
+        """Primary keys and content hashes of the stored chunks of a document"""
+
+    @abstractmethod
+    def get_document_chunks(
+        self,
+        document_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Dict:
+        """
+        Page of a document's chunks in order
+        Returns {"total": <chunks in document>, "chunks": [...]}
+        """
+
+    @abstractmethod
+    def iter_document_chunks(self, document_id: str, batch_size: int = 1000) -> Iterator[Dict]:
+        """Iterate over all chunks of a document in order"""
+
+    @abstractmethod
+    def update_chunk_fields(self, updates: List[Dict], flush: bool = False):
+        """
+        Rewrite scalar fields of stored chunks without re-embedding
+        Each update is {"id": <primary key>, <field>: <value>, ...}; vectors are kept
+        """
+
+    @abstractmethod
+    def delete_by_ids(self, ids: List[int], flush: bool = False):
+        """Delete chunks by primary key"""
+
+    @abstractmethod
+    def delete_by_document_id(self, document_id: str) -> bool:
+        """Delete all chunks of a document"""
+
+    @abstractmethod
+    def dense_search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = 5,
+        document_id_filter: Optional[str] = None,
+        consistency_level: Optional[str] = None,
+        filters: Optional[Dict] = None,
+        dense_params: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Dense vector search
+        dense_params overrides DenseIndexConfig search defaults (ef, nprobe,
+        search_list, rerank, rerank_multiplier) for this request
+        """
+
+    @abstractmethod
+    def sparse_search(
+        self,
+        query_sparse: SparseVector,
+        top_k: int = 5,
+        document_id_filter: Optional[str] = None,
+        consistency_level: Optional[str] = None,
+        filters: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Sparse (lexical) vector search"""
+
+    @abstractmethod
+    def hybrid_search(
+        self,
+        query_dense: np.ndarray,
+        query_sparse: SparseVector,
+        top_k: int = 5,
+        dense_weight: float = 0.5,
+        sparse_weight: float = 0.5,
+        consistency_level: Optional[str] = None,
+        engine: str = "native",
+        fusion: str = "rrf",
+        candidate_multiplier: int = 3,
+        filters: Optional[Dict] = None,
+        dense_params: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Dense + sparse search with rank fusion"""
+
+    @abstractmethod
+    def flush(self):
+        """Persist outstanding writes now"""
+
+    @abstractmethod
+    def close(self):
+        """Persist outstanding writes and release resources"""
+
+    @abstractmethod
+    def get_collection_stats(self) -> Dict:
+        """Collection statistics"""
+
+    def convert_sparse_vector(self, sparse: SparseVector):
+        """Convert a sparse vector into the store's insert format"""
+        return sparse.to_dict()
+
+    @staticmethod
+    def merge_filters(filters: Optional[Dict], document_id_filter: Optional[str] = None) -> Dict:
+        """
+        Combine the legacy document_id_filter argument with a filters dict
+
+        Filters map a FILTER_FIELDS name to a value or a list of values, and
+        "metadata" to a dict of JSON key -> value equalities. None values are
+        dropped.
+
+        Raises:
+            ValueError: On an empty list of values (it would match nothing)
+        """
+        merged = {key: value for key, value in (filters or {}).items() if value is not None}
+        for key, value in merged.items():
+            if isinstance(value, (list, tuple)) and not value:
+                raise ValueError(f"Empty value list for filter field: {key}")
+        if document_id_filter is not None:
+            merged["document_id"] = document_id_filter
+        return merged
+
+    def _reciprocal_rank_fusion(
+        self,
+        dense_results: List[Dict],
+        sparse_results: List[Dict],
+        dense_weight: float,
+        sparse_weight: float,
+        k: int = 60
+    ) -> List[Dict]:
+        """
+        Combine results using Reciprocal Rank Fusion
+
+        Args:
+            dense_results: Results from dense search
+            sparse_results: Results from sparse search
+            dense_weight: Weight for dense results
+            sparse_weight: Weight for sparse results
+            k: RRF constant (usually 60)
+
+        Returns:
+            Fused and ranked results
+        """
+        # Create a mapping of chunk primary key to RRF score
+        scores = {}
+
+        # Process dense results
+        for rank, result in enumerate(dense_results, 1):
+            key = result["id"]
+            rrf_score = dense_weight / (k + rank)
+            if key not in scores:
+                scores[key] = {"score": 0, "data": result}
+            scores[key]["score"] += rrf_score
+
+        # Process sparse results
+        for rank, result in enumerate(sparse_results, 1):
+            key = result["id"]
+            rrf_score = sparse_weight / (k + rank)
+            if key not in scores:
+                scores[key] = {"score": 0, "data": result}
+            scores[key]["score"] += rrf_score
+
+        # Sort by RRF score
+        sorted_results = sorted(
+            scores.values(),
+            key=lambda x: x["score"],
+            reverse=True
+        )
+
+        # Format results
+        return [
+            {
+                **item["data"],
+                "rrf_score": item["score"]
+            }
+            for item in sorted_results
+        ]
+
+
+def create_vector_store(
+    backend: str,
+    milvus_host: str = "localhost",
+    milvus_port: int = 19530,
+    local_path: str = "./local_store",
+    flush_interval_seconds: float = 30.0,
+    flush_max_pending: int = 10000,
+    num_partitions: int = 64,
+    dense_index: Optional[DenseIndexConfig] = None
+) -> VectorStore:
+    """
+    Build the configured vector store backend
+
+    Backends are imported lazily so the local backend works without pymilvus.
+
+    Args:
+        backend: "milvus" or "local"
+        milvus_host: Milvus server host (milvus only)
+        milvus_port: Milvus server port (milvus only)
+        local_path: Data directory (local only)
+        flush_interval_seconds: Flush unflushed writes at least this often
+        flush_max_pending: Flush as soon as this many rows are unflushed
+        num_partitions: Partitions behind the room_id partition key (milvus only)
+        dense_index: Dense vector type, index and search defaults (milvus only)
+    """
+    if backend == "milvus":
+        from milvus_service import MilvusService
+        return MilvusService(
+            host=milvus_host,
+            port=milvus_port,
+            flush_interval_seconds=flush_interval_seconds,
+            flush_max_pending=flush_max_pending,
+            num_partitions=num_partitions,
+            dense_index=dense_index
+        )
+    if backend == "local":
+        from local_vector_store import LocalVectorStore
+        return LocalVectorStore(
+            path=local_path,
+            flush_interval_seconds=flush_interval_seconds,
+            flush_max_pending=flush_max_pending
+        )
+    raise ValueError(f"Invalid vector store backend: {backend}")